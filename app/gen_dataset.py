@@ -11,6 +11,7 @@ from pathlib import Path
 from rich.console import Console
 
 from dataset_generation.transform import build_datasets
+from flowgraph.catalog import DEFAULT_CATALOG_PATH, load_catalog
 
 
 def arg_parser() -> argparse.ArgumentParser:
@@ -27,6 +28,19 @@ def arg_parser() -> argparse.ArgumentParser:
         '--dataset', default='datasets', type=Path,
         help='Directory to save the generated dataset'
     )
+    parser.add_argument(
+        '--patch', action='store_true',
+        help='Emit compact patches instead of full flowgraphs for edits'
+    )
+    parser.add_argument(
+        '--elide-defaults', action='store_true',
+        help='Drop block parameters left at their GRC defaults (needs GNU Radio '
+             'or a cached block catalog)'
+    )
+    parser.add_argument(
+        '--catalog', default=DEFAULT_CATALOG_PATH, type=Path,
+        help='Path of the cached GRC block catalog'
+    )
     return parser
 
 
@@ -37,7 +51,11 @@ def main_entry():
     console = Console()
     console.print('[bold yellow]🔄 Dataset generation activated...[/bold yellow]')
 
-    build_datasets(args.traces, args.dataset)
+    catalog = None
+    if args.elide_defaults:
+        catalog = load_catalog(args.catalog)
+
+    build_datasets(args.traces, args.dataset, patch=args.patch, catalog=catalog)
 
     console.print('[bold green]✔ Dataset generation completed successfully![/bold green]')
     console.print('[dim]Generated dataset files:[/dim]')
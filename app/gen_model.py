@@ -9,8 +9,12 @@ import argparse
 from pathlib import Path
 
 from rich.console import Console
+from rich.table import Table
 
-from llm.tune import ModelTrainer
+from llm.tune import ModelTrainer, find_last_checkpoint
+from llm.distributed import train_distributed, scaling_benchmark
+from llm.export import EXPORT_DTYPES, export_merged_model
+from llm.prompts import ContextSerializer
 
 
 def arg_parser() -> argparse.ArgumentParser:
@@ -31,14 +35,88 @@ def arg_parser() -> argparse.ArgumentParser:
         '--output', default='output', type=Path,
         help='Directory to save model outputs'
     )
+    parser.add_argument(
+        '--resume', default=True, action=argparse.BooleanOptionalAction,
+        help='Resume from the latest checkpoint found in the output directory'
+    )
+    parser.add_argument(
+        '--save-steps', default=100, type=int,
+        help='Number of optimizer steps between checkpoints'
+    )
+    parser.add_argument(
+        '--save-total-limit', default=None, type=int,
+        help='Keep only the latest N checkpoints, deleting older ones '
+             '(default keeps all)'
+    )
+    parser.add_argument(
+        '--adapter-only-checkpoints', action='store_true',
+        help='Save only the adapter weights in checkpoints (smaller and faster, '
+             'but a resume restarts the optimizer and scheduler)'
+    )
+    parser.add_argument(
+        '--context-budget', default=None, type=int,
+        help='Maximum number of tokens of flowgraph context in a prompt'
+    )
+    parser.add_argument(
+        '--prune-context', action='store_true', default=None,
+        help='Leave out blocks not connected to the blocks named in the prompt'
+    )
+    parser.add_argument(
+        '--procs', default=1, type=int,
+        help='Number of local CPU processes for data parallel training'
+    )
+    parser.add_argument(
+        '--scaling-benchmark', action='store_true',
+        help='Report training throughput and scaling efficiency for 1..--procs'
+    )
+    parser.add_argument(
+        '--benchmark-steps', default=10, type=int,
+        help='Optimizer steps per run in the scaling benchmark'
+    )
+    parser.add_argument(
+        '--export', default=None, type=Path,
+        help='Directory to write the merged, single-file model artifact to'
+    )
+    parser.add_argument(
+        '--export-dtype', default='bf16', choices=tuple(EXPORT_DTYPES),
+        help='Weight precision of the exported model artifact'
+    )
+    parser.add_argument(
+        '--export-only', action='store_true',
+        help='Skip training and only export the adapter found in --output'
+    )
     return parser
 
 
+def draw_scaling_table(console: Console, report: list):
+    table = Table(title='CPU data parallel scaling')
+    table.add_column('Processes', style='cyan')
+    table.add_column('Samples/s', style='magenta')
+    table.add_column('Speedup')
+    table.add_column('Efficiency')
+
+    for row in report:
+        table.add_row(
+            str(row['procs']),
+            f'{row["samples_per_second"]:.3f}',
+            f'{row["speedup"]:.2f}x',
+            f'{row["efficiency"]:.0%}'
+        )
+    console.print(table)
+
+
 def main_entry():
     parser = arg_parser()
     args = parser.parse_args()
 
     console = Console()
+
+    if args.export_only:
+        if args.export is None:
+            console.print('[bold red]❌ --export-only requires --export[/bold red]')
+            return 1
+        return export_model(console, args)
+
     console.print('[bold yellow]🔄 Training activated...[/bold yellow]')
 
     if not args.dataset.exists():
@@ -47,15 +125,54 @@ def main_entry():
 
     args.output.mkdir(parents=True, exist_ok=True)
 
-    trainer = ModelTrainer(
-        dataset_dir=args.dataset,
-        model_name=args.model,
-        output_dir=args.output
-    )
-    trainer.train()
+    trainer_kwargs = {
+        'dataset_dir': args.dataset,
+        'model_name': args.model,
+        'output_dir': args.output,
+        'context_serializer': ContextSerializer(
+            max_tokens=args.context_budget, prune=bool(args.prune_context)
+        )
+    }
+
+    if args.scaling_benchmark:
+        report = scaling_benchmark(
+            args.procs, trainer_kwargs, max_steps=args.benchmark_steps
+        )
+        draw_scaling_table(console, report)
+        return 0
+
+    checkpoint = find_last_checkpoint(args.output) if args.resume else None
+    if checkpoint:
+        console.print(f'[yellow]↻ Resuming from checkpoint:[/yellow] {checkpoint}')
+
+    train_kwargs = {
+        'save_steps': args.save_steps,
+        'save_total_limit': args.save_total_limit,
+        'adapter_only_checkpoints': args.adapter_only_checkpoints,
+        'resume_from_checkpoint': checkpoint
+    }
+
+    if args.procs > 1:
+        console.print(f'[yellow]Running {args.procs} CPU training processes[/yellow]')
+        metrics = train_distributed(args.procs, trainer_kwargs, train_kwargs)
+        console.print(f'[dim]Effective batch size: {metrics["effective_batch_size"]}[/dim]')
+    else:
+        trainer = ModelTrainer(**trainer_kwargs)
+        trainer.train(**train_kwargs)
 
     console.print('[bold green]✔ Training complete![/bold green]')
     console.print(f'[dim]Model saved to: {args.output}[/dim]')
+
+    if args.export is not None:
+        return export_model(console, args)
+    return 0
+
+
+def export_model(console: Console, args: argparse.Namespace) -> int:
+    console.print('[bold yellow]🔄 Merging adapter into the base model...[/bold yellow]')
+    export_path = export_merged_model(args.output, args.export, args.export_dtype)
+    console.print('[bold green]✔ Export complete![/bold green]')
+    console.print(f'[dim]Merged model saved to: {export_path}[/dim]')
     return 0
 
 
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import sys
+import asyncio
+import argparse
+
+from rich.console import Console
+
+from llm.inference import CPU_MODES, ModelEngine
+from llm.prompts import ContextSerializer
+from llm.server import DEFAULT_SOCKET_PATH, InferenceServer
+
+
+def arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='llm_server',
+        description='GNU Radio LLM - Shared local inference server'
+    )
+
+    parser.add_argument(
+        '--socket', default=DEFAULT_SOCKET_PATH, type=str,
+        help='Path of the Unix socket to listen on'
+    )
+    parser.add_argument(
+        '--model', default='output', type=str,
+        help='The model name to load (default is the tuned output model)'
+    )
+    parser.add_argument(
+        '--cpu-mode', default='fp32', choices=CPU_MODES,
+        help='Weight precision used when running without CUDA'
+    )
+    parser.add_argument(
+        '--context-budget', default=None, type=int,
+        help='Maximum number of tokens of flowgraph context in a prompt '
+             '(defaults to the setting the model was trained with). Blocks '
+             'left out of the context are kept when the model replies with a '
+             'full flowgraph, name them in the prompt to remove them'
+    )
+    parser.add_argument(
+        '--prune-context', action='store_true', default=None,
+        help='Leave out blocks not connected to the blocks named in the prompt '
+             '(defaults to the setting the model was trained with). Like with '
+             '--context-budget, left out blocks are kept in full flowgraph replies'
+    )
+    parser.add_argument(
+        '--max-batch', default=8, type=int,
+        help='Maximum number of requests decoded together'
+    )
+    return parser
+
+
+def main_entry() -> int:
+    parser = arg_parser()
+    args = parser.parse_args()
+
+    console = Console()
+
+    console.print(f'Loading model [cyan]{args.model}[/cyan]...')
+    # Without context options the settings the model was trained with apply
+    serializer = None
+    if args.context_budget is not None or args.prune_context is not None:
+        serializer = ContextSerializer(
+            max_tokens=args.context_budget, prune=bool(args.prune_context)
+        )
+
+    engine = ModelEngine(
+        model_name=args.model,
+        cpu_mode=args.cpu_mode,
+        context_serializer=serializer
+    )
+    engine.warm_up()
+
+    server = InferenceServer(engine, socket_path=args.socket, max_batch_size=args.max_batch)
+    console.print(f'🛰️  Serving on [bold]{args.socket}[/bold]')
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        print('\nExiting...')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_entry())
@@ -4,8 +4,13 @@
 #
 
 import sys
+import json
 import argparse
 
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
@@ -14,10 +19,21 @@ from prompt_toolkit import prompt
 
 from pydantic import ValidationError
 
+from flowgraph.catalog import DEFAULT_CATALOG_PATH, BlockCatalog, load_catalog
 from flowgraph.schema import Flowgraph, FlowgraphAction
+from flowgraph.patch import FlowgraphPatch, apply_patch
 from flowgraph.controller import FlowgraphController
+from flowgraph.autotune import TuneSettings
+from flowgraph.perf import BlockStats
+
+from llm import __version__
+from llm.background import BackgroundModelEngine
+from llm.cache import DEFAULT_CACHE_PATH, ResponseCache
+from llm.prompts import ContextSerializer, build_retry_prompt
+from llm.client import RemoteModelEngine
+from llm.utils import model_fingerprint, repair_json
 
-from llm.inference import ModelEngine
+from profiling.spans import PROFILER, Turn, append_jsonl, span
 
 
 def draw_flowgraph_table(console: Console, flowgraph: Flowgraph):
@@ -42,20 +58,266 @@ def draw_flowgraph_table(console: Console, flowgraph: Flowgraph):
     console.print(Panel(conn_table))
 
 
+def draw_profile_table(console: Console, turn: Turn):
+    """
+    Draw the timing breakdown of a single turn.
+    """
+    table = Table(title=f'Turn timing ({turn.total_ms:.1f} ms)')
+    table.add_column('Span', style='cyan')
+    table.add_column('Parent', style='dim')
+    table.add_column('Start (ms)', justify='right')
+    table.add_column('Duration (ms)', justify='right', style='magenta')
+    table.add_column('Share', justify='right')
+
+    for entry in sorted(turn.spans, key=lambda entry: entry.start_ms):
+        share = entry.duration_ms / turn.total_ms if turn.total_ms else 0.0
+        table.add_row(
+            entry.name, entry.parent or '', f'{entry.start_ms:.1f}',
+            f'{entry.duration_ms:.1f}', f'{share:.0%}'
+        )
+
+    console.print(table)
+
+
+def draw_perf_table(console: Console, stats: List[BlockStats], sample_rate: float):
+    """
+    Draw the throughput of the running flowgraph, bottleneck first.
+    """
+    table = Table(title='Flowgraph performance')
+    table.add_column('Block', style='cyan')
+    table.add_column('Capacity (items/s)', justify='right', style='magenta')
+    table.add_column('Busy', justify='right')
+    table.add_column('Input full', justify='right')
+    table.add_column('Output full', justify='right')
+
+    for entry in stats:
+        table.add_row(
+            entry.name, f'{entry.items_per_s:,.0f}', f'{entry.busy:.0%}',
+            f'{entry.input_full:.0%}', f'{entry.output_full:.0%}'
+        )
+
+    console.print(table)
+    if stats:
+        console.print(f'Bottleneck: [bold]{stats[0].name}[/bold] '
+                      f'({stats[0].busy:.0%} of the time in work())')
+    if stats and sample_rate > 1:
+        # Throttled and hardware graphs run near the sample rate
+        throughput = max(entry.items_per_s for entry in stats)
+        console.print(f'Throughput {throughput:,.0f} items/s at a sample rate '
+                      f'of {sample_rate:,.0f}/s ({throughput / sample_rate:.0%})')
+
+
+def draw_autotune_table(console: Console, best: TuneSettings, trials: List[Tuple[TuneSettings, float]]):
+    """
+    Draw the autotune trials, marking the chosen settings.
+    """
+    table = Table(
+        title='Autotune trials',
+        caption='Capacity is the throughput with the busiest block saturated, '
+                'throttles left out'
+    )
+    table.add_column('max_nouts', justify='right')
+    table.add_column('maxoutbuf', justify='right')
+    table.add_column('Affinity', style='cyan')
+    table.add_column('Capacity (items/s)', justify='right', style='magenta')
+
+    for settings, score in trials:
+        style = 'bold green' if settings == best else None
+        table.add_row(
+            str(settings.max_nouts), str(settings.maxoutbuf), settings.affinity,
+            f'{score:,.0f}', style=style
+        )
+
+    console.print(table)
+
+
+def context_serializer(args: argparse.Namespace) -> Optional[ContextSerializer]:
+    """
+    Context settings from the command line, or None to use the trained ones.
+    """
+    if args.context_budget is None and args.prune_context is None:
+        return None
+    return ContextSerializer(max_tokens=args.context_budget, prune=bool(args.prune_context))
+
+
+def check_flowgraph(catalog: Optional[BlockCatalog], flowgraph: Flowgraph):
+    """
+    Raise the block library errors of a flowgraph before GRC compiles it.
+    """
+    if catalog is None:
+        return
+    with span('validate.catalog'):
+        errors = catalog.check_flowgraph(flowgraph)
+    if errors:
+        raise ValueError(
+            'Flowgraph does not match the GNU Radio block library:\n'
+            + '\n'.join(f'- {e}' for e in errors)
+        )
+
+
+def response_error(response: str,
+                   current_flowgraph: Optional[str],
+                   catalog: Optional[BlockCatalog]) -> Optional[str]:
+    """
+    Return why the response loop would reject a response, or None if it
+    would be accepted. Mirrors the checks of the loop without acting on
+    the response.
+    """
+    try:
+        try:
+            data = json.loads(response)
+        except json.JSONDecodeError as e:
+            # The loop repairs malformed JSON before rejecting it
+            repaired = repair_json(response)
+            if repaired is None:
+                raise ValueError(f'Response is not valid JSON: {e}') from e
+            data = json.loads(repaired)
+
+        if current_flowgraph:
+            try:
+                patch = FlowgraphPatch.model_validate(data)
+            except ValidationError:
+                patch = None
+            if patch is not None:
+                base = Flowgraph.model_validate_json(current_flowgraph)
+                check_flowgraph(catalog, apply_patch(base, patch))
+                return None
+
+        try:
+            flowgraph = Flowgraph.model_validate(data)
+        except ValidationError:
+            FlowgraphAction.model_validate(data)
+            return None
+        check_flowgraph(catalog, flowgraph)
+        return None
+    except Exception as e:
+        return str(e)
+
+
+def select_candidate(candidates: List[str],
+                     current_flowgraph: Optional[str],
+                     catalog: Optional[BlockCatalog]) -> str:
+    """
+    Validate the candidates in parallel and return the first valid one.
+
+    Without a valid candidate, the first one is returned so the response
+    loop reports its error and retries.
+    """
+    if not candidates:
+        return ''
+    with span('validate.candidates'):
+        with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+            errors = list(pool.map(
+                lambda c: response_error(c, current_flowgraph, catalog), candidates
+            ))
+    for candidate, error in zip(candidates, errors):
+        if error is None:
+            return candidate
+    return candidates[0]
+
+
 def arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog='radio_cli',
         description='GNU Radio LLM - Inference and training CLI'
     )
 
+    parser.add_argument(
+        '--version', action='version', version=f'%(prog)s {__version__}'
+    )
     parser.add_argument(
         '--max-attempts', default=3, type=int,
         help='Maximum number of attempts for generating a valid response'
     )
+    parser.add_argument(
+        '--candidates', default=1, type=int,
+        help='Number of responses generated in one batch per attempt, the '
+             'first valid one is used (1 generates a single greedy response)'
+    )
+    parser.add_argument(
+        '--candidate-mode', default='sample', choices=('sample', 'beam'),
+        help='Generate candidates by sampling or with diverse beam search'
+    )
     parser.add_argument(
         '--model', default='output', type=str,
         help='The model name to load (default is the tuned output model)'
     )
+    parser.add_argument(
+        '--cpu-mode', default='fp32', choices=('fp32', 'bf16', 'int8'),
+        help='Weight precision used when running without CUDA'
+    )
+    parser.add_argument(
+        '--speculative', default=None, choices=('prompt_lookup', 'draft'),
+        help='Speculative decoding mode (prompt n-gram lookup or a draft model)'
+    )
+    parser.add_argument(
+        '--draft-model', default=None, type=str,
+        help='Small model sharing the tokenizer, used with --speculative draft'
+    )
+    parser.add_argument(
+        '--context-budget', default=None, type=int,
+        help='Maximum number of tokens of flowgraph context in a prompt '
+             '(defaults to the setting the model was trained with). Blocks '
+             'left out of the context are kept when the model replies with a '
+             'full flowgraph, name them in the prompt to remove them'
+    )
+    parser.add_argument(
+        '--prune-context', action='store_true', default=None,
+        help='Leave out blocks not connected to the blocks named in the prompt '
+             '(defaults to the setting the model was trained with). Like with '
+             '--context-budget, left out blocks are kept in full flowgraph replies'
+    )
+    parser.add_argument(
+        '--server', default=None, type=str,
+        help='Unix socket of a running llm_server to use instead of loading '
+             'the model in this process'
+    )
+    parser.add_argument(
+        '--wait-for-model', action='store_true',
+        help='Finish loading the model before showing the prompt'
+    )
+    parser.add_argument(
+        '--make-before-break', action='store_true',
+        help='Prepare replacement flowgraphs in a second worker before '
+             'stopping the running one'
+    )
+    parser.add_argument(
+        '--stats-interval', default=1.0, type=float,
+        help='Seconds between samples of the running flowgraph performance '
+             'counters shown by the stats command (0 disables sampling)'
+    )
+    parser.add_argument(
+        '--autotune-seconds', default=2.0, type=float,
+        help='Duration of every trial run of the autotune command'
+    )
+    parser.add_argument(
+        '--catalog', default=DEFAULT_CATALOG_PATH, type=Path,
+        help='Path of the cached GRC block catalog used to check flowgraphs'
+    )
+    parser.add_argument(
+        '--cache', default=DEFAULT_CACHE_PATH, type=Path,
+        help='Path of the on-disk cache of validated responses'
+    )
+    parser.add_argument(
+        '--cache-size', default=16, type=int,
+        help='Maximum size of the response cache in MiB'
+    )
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help='Disable the response cache'
+    )
+    parser.add_argument(
+        '--profile', action='store_true',
+        help='Print a timing breakdown after every turn'
+    )
+    parser.add_argument(
+        '--profile-log', default=Path('radio_cli_profile.jsonl'), type=Path,
+        help='File that --profile appends JSONL timing records to'
+    )
+    parser.add_argument(
+        '--metrics', default=None, type=Path,
+        help='File to rewrite with Prometheus text metrics after every turn'
+    )
     return parser
 
 
@@ -67,10 +329,69 @@ def main_entry() -> int:
 
     console.print('[bold cyan] 🛰️  GNU Radio CLI Assistant[/bold cyan]')
     console.print('Type a description of a flowgraph you want to build.')
+    console.print('Type [bold]stats[/bold] to show the throughput of the running flowgraph, '
+                  '[bold]autotune[/bold] to tune its buffers and CPU affinity.')
     console.print('Type [bold red]exit[/bold red] or [bold red]Ctrl+C[/bold red] to quit.')
 
-    engine = ModelEngine(model_name=args.model)
-    controller = FlowgraphController(console)
+    if args.server and args.candidates > 1:
+        console.print('[bold red]❌ --candidates is not supported with --server[/bold red]')
+        return 1
+
+    if args.server:
+        try:
+            loader = RemoteModelEngine(args.server)
+        except OSError as e:
+            console.print(f'[bold red]❌ Cannot reach server {args.server}: {e}[/bold red]')
+            return 1
+    else:
+        # The model loads in the background while the prompt is already shown
+        loader = BackgroundModelEngine(
+            model_name=args.model,
+            cpu_mode=args.cpu_mode,
+            speculative=args.speculative,
+            draft_model_name=args.draft_model,
+            context_serializer=context_serializer(args)
+        )
+        if args.wait_for_model:
+            try:
+                loader.get()
+            except RuntimeError as e:
+                console.print(f'[bold red]❌ {e}[/bold red]')
+                return 1
+    try:
+        catalog = load_catalog(args.catalog)
+    except (ImportError, OSError, ValueError) as e:
+        console.print(f'[dim]Block catalog unavailable, flowgraphs are checked by GRC only: {e}[/dim]')
+        catalog = None
+
+    controller = FlowgraphController(
+        console,
+        make_before_break=args.make_before_break,
+        stats_interval=args.stats_interval,
+        catalog=catalog
+    )
+
+    cache = None
+    if not args.no_cache:
+        # Responses depend on the model that actually serves them
+        if args.server:
+            try:
+                info = loader.info()
+            except (OSError, RuntimeError) as e:
+                console.print(f'[bold red]❌ Cannot query server {args.server}: {e}[/bold red]')
+                return 1
+            model_id, fingerprint, settings = info['model'], info['fingerprint'], info['context']
+        else:
+            serializer = context_serializer(args) or ContextSerializer.load(args.model)
+            model_id, fingerprint = args.model, model_fingerprint(args.model)
+            settings = serializer.settings()
+        cache = ResponseCache(
+            model_id=model_id,
+            fingerprint=fingerprint,
+            path=args.cache,
+            max_bytes=args.cache_size * 1024 * 1024,
+            context_settings=settings
+        )
 
     current_flowgraph = None
 
@@ -88,21 +409,121 @@ def main_entry() -> int:
         if not user_input:
             continue
 
-        response = engine.generate(user_input, current_flowgraph)
-        console.print(f'[bold blue]LLM Response:[/bold blue]\n{response}')
+        if user_input.lower() == 'stats':
+            try:
+                draw_perf_table(console, controller.perf_stats(), controller.sample_rate())
+            except (RuntimeError, ValueError) as e:
+                console.print(f'[bold red]❌ {e}[/bold red]')
+            continue
+
+        if user_input.lower() == 'autotune':
+            # Trials run in their own workers, the loaded graph is restarted after
+            was_running = controller.state == 'running'
+            try:
+                if was_running:
+                    controller.stop()
+                try:
+                    best, trials = controller.autotune(trial_seconds=args.autotune_seconds)
+                finally:
+                    if was_running:
+                        controller.start()
+                draw_autotune_table(console, best, trials)
+                current_flowgraph = controller.flowgraph.model_dump_json()
+            except (RuntimeError, ValueError, EOFError, OSError) as e:
+                console.print(f'[bold red]❌ {e}[/bold red]')
+            continue
+
+        profiling = args.profile or args.metrics is not None
+        if profiling:
+            PROFILER.begin_turn(user_input)
+
+        context = current_flowgraph
+        with span('cache.get'):
+            response = cache.get(user_input, context) if cache else None
+        cached = response is not None
+
+        if cached:
+            console.print(f'[bold blue]Cached Response:[/bold blue]\n{response}')
+        else:
+            if not loader.is_ready():
+                console.print('[dim]Waiting for the model to finish loading...[/dim]')
+            try:
+                with span('model.wait'):
+                    engine = loader.get()
+            except RuntimeError as e:
+                console.print(f'[bold red]❌ {e}[/bold red]')
+                return 1
+
+            if args.candidates > 1:
+                candidates = engine.generate_candidates(
+                    user_input, current_flowgraph,
+                    num_candidates=args.candidates, mode=args.candidate_mode
+                )
+                console.print(f'[dim]{len(candidates)} distinct candidate(s) generated[/dim]')
+                response = select_candidate(candidates, current_flowgraph, catalog)
+            else:
+                response = engine.generate(user_input, current_flowgraph)
+            console.print(f'[bold blue]LLM Response:[/bold blue]\n{response}')
 
         for attempt in range(args.max_attempts):
             try:
+                # Decode once, then try each response model on the same data
+                try:
+                    with span('validate.json'):
+                        data = json.loads(response)
+                except json.JSONDecodeError as e:
+                    # Fixing the JSON locally is far cheaper than regenerating it
+                    with span('validate.repair'):
+                        repaired = repair_json(response)
+                    if repaired is None:
+                        raise ValueError(f'Response is not valid JSON: {e}') from e
+                    console.print('[dim]Repaired malformed JSON response[/dim]')
+                    response = repaired
+                    data = json.loads(response)
+
+                # Try to parse the output as a patch to the current flowgraph
+                patch = None
+                if current_flowgraph:
+                    try:
+                        with span('validate.patch'):
+                            patch = FlowgraphPatch.model_validate(data)
+                    except ValidationError:
+                        pass
+
+                if patch is not None:
+                    console.print('[dim]Generated patch:[/dim]')
+                    console.print_json(response)
+
+                    with span('flowgraph.apply_patch'):
+                        base = Flowgraph.model_validate_json(current_flowgraph)
+                        flowgraph = apply_patch(base, patch)
+
+                    check_flowgraph(catalog, flowgraph)
+                    controller.load_flowgraph(flowgraph)
+                    current_flowgraph = flowgraph.model_dump_json()
+
+                    console.print('[bold green]✔ Flowgraph successfully patched![/bold green]')
+                    if cache:
+                        cache.put(user_input, context, response)
+
+                    draw_flowgraph_table(console, flowgraph)
+
+                    break
+
                 # Try to parse the output as a flowgraph
                 try:
-                    flowgraph = Flowgraph.model_validate_json(response)
+                    with span('validate.flowgraph'):
+                        flowgraph = Flowgraph.model_validate(data)
                     console.print('[dim]Generated JSON:[/dim]')
                     console.print_json(response)
 
+                    check_flowgraph(catalog, flowgraph)
                     controller.load_flowgraph(flowgraph)
                     current_flowgraph = response
 
                     console.print('[bold green]✔ Flowgraph successfully built![/bold green]')
+                    if cache:
+                        cache.put(user_input, context, response)
 
                     draw_flowgraph_table(console, flowgraph)
 
@@ -112,13 +533,16 @@ def main_entry() -> int:
 
                 # Try to parse the output as a flowgraph action
                 try:
-                    action = FlowgraphAction.model_validate_json(response)
+                    with span('validate.action'):
+                        action = FlowgraphAction.model_validate(data)
                     console.print('[dim]Generated JSON:[/dim]')
                     console.print_json(response)
 
                     controller.handle_action(action)
 
                     console.print('[green]✔ Action executed[/green]')
+                    if cache:
+                        cache.put(user_input, context, response)
                     break
                 except ValidationError:
                     pass
@@ -127,14 +551,37 @@ def main_entry() -> int:
 
             except Exception as e:
                 console.print(f'[bold red]❌ Error processing response:[/bold red] {e}')
+                if cached:
+                    cache.discard(user_input, context)
+                    cached = False
                 if attempt < args.max_attempts - 1:
                     console.print('[yellow]Retrying with feedback...[/yellow]')
-                    response = engine.retry_with_feedback(
-                        user_input, str(e), current_flowgraph
-                    )
+                    engine = loader.get()
+                    if args.candidates > 1:
+                        candidates = engine.generate_candidates(
+                            build_retry_prompt(user_input, str(e)), current_flowgraph,
+                            num_candidates=args.candidates, mode=args.candidate_mode
+                        )
+                        response = select_candidate(candidates, current_flowgraph, catalog)
+                    else:
+                        response = engine.retry_with_feedback(
+                            user_input, str(e), current_flowgraph
+                        )
                     console.print(f'[bold blue]LLM Response:[/bold blue]\n{response}')
                 else:
                     console.print('[bold red]❌ Max attempts reached...[/bold red]')
+
+        if profiling:
+            turn = PROFILER.end_turn()
+            if args.profile:
+                draw_profile_table(console, turn)
+                append_jsonl(args.profile_log, turn)
+            if args.metrics is not None:
+                args.metrics.write_text(PROFILER.metrics.prometheus_text())
+
+    if cache:
+        console.print(f'[dim]Response cache: {cache.hits} hits, {cache.misses} misses[/dim]')
+        cache.close()
     return 0
 
 
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import sys
+import json
+import time
+import argparse
+
+from typing import Callable, List, Union
+
+from pydantic import TypeAdapter
+from rich.console import Console
+from rich.table import Table
+
+from dataset_generation.schema import (
+    ACTION_ADAPTER,
+    NewFlowgraphAction,
+    AddBlockAction,
+    RemoveBlockAction,
+    ConnectAction,
+    DisconnectAction,
+    ParameterAction,
+    SetAction,
+    GetAction,
+    validate_many,
+)
+
+
+# The action union as it was before it got a discriminator
+PlainAction = Union[
+    NewFlowgraphAction,
+    AddBlockAction,
+    RemoveBlockAction,
+    ConnectAction,
+    DisconnectAction,
+    ParameterAction,
+    SetAction,
+    GetAction
+]
+
+
+def make_lines(count: int) -> List[bytes]:
+    """
+    JSON lines cycling through the action types found in datasets.
+    """
+    common = {
+        'timestamp': '2025-01-01T00:00:00+00:00',
+        'flowgraph_id': 'test',
+        'source': 'flowgraph',
+    }
+    templates = [
+        {'action': 'add_block', 'block_id': 'blocks_throttle2_0',
+         'block_key': 'blocks_throttle2', 'parameters': {'samples_per_second': 'samp_rate'}},
+        {'action': 'parameter', 'block_id': 'analog_sig_source_x_0',
+         'parameter': 'freq', 'value': '2000'},
+        {'action': 'connect', 'src': ['analog_sig_source_x_0', '0'],
+         'dst': ['blocks_throttle2_0', '0']},
+        {'action': 'disconnect', 'src': ['analog_sig_source_x_0', '0'],
+         'dst': ['blocks_throttle2_0', '0']},
+        {'action': 'remove_block', 'block_id': 'blocks_throttle2_0'},
+        {'action': 'set', 'method': 'set_samp_rate', 'args': [48000], 'kwargs': {},
+         'source': 'runtime'},
+        {'action': 'get', 'method': 'get_samp_rate', 'args': [], 'kwargs': {},
+         'source': 'runtime'},
+    ]
+    encoded = [json.dumps({**common, **t}).encode('utf-8') for t in templates]
+    return [encoded[i % len(encoded)] for i in range(count)]
+
+
+def run_chunked(lines: List[bytes], chunk: int,
+                func: Callable[[List[bytes]], object]) -> float:
+    """
+    Validate all lines chunk by chunk, dropping each result to bound memory.
+    """
+    start = time.perf_counter()
+    for i in range(0, len(lines), chunk):
+        func(lines[i:i + chunk])
+    return time.perf_counter() - start
+
+
+def arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='bench_actions',
+        description='Measure action validation throughput'
+    )
+
+    parser.add_argument(
+        '--count', default=1_000_000, type=int,
+        help='Number of actions to validate'
+    )
+    parser.add_argument(
+        '--chunk', default=10_000, type=int,
+        help='Number of actions validated per call'
+    )
+    return parser
+
+
+def main_entry() -> int:
+    parser = arg_parser()
+    args = parser.parse_args()
+
+    lines = make_lines(args.count)
+    plain = TypeAdapter(PlainAction)
+
+    cases = {
+        'Plain union, per line': lambda chunk: [plain.validate_json(l) for l in chunk],
+        'Discriminated, per line': lambda chunk: [ACTION_ADAPTER.validate_json(l) for l in chunk],
+        'Discriminated, validate_many': validate_many,
+    }
+
+    table = Table(title=f'Validating {args.count:,} actions')
+    table.add_column('Method', style='cyan')
+    table.add_column('Seconds', justify='right')
+    table.add_column('Actions/s', justify='right', style='magenta')
+    for name, func in cases.items():
+        seconds = run_chunked(lines, args.chunk, func)
+        table.add_row(name, f'{seconds:.2f}', f'{args.count / seconds:,.0f}')
+
+    Console().print(table)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_entry())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+
+DEFAULT_PROMPT = 'Create a flowgraph with a signal source, a throttle and a null sink.'
+
+
+def read_rss_kb() -> dict:
+    """
+    Read the current and peak resident set size from /proc.
+    """
+    rss = {}
+    with open('/proc/self/status', 'r') as fp:
+        for line in fp:
+            if line.startswith(('VmRSS:', 'VmHWM:')):
+                key, value = line.split(':', 1)
+                rss[key] = int(value.split()[0])
+    return rss
+
+
+def run_worker(model: str, mode: str, prompt: str, max_tokens: int) -> dict:
+    import torch
+
+    from llm.inference import ModelEngine
+    from llm.prompts import build_prompt
+
+    start = time.perf_counter()
+    engine = ModelEngine(model_name=model, cpu_mode=mode)
+    load_time = time.perf_counter() - start
+
+    text = build_prompt(engine.tokenizer, prompt)
+    inputs = engine.tokenizer(text, return_tensors='pt')
+
+    with torch.inference_mode():
+        start = time.perf_counter()
+        output = engine.model.generate(
+            **inputs,
+            max_new_tokens=max_tokens,
+            min_new_tokens=max_tokens,
+            do_sample=False,
+            pad_token_id=engine.tokenizer.pad_token_id
+        )
+        elapsed = time.perf_counter() - start
+
+    new_tokens = output.shape[-1] - inputs['input_ids'].shape[-1]
+    rss = read_rss_kb()
+    return {
+        'mode': mode,
+        'load_s': load_time,
+        'tokens_per_s': new_tokens / elapsed,
+        'rss_mb': rss['VmRSS'] / 1024,
+        'peak_rss_mb': rss['VmHWM'] / 1024,
+    }
+
+
+def arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='bench_cpu_inference',
+        description='Compare tokens/sec and RSS of the CPU inference modes'
+    )
+
+    parser.add_argument(
+        '--model', default='Qwen/Qwen2.5-Coder-1.5B-Instruct', type=str,
+        help='The model name to benchmark'
+    )
+    parser.add_argument(
+        '--modes', default='fp32,bf16,int8', type=str,
+        help='Comma separated list of CPU modes to benchmark'
+    )
+    parser.add_argument(
+        '--max-tokens', default=64, type=int,
+        help='Number of tokens to generate per run'
+    )
+    parser.add_argument(
+        '--prompt', default=DEFAULT_PROMPT, type=str,
+        help='User prompt used for generation'
+    )
+    parser.add_argument(
+        '--worker', default=None, type=str,
+        help=argparse.SUPPRESS
+    )
+    return parser
+
+
+def main_entry() -> int:
+    parser = arg_parser()
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args.model, args.worker, args.prompt, args.max_tokens)
+        print(json.dumps(result))
+        return 0
+
+    console = Console()
+    table = Table(title='CPU inference modes')
+    table.add_column('Mode', style='cyan')
+    table.add_column('Load (s)')
+    table.add_column('Tokens/s', style='magenta')
+    table.add_column('RSS (MB)')
+    table.add_column('Peak RSS (MB)')
+
+    for mode in args.modes.split(','):
+        # Every mode runs in a fresh process so RSS numbers are not shared.
+        # The first run warms the conversion cache, the second is measured.
+        for _ in range(2):
+            proc = subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()),
+                 '--model', args.model, '--worker', mode,
+                 '--max-tokens', str(args.max_tokens), '--prompt', args.prompt],
+                capture_output=True, text=True, check=True
+            )
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        table.add_row(
+            mode,
+            f'{result["load_s"]:.2f}',
+            f'{result["tokens_per_s"]:.2f}',
+            f'{result["rss_mb"]:.0f}',
+            f'{result["peak_rss_mb"]:.0f}'
+        )
+
+    console.print(table)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_entry())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import sys
+import json
+import time
+import argparse
+
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+from flowgraph.schema import Flowgraph, minimize_flowgraph
+
+
+MOCK_DIR = Path(__file__).resolve().parents[1] / 'tests' / 'mock_json'
+
+
+def edit_prompts(flowgraph: Flowgraph) -> list:
+    """
+    Flowgraph edit requests whose answer mostly copies the context.
+    """
+    prompts = []
+    for block in flowgraph.blocks:
+        name = block.get('name', block.get('id'))
+        params = block.get('parameters', {})
+        if 'freq' in params:
+            prompts.append(f'Set the parameter freq of block {name} to 2000.')
+        prompts.append(f'Remove the block {name} from the flowgraph.')
+    prompts.append('Add a new block blocks_head to the flowgraph.')
+    return prompts
+
+
+def arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='bench_speculative',
+        description='Compare greedy and prompt lookup decoding on flowgraph edits'
+    )
+
+    parser.add_argument(
+        '--model', default='output', type=str,
+        help='The model name to benchmark'
+    )
+    parser.add_argument(
+        '--max-tokens', default=512, type=int,
+        help='Maximum number of new tokens per prompt'
+    )
+    parser.add_argument(
+        '--flowgraphs', default=MOCK_DIR, type=Path,
+        help='Directory of flowgraph JSON files used as edit context'
+    )
+    return parser
+
+
+def main_entry() -> int:
+    parser = arg_parser()
+    args = parser.parse_args()
+
+    import torch
+
+    from llm.inference import ModelEngine
+    from llm.prompts import build_prompt
+    from llm.speculative import prompt_lookup_generate
+
+    console = Console()
+    engine = ModelEngine(model_name=args.model)
+    eos_ids = engine._eos_token_ids()
+
+    table = Table(title='Prompt lookup decoding')
+    table.add_column('Flowgraph', style='cyan')
+    table.add_column('Prompt', no_wrap=True, max_width=40)
+    table.add_column('Tokens')
+    table.add_column('Acceptance')
+    table.add_column('Greedy (s)')
+    table.add_column('Lookup (s)')
+    table.add_column('Speedup', style='magenta')
+    table.add_column('Match')
+
+    total_greedy = total_lookup = 0.0
+    for path in sorted(args.flowgraphs.glob('*.json')):
+        flowgraph = minimize_flowgraph(Flowgraph(**json.load(path.open())))
+        context_json = flowgraph.model_dump_json()
+
+        for user_prompt in edit_prompts(flowgraph):
+            prompt = build_prompt(engine.tokenizer, user_prompt, context_json)
+            input_ids = engine.tokenizer(prompt, return_tensors='pt')['input_ids']
+
+            with torch.inference_mode():
+                start = time.perf_counter()
+                greedy = engine.model.generate(
+                    input_ids,
+                    attention_mask=torch.ones_like(input_ids),
+                    max_new_tokens=args.max_tokens,
+                    do_sample=False,
+                    eos_token_id=eos_ids,
+                    pad_token_id=engine.tokenizer.pad_token_id
+                )
+                greedy_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            lookup, stats = prompt_lookup_generate(
+                engine.model, input_ids, args.max_tokens, eos_ids
+            )
+            lookup_time = time.perf_counter() - start
+
+            total_greedy += greedy_time
+            total_lookup += lookup_time
+            table.add_row(
+                path.stem,
+                user_prompt,
+                str(stats.generated_tokens),
+                f'{stats.acceptance_rate:.0%}',
+                f'{greedy_time:.2f}',
+                f'{lookup_time:.2f}',
+                f'{greedy_time / lookup_time:.2f}x',
+                '✔' if greedy[0].tolist() == lookup[0].tolist() else '✘'
+            )
+
+    console.print(table)
+    console.print(f'Overall speedup: {total_greedy / total_lookup:.2f}x')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_entry())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import sys
+import time
+import argparse
+import subprocess
+import statistics
+
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+
+RADIO_CLI = Path(__file__).resolve().parents[1] / 'app' / 'radio_cli.py'
+
+LOAD_SNIPPET = '''
+from llm.inference import ModelEngine
+ModelEngine(model_name={model!r}, cpu_mode={cpu_mode!r}).warm_up()
+'''
+
+
+def time_command(cmd: list, runs: int) -> float:
+    """
+    Return the median wall time of a command, with stdin closed so that
+    radio_cli exits as soon as its prompt reads EOF.
+    """
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL, check=True
+        )
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='bench_startup',
+        description='Measure radio_cli startup-to-prompt time'
+    )
+
+    parser.add_argument(
+        '--model', default='output', type=str,
+        help='The model name passed to radio_cli'
+    )
+    parser.add_argument(
+        '--cpu-mode', default='fp32', type=str,
+        help='CPU mode passed to radio_cli'
+    )
+    parser.add_argument(
+        '--runs', default=5, type=int,
+        help='Number of runs per measurement (median is reported)'
+    )
+    return parser
+
+
+def main_entry() -> int:
+    parser = arg_parser()
+    args = parser.parse_args()
+
+    cli = [sys.executable, str(RADIO_CLI)]
+    help_time = time_command(cli + ['--help'], args.runs)
+    model_args = ['--model', args.model, '--cpu-mode', args.cpu_mode]
+    prompt_time = time_command(cli + model_args, args.runs)
+    sync_time = time_command(cli + model_args + ['--wait-for-model'], args.runs)
+    load_time = time_command(
+        [sys.executable, '-c',
+         LOAD_SNIPPET.format(model=args.model, cpu_mode=args.cpu_mode)],
+        args.runs
+    )
+
+    table = Table(title='radio_cli startup')
+    table.add_column('Measurement', style='cyan')
+    table.add_column('Seconds', style='magenta')
+    table.add_row('--help', f'{help_time:.3f}')
+    table.add_row('Startup to prompt (background load)', f'{prompt_time:.3f}')
+    table.add_row('Model import, load and warm-up', f'{load_time:.3f}')
+    table.add_row('Startup to prompt (synchronous load)', f'{sync_time:.3f}')
+    Console().print(table)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_entry())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import sys
+import json
+import argparse
+
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+from transformers import AutoTokenizer
+
+from flowgraph.catalog import DEFAULT_CATALOG_PATH, load_catalog
+from flowgraph.schema import Flowgraph, minimize_flowgraph
+
+
+MOCK_DIR = Path(__file__).resolve().parents[1] / 'tests' / 'mock_json'
+
+
+def count_tokens(tokenizer, flowgraph: Flowgraph) -> int:
+    return len(tokenizer(flowgraph.model_dump_json())['input_ids'])
+
+
+def arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='bench_tokens',
+        description='Count flowgraph tokens before and after minimization'
+    )
+
+    parser.add_argument(
+        'flowgraphs', nargs='*', type=Path,
+        help='Flowgraph JSON files (defaults to the test flowgraphs)'
+    )
+    parser.add_argument(
+        '--tokenizer', default='Qwen/Qwen2.5-Coder-1.5B-Instruct', type=str,
+        help='Tokenizer used to count tokens'
+    )
+    parser.add_argument(
+        '--catalog', default=DEFAULT_CATALOG_PATH, type=Path,
+        help='Path of the cached GRC block catalog'
+    )
+    return parser
+
+
+def main_entry() -> int:
+    parser = arg_parser()
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    catalog = load_catalog(args.catalog)
+    paths = args.flowgraphs or sorted(MOCK_DIR.glob('*.json'))
+
+    table = Table(title='Flowgraph tokens')
+    table.add_column('Flowgraph', style='cyan')
+    table.add_column('Original', justify='right')
+    table.add_column('Minimized', justify='right')
+    table.add_column('Defaults elided', justify='right', style='magenta')
+    table.add_column('Saved', justify='right')
+
+    for path in paths:
+        flowgraph = Flowgraph(**json.loads(path.read_text()))
+        original = count_tokens(tokenizer, flowgraph)
+        minimized = count_tokens(tokenizer, minimize_flowgraph(flowgraph))
+        elided = count_tokens(tokenizer, minimize_flowgraph(flowgraph, catalog))
+        table.add_row(
+            path.name, str(original), str(minimized), str(elided),
+            f'{1 - elided / minimized:.0%}'
+        )
+
+    Console().print(table)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_entry())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import multiprocessing as mp
+
+from pathlib import Path
+from typing import Dict
+
+from rich.console import Console
+from rich.table import Table
+
+from flowgraph.loader import generate_flowgraph
+from flowgraph.remote import RemoteTopBlock
+from flowgraph.schema import Flowgraph
+
+
+FLOWGRAPH_PATH = Path(__file__).resolve().parents[1] / 'tests' / 'mock_json' / 'flowgraph_simple.json'
+
+
+def rss_mib(pid: int) -> float:
+    with open(f'/proc/{pid}/status') as fp:
+        for line in fp:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_worker(generated_path: Path, gui: bool) -> Dict[str, float]:
+    """
+    Start a worker, run its flowgraph briefly and shut it down.
+    """
+    parent_conn, child_conn = mp.Pipe()
+    start = time.perf_counter()
+    process = mp.Process(
+        target=RemoteTopBlock.entry_point,
+        args=(generated_path, child_conn, gui)
+    )
+    process.start()
+    parent_conn.recv()
+    ready = time.perf_counter() - start
+
+    parent_conn.send({'type': 'start'})
+    parent_conn.recv()
+    time.sleep(0.2)
+    rss = rss_mib(process.pid)
+
+    parent_conn.send({'type': 'stop'})
+    parent_conn.recv()
+    parent_conn.send({'type': 'quit'})
+    process.join(timeout=5)
+    return {'ready_s': ready, 'rss_mib': rss}
+
+
+def arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='bench_worker',
+        description='Compare flowgraph worker startup in Qt and headless mode'
+    )
+
+    parser.add_argument(
+        '--repeat', default=5, type=int,
+        help='Number of workers started per mode (median is reported)'
+    )
+    return parser
+
+
+def main_entry() -> int:
+    parser = arg_parser()
+    args = parser.parse_args()
+
+    # Qt needs a platform plugin without a display
+    if not os.environ.get('DISPLAY'):
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    # The same headless flowgraph, with and without a Qt application
+    flowgraph = Flowgraph(**json.loads(FLOWGRAPH_PATH.read_text()))
+    generated_path = generate_flowgraph(flowgraph)
+
+    table = Table(title=f'Flowgraph worker, median of {args.repeat}')
+    table.add_column('Mode', style='cyan')
+    table.add_column('Ready (ms)', justify='right', style='magenta')
+    table.add_column('RSS (MiB)', justify='right')
+
+    # Interleaved so both modes see the same system noise
+    samples = {'Qt': [], 'Headless': []}
+    for _ in range(args.repeat):
+        samples['Qt'].append(run_worker(generated_path, gui=True))
+        samples['Headless'].append(run_worker(generated_path, gui=False))
+
+    for mode, runs in samples.items():
+        table.add_row(
+            mode,
+            f'{statistics.median(r["ready_s"] for r in runs) * 1000:.1f}',
+            f'{statistics.median(r["rss_mib"] for r in runs):.1f}'
+        )
+
+    Console().print(table)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_entry())
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import sys
+import copy
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import multiprocessing as mp
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+
+
+ROOT = Path(__file__).resolve().parents[1]
+TEMPLATE_PATH = ROOT / 'tests' / 'mock_json' / 'flowgraph_callbacks.json'
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+# Corpus sizes as (trace files, entries per file)
+CORPUS_SIZES = {'small': (4, 25), 'medium': (16, 50), 'large': (64, 50)}
+
+
+def make_flowgraph(num_blocks: int, variant: int = 0) -> Dict[str, Any]:
+    """
+    Build a flowgraph snapshot with a chain of throttle blocks between the
+    signal source and null sink of the template graph. The variant edits
+    the rate of a single throttle, like a parameter change in GRC.
+    """
+    template = json.loads(TEMPLATE_PATH.read_text())
+    throttle = next(b for b in template['blocks'] if b['id'] == 'blocks_throttle2')
+    blocks = [b for b in template['blocks'] if b['id'] != 'blocks_throttle2']
+
+    names = []
+    for i in range(num_blocks):
+        block = copy.deepcopy(throttle)
+        block['name'] = f'blocks_throttle2_{i}'
+        divider = 1 + (i + variant) % 7 if i == variant % num_blocks else 1
+        block['parameters']['samples_per_second'] = f'samp_rate / {divider}'
+        block['states']['coordinate'] = [100 + 10 * i, 200]
+        blocks.append(block)
+        names.append(block['name'])
+
+    chain = ['analog_sig_source_x_0'] + names + ['blocks_null_sink_0']
+    template['blocks'] = blocks
+    template['connections'] = [[a, '0', b, '0'] for a, b in zip(chain, chain[1:])]
+    return template
+
+
+def write_trace_corpus(trace_dir: Path, num_files: int, entries_per_file: int):
+    """
+    Write synthetic GRC flowgraph and runtime traces in the logger format.
+    """
+    flowgraphs_dir = trace_dir / 'flowgraphs'
+    actions_dir = trace_dir / 'actions'
+    flowgraphs_dir.mkdir(parents=True, exist_ok=True)
+    actions_dir.mkdir(parents=True, exist_ok=True)
+
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for f in range(num_files):
+        previous = None
+        with open(flowgraphs_dir / f'session_{f}.jsonl', 'w') as fp:
+            for i in range(entries_per_file):
+                # Alternate between adding blocks and editing parameters
+                snapshot = make_flowgraph(1 + i // 2, variant=i)
+                fp.write(json.dumps({
+                    'id': 'test',
+                    'timestamp': (start + timedelta(seconds=i)).isoformat(),
+                    'snapshot_0': previous,
+                    'snapshot_1': snapshot,
+                }) + '\n')
+                previous = snapshot
+
+        with open(actions_dir / f'session_{f}.jsonl', 'w') as fp:
+            for i in range(entries_per_file):
+                method = 'set_samp_rate' if i % 2 else 'get_samp_rate'
+                fp.write(json.dumps({
+                    'id': 'test',
+                    'timestamp': (start + timedelta(seconds=i)).isoformat(),
+                    'snapshot': previous,
+                    'method': method,
+                    'args': [32000 + i] if i % 2 else [],
+                    'kwargs': {},
+                    'result': None,
+                }) + '\n')
+
+
+def stand_in_worker(conn):
+    """
+    Worker speaking the RemoteTopBlock pipe protocol without GNU Radio.
+    """
+    from flowgraph.protocol import send_message
+
+    conn.send({'type': 'status', 'msg': 'ready'})
+    values = {}
+    while True:
+        try:
+            cmd = conn.recv()
+        except EOFError:
+            break
+        if cmd['type'] == 'quit':
+            break
+        elif cmd['type'] in ('start', 'stop'):
+            conn.send({'type': {'start': 'started', 'stop': 'stopped'}[cmd['type']]})
+        elif cmd['type'] == 'set':
+            values[cmd['method'][4:]] = cmd['value']
+            conn.send({'type': 'set'})
+        elif cmd['type'] == 'get':
+            send_message(conn, {'type': 'get', 'method': cmd['method'],
+                                'result': values.get(cmd['method'][4:])})
+        else:
+            conn.send({'type': 'error', 'err': f'Unknown command: {cmd["type"]}'})
+
+
+def measure(func: Callable[[], Any], repeat: int, number: int = 1) -> Dict[str, float]:
+    """
+    Time func() and return the median and minimum seconds per call.
+    """
+    func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {'median_s': statistics.median(samples), 'min_s': min(samples)}
+
+
+def bench_extract_json(repeat: int) -> Dict[str, Dict[str, float]]:
+    from llm.utils import extract_json_from_text
+
+    flowgraph_json = json.dumps(make_flowgraph(8))
+    text = ('Here is the flowgraph you asked for:\n```json\n'
+            f'{flowgraph_json}\n```\nand the action {{"action": "start"}}.')
+    return {
+        'extract_json_from_text': measure(lambda: extract_json_from_text(text), repeat, 20)
+    }
+
+
+def bench_flowgraph_diff(repeat: int) -> Dict[str, Dict[str, float]]:
+    from dataset_generation.flowgraph import FlowgraphDiffer, flowgraph_diff
+
+    timestamp = '2025-01-01T00:00:00+00:00'
+    results = {}
+    for blocks in (8, 64):
+        snapshot_0 = make_flowgraph(blocks)
+        snapshot_1 = make_flowgraph(blocks + 1, variant=1)
+        results[f'flowgraph_diff[{blocks}]'] = measure(
+            lambda: flowgraph_diff(snapshot_0, snapshot_1, 'test', timestamp),
+            repeat, 20
+        )
+
+        # A trace of parameter edits diffed entry by entry
+        trace = [make_flowgraph(blocks, variant=i) for i in range(20)]
+        entries = list(zip(trace, trace[1:]))
+
+        def diff_trace():
+            differ = FlowgraphDiffer()
+            for a, b in entries:
+                differ.diff(a, b, 'test', timestamp)
+
+        results[f'flowgraph_diff_trace[{blocks}]'] = measure(diff_trace, repeat)
+    return results
+
+
+def bench_minimize_flowgraph(repeat: int) -> Dict[str, Dict[str, float]]:
+    from flowgraph.schema import Flowgraph, minimize_flowgraph
+
+    results = {}
+    for blocks in (8, 64):
+        flowgraph = Flowgraph(**make_flowgraph(blocks))
+        results[f'minimize_flowgraph[{blocks}]'] = measure(
+            lambda: minimize_flowgraph(flowgraph), repeat, 20
+        )
+    return results
+
+
+def bench_datasets(repeat: int, sizes: List[str]) -> Dict[str, Dict[str, float]]:
+    from dataset_generation.transform import build_datasets
+    from llm.dataset import load_dataset_jsonl
+
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            trace_dir = Path(tmp) / 'traces'
+            dataset_dir = Path(tmp) / 'datasets'
+            write_trace_corpus(trace_dir, *CORPUS_SIZES[size])
+
+            results[f'build_datasets[{size}]'] = measure(
+                lambda: build_datasets(trace_dir, dataset_dir), repeat
+            )
+            results[f'load_dataset_jsonl[{size}]'] = measure(
+                lambda: sum(1 for _ in load_dataset_jsonl(str(dataset_dir))), repeat
+            )
+    return results
+
+
+def bench_controller(repeat: int) -> Dict[str, Dict[str, float]]:
+    from flowgraph.controller import FlowgraphController
+
+    parent_conn, child_conn = mp.Pipe()
+    process = mp.Process(target=stand_in_worker, args=(child_conn,))
+    process.start()
+    parent_conn.recv()
+
+    controller = FlowgraphController(Console(quiet=True))
+    controller.process, controller.parent_conn = process, parent_conn
+    try:
+        return {
+            'controller_set': measure(
+                lambda: controller._send({'type': 'set', 'method': 'set_samp_rate',
+                                          'value': 32000.0}),
+                repeat, 200
+            ),
+            'controller_get': measure(
+                lambda: controller._send({'type': 'get', 'method': 'get_samp_rate'}),
+                repeat, 200
+            ),
+        }
+    finally:
+        controller._shutdown(process, parent_conn)
+
+
+def run_benchmarks(repeat: int, sizes: List[str]) -> Dict[str, Dict[str, float]]:
+    results = {}
+    results.update(bench_extract_json(repeat))
+    results.update(bench_flowgraph_diff(repeat))
+    results.update(bench_minimize_flowgraph(repeat))
+    results.update(bench_datasets(repeat, sizes))
+    results.update(bench_controller(repeat))
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> Dict[str, float]:
+    """
+    Return the ratio to the baseline median of every slower benchmark.
+    """
+    regressions = {}
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['median_s'] / baseline[name]['median_s']
+        if ratio > 1 + threshold:
+            regressions[name] = ratio
+    return regressions
+
+
+def arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='run',
+        description='Benchmark the CPU-only hot paths of the project'
+    )
+
+    parser.add_argument(
+        '--repeat', default=5, type=int,
+        help='Number of timed repetitions per benchmark (median is reported)'
+    )
+    parser.add_argument(
+        '--sizes', default=['small', 'medium'], nargs='+', choices=CORPUS_SIZES,
+        help='Synthetic trace corpus sizes for the dataset benchmarks'
+    )
+    parser.add_argument(
+        '--output', default=None, type=Path,
+        help='File to write the results to as JSON'
+    )
+    parser.add_argument(
+        '--baseline', default=DEFAULT_BASELINE, type=Path,
+        help='Stored results to compare against'
+    )
+    parser.add_argument(
+        '--save-baseline', action='store_true',
+        help='Store these results as the new baseline'
+    )
+    parser.add_argument(
+        '--threshold', default=0.2, type=float,
+        help='Relative slowdown over the baseline that counts as a regression'
+    )
+    return parser
+
+
+def main_entry() -> int:
+    parser = arg_parser()
+    args = parser.parse_args()
+
+    console = Console()
+    results = run_benchmarks(args.repeat, args.sizes)
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+    baseline = {}
+    if args.baseline.exists() and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text())['results']
+    regressions = compare(results, baseline, args.threshold)
+
+    table = Table(title='Benchmarks')
+    table.add_column('Benchmark', style='cyan')
+    table.add_column('Median (ms)', justify='right', style='magenta')
+    table.add_column('Baseline (ms)', justify='right')
+    table.add_column('Ratio', justify='right')
+    for name, result in results.items():
+        base = baseline.get(name)
+        ratio = '-'
+        if base:
+            ratio = f'{result["median_s"] / base["median_s"]:.2f}x'
+            if name in regressions:
+                ratio = f'[bold red]{ratio}[/bold red]'
+        table.add_row(
+            escape(name),
+            f'{result["median_s"] * 1000:.3f}',
+            f'{base["median_s"] * 1000:.3f}' if base else '-',
+            ratio
+        )
+    console.print(table)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        console.print(f'Baseline saved to {args.baseline}')
+
+    if regressions:
+        console.print(f'[bold red]{len(regressions)} regression(s) over '
+                      f'{args.threshold:.0%}[/bold red]')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_entry())
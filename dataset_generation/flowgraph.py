@@ -4,7 +4,7 @@
 
 import json
 
-from typing import Set, Tuple, List, Any
+from typing import TYPE_CHECKING, Set, Tuple, List, Any, Optional, Union
 
 from datetime import datetime
 
@@ -18,12 +18,19 @@ from dataset_generation.schema import (
     Action
 )
 
+if TYPE_CHECKING:
+    from flowgraph.catalog import BlockCatalog
+
 
 def snapshot_blocks(snapshot: dict[str, Any]) -> dict[str, Any]:
+    # Blocks are keyed by their instance name, which is what connections
+    # refer to; the block type ('id') is not unique within a flowgraph.
     blocks = {}
     for block in snapshot.get('blocks') or []:
-        if isinstance(block, dict) and block.get('id'):
-            blocks[str(block['id'])] = block
+        if isinstance(block, dict):
+            name = block.get('name') or block.get('id')
+            if name:
+                blocks[str(name)] = block
     return blocks
 
 
@@ -35,95 +42,135 @@ def snapshot_connections(snapshot: dict[str, Any]) -> Set[Tuple[str, str, str, s
     return connections
 
 
-def flowgraph_diff(snapshot_0: dict[str, Any],
-                   snapshot_1: dict[str, Any],
-                   flowgraph_id: str,
-                   timestamp: str) -> List[Action]:
-    changes = []
-
-    # Check for blocks that were added
-    blocks_0 = snapshot_blocks(snapshot_0)
-    blocks_1 = snapshot_blocks(snapshot_1)
-
-    block_keys_0 = set(blocks_0.keys())
-    block_keys_1 = set(blocks_1.keys())
+EMPTY_SNAPSHOT = {'blocks': [], 'connections': []}
+
+
+class FlowgraphDiffer:
+    """
+    Computes flowgraph changes over consecutive snapshots of a trace.
+
+    The block and connection index of the last snapshot is kept, so when
+    the next diff starts from that same snapshot object only the new one
+    is indexed. Blocks with identical parameters are skipped with a single
+    dict comparison instead of a per-parameter walk.
+
+    Snapshots minimized with a block catalog leave out parameters at their
+    defaults. With the same catalog, a parameter that disappears from a
+    block is reported as reset to its default.
+    """
+    def __init__(self, catalog: Optional['BlockCatalog'] = None):
+        self.catalog = catalog
+        self.snapshot = None
+        self.blocks = {}
+        self.connections = set()
+
+    def _index(self, snapshot: dict[str, Any]):
+        # Identity only, comparing snapshots costs more than indexing one
+        if snapshot is self.snapshot:
+            return self.blocks, self.connections
+        return snapshot_blocks(snapshot), snapshot_connections(snapshot)
+
+    def diff(self,
+             snapshot_0: dict[str, Any],
+             snapshot_1: dict[str, Any],
+             flowgraph_id: str,
+             timestamp: Union[str, datetime]) -> List[Action]:
+        ts = timestamp
+        if isinstance(ts, str):
+            ts = datetime.fromisoformat(ts)
+        common = {'flowgraph_id': flowgraph_id, 'timestamp': ts, 'source': 'flowgraph'}
+
+        blocks_0, connections_0 = self._index(snapshot_0)
+        blocks_1 = snapshot_blocks(snapshot_1)
+        connections_1 = snapshot_connections(snapshot_1)
+
+        self.snapshot = snapshot_1
+        self.blocks = blocks_1
+        self.connections = connections_1
+
+        if 'options' not in snapshot_0:
+            return [NewFlowgraphAction(**common)]
+
+        changes = []
+
+        # Check for blocks that were added
+        for block_id, block in blocks_1.items():
+            if block_id not in blocks_0:
+                changes.append(AddBlockAction(
+                    **common,
+                    block_id=block_id,
+                    block_key=block.get('id'),
+                    parameters=block.get('parameters', {}),
+                ))
 
-    ts = datetime.fromisoformat(timestamp)
+        # Check for blocks that were removed
+        for block_id in blocks_0:
+            if block_id not in blocks_1:
+                changes.append(RemoveBlockAction(
+                    **common,
+                    block_id=block_id,
+                ))
 
-    if 'options' not in snapshot_0:
-        changes.append(NewFlowgraphAction(
-            timestamp=ts,
-            flowgraph_id=flowgraph_id,
-            source='flowgraph'
-        ))
+        # Check for parameter changes on blocks
+        for block_id, block_1 in blocks_1.items():
+            block_0 = blocks_0.get(block_id)
+            if block_0 is None:
+                continue
+
+            p_0 = block_0.get('parameters', {})
+            p_1 = block_1.get('parameters', {})
+            if p_0 == p_1:
+                continue
+
+            for k, v_1 in p_1.items():
+                if p_0.get(k) != v_1:
+                    changes.append(ParameterAction(
+                        **common,
+                        block_id=block_id,
+                        parameter=k,
+                        value=v_1,
+                    ))
+
+            # Parameters elided from the new snapshot were reset to defaults
+            defaults = self.catalog.defaults.get(block_1.get('id'), {}) if self.catalog else {}
+            for k in p_0.keys() - p_1.keys():
+                if k in defaults and p_0[k] != defaults[k]:
+                    changes.append(ParameterAction(
+                        **common,
+                        block_id=block_id,
+                        parameter=k,
+                        value=defaults[k],
+                    ))
+
+        # Check for connections that were added or removed
+        for (src, src_port, dst, dst_port) in connections_1 - connections_0:
+            changes.append(ConnectAction(
+                **common,
+                src=(src, src_port),
+                dst=(dst, dst_port),
+            ))
+
+        for (src, src_port, dst, dst_port) in connections_0 - connections_1:
+            changes.append(DisconnectAction(
+                **common,
+                src=(src, src_port),
+                dst=(dst, dst_port),
+            ))
         return changes
 
-    for block_id in block_keys_1 - block_keys_0:
-        block = blocks_1[block_id]
-        changes.append(AddBlockAction(
-            action='add_block',
-            flowgraph_id=flowgraph_id,
-            timestamp=ts,
-            source='flowgraph',
-            block_id=block_id,
-            parameters=block.get('parameters', {}),
-        ))
-
-    # Check for blocks that were removed
-    for block_id in block_keys_0 - block_keys_1:
-        changes.append(RemoveBlockAction(
-            flowgraph_id=flowgraph_id,
-            timestamp=ts,
-            source='flowgraph',
-            block_id=block_id,
-        ))
-
-    # Check for parameter changes on blocks
-    for block_id in block_keys_1 & block_keys_0:
-        p_0 = blocks_0[block_id].get('parameters', {})
-        p_1 = blocks_1[block_id].get('parameters', {})
-
-        for k, v_1 in p_1.items():
-            v_0 = p_0.get(k)
-            if v_0 != v_1:
-                changes.append(ParameterAction(
-                    flowgraph_id=flowgraph_id,
-                    timestamp=ts,
-                    source='flowgraph',
-                    block_id=block_id,
-                    parameter=k,
-                    value=v_1,
-                ))
 
-    # Check for connections that were added
-    connections_0 = snapshot_connections(snapshot_0)
-    connections_1 = snapshot_connections(snapshot_1)
-
-    for (src, src_port, dst, dst_port) in connections_1 - connections_0:
-        changes.append(ConnectAction(
-            flowgraph_id=flowgraph_id,
-            timestamp=ts,
-            source='flowgraph',
-            src=(src, src_port),
-            dst=(dst, dst_port),
-        ))
-
-    # Check for connections that were removed
-    for (src, src_port, dst, dst_port) in connections_0 - connections_1:
-        changes.append(DisconnectAction(
-            flowgraph_id=flowgraph_id,
-            timestamp=ts,
-            source='flowgraph',
-            src=(src, src_port),
-            dst=(dst, dst_port),
-        ))
-    return changes
+def flowgraph_diff(snapshot_0: dict[str, Any],
+                   snapshot_1: dict[str, Any],
+                   flowgraph_id: str,
+                   timestamp: str,
+                   catalog: Optional['BlockCatalog'] = None) -> List[Action]:
+    return FlowgraphDiffer(catalog).diff(snapshot_0, snapshot_1, flowgraph_id, timestamp)
 
 
 def normalize_flowgraph_entry(entry_json: str) -> List[Action]:
     entry = json.loads(entry_json)
     flowgraph_id = entry['id']
     timestamp = entry['timestamp']
-    snapshot_0 = entry.get('snapshot_0') or {'blocks': [], 'connections': []}
+    snapshot_0 = entry.get('snapshot_0') or EMPTY_SNAPSHOT
     snapshot_1 = entry['snapshot_1']
     return flowgraph_diff(snapshot_0, snapshot_1, flowgraph_id, timestamp)
@@ -4,38 +4,32 @@
 
 import json
 
-from typing import List
+from typing import Any, Dict, Iterable, List, Union
 
-from datetime import datetime
+from dataset_generation.schema import ACTION_ADAPTER, Action, validate_many
 
-from dataset_generation.schema import (
-    SetAction,
-    GetAction,
-    Action
-)
 
-
-def normalize_runtime_entry(entry_json: str) -> List[Action]:
-    entry = json.loads(entry_json)
+def runtime_action_data(entry: Dict[str, Any]) -> Dict[str, Any]:
     method = entry['method']
-    flowgraph_id = entry['id']
-    timestamp = datetime.fromisoformat(entry['timestamp'])
-
-    if method.startswith('set_'):
-        return [SetAction(
-            flowgraph_id=flowgraph_id,
-            timestamp=timestamp,
-            source='runtime',
-            method=method,
-            args=entry.get('args', []),
-            kwargs=entry.get('kwargs', {}),
-        )]
-
-    return [GetAction(
-        flowgraph_id=flowgraph_id,
-        timestamp=timestamp,
-        source='runtime',
-        method=method,
-        args=entry.get('args', []),
-        kwargs=entry.get('kwargs', {}),
-    )]
+    return {
+        'action': 'set' if method.startswith('set_') else 'get',
+        'flowgraph_id': entry['id'],
+        'timestamp': entry['timestamp'],
+        'source': 'runtime',
+        'method': method,
+        'args': entry.get('args', []),
+        'kwargs': entry.get('kwargs', {}),
+    }
+
+
+def normalize_runtime_entry(entry_json: Union[str, Dict[str, Any]]) -> List[Action]:
+    # Callers that already parsed the trace line can pass the entry itself
+    entry = json.loads(entry_json) if isinstance(entry_json, str) else entry_json
+    return [ACTION_ADAPTER.validate_python(runtime_action_data(entry))]
+
+
+def normalize_runtime_entries(entries: Iterable[Dict[str, Any]]) -> List[Action]:
+    """
+    Normalize many parsed runtime trace entries, one action per entry.
+    """
+    return validate_many([runtime_action_data(entry) for entry in entries])
@@ -2,8 +2,8 @@
 # This file is part of the GNU Radio LLM project.
 #
 
-from typing import Literal, List, Dict, Union, Any
-from pydantic import BaseModel, Field
+from typing import Annotated, Literal, Iterable, List, Dict, Optional, Union, Any
+from pydantic import BaseModel, Field, TypeAdapter
 from datetime import datetime
 
 
@@ -21,6 +21,7 @@ class NewFlowgraphAction(BaseAction):
 class AddBlockAction(BaseAction):
     action: Literal['add_block'] = Field(default='add_block')
     block_id: str
+    block_key: Optional[str] = None
     parameters: dict[str, Any]
 
 
@@ -62,12 +63,39 @@ class GetAction(RuntimeAction):
     action: Literal['get'] = Field(default='get')
 
 
-Action = Union[
-    AddBlockAction,
-    RemoveBlockAction,
-    ConnectAction,
-    DisconnectAction,
-    ParameterAction,
-    SetAction,
-    GetAction
+# Discriminated on the action literal, so validation dispatches straight
+# to the matching model instead of trying every member in turn
+Action = Annotated[
+    Union[
+        NewFlowgraphAction,
+        AddBlockAction,
+        RemoveBlockAction,
+        ConnectAction,
+        DisconnectAction,
+        ParameterAction,
+        SetAction,
+        GetAction
+    ],
+    Field(discriminator='action')
 ]
+
+ACTION_ADAPTER: TypeAdapter[Action] = TypeAdapter(Action)
+ACTIONS_ADAPTER: TypeAdapter[List[Action]] = TypeAdapter(List[Action])
+
+
+def validate_many(items: Iterable[Union[str, bytes, Dict[str, Any]]]) -> List[Action]:
+    """
+    Validate many actions in one call.
+
+    Items are either JSON documents, such as the lines of a JSON-lines file,
+    or already decoded dicts. JSON items are validated as a single array so
+    that parsing and validation both stay inside pydantic-core.
+    """
+    items = list(items)
+    if not items:
+        return []
+    if isinstance(items[0], dict):
+        return ACTIONS_ADAPTER.validate_python(items)
+
+    data = [item.encode('utf-8') if isinstance(item, str) else item for item in items]
+    return ACTIONS_ADAPTER.validate_json(b'[' + b','.join(data) + b']')
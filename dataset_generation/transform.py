@@ -5,14 +5,19 @@
 import json
 import base64
 
+from datetime import datetime
 from pathlib import Path
+from typing import Optional
+
 from pydantic import BaseModel
 
 from dataset_generation.schema import Action
-from dataset_generation.flowgraph import normalize_flowgraph_entry
-from dataset_generation.runtime import normalize_runtime_entry
+from dataset_generation.flowgraph import EMPTY_SNAPSHOT, FlowgraphDiffer
+from dataset_generation.runtime import normalize_runtime_entries
 
+from flowgraph.catalog import BlockCatalog
 from flowgraph.schema import Flowgraph, minimize_flowgraph
+from flowgraph.patch import make_patch
 
 
 def encode_completion(data: BaseModel) -> str:
@@ -54,9 +59,17 @@ def generate_prompt(action: Action) -> str:
             return f'Perform the action {action.action}.'
 
 
-def build_datasets(trace_dir: Path, dataset_dir: Path):
+def build_datasets(trace_dir: Path,
+                   dataset_dir: Path,
+                   patch: bool = False,
+                   catalog: Optional[BlockCatalog] = None):
     """
     Transform the traces into two datasets: runtime actions and flowgraph changes.
+
+    With patch enabled, flowgraph changes that have a previous flowgraph as
+    context are completed with a compact patch instead of the full graph.
+    With a block catalog, parameters left at their defaults are dropped
+    from every flowgraph.
     """
     flowgraphs_dataset = []
     actions_dataset = []
@@ -71,6 +84,16 @@ def build_datasets(trace_dir: Path, dataset_dir: Path):
 
     for trace_file in flowgraphs_dir.glob('*.jsonl'):
         history = []
+
+        # Each entry usually starts from the snapshot the previous one ended
+        # with, so its index, minimized graph and dump are reused
+        differ = FlowgraphDiffer()
+        # Reports parameters elided from the new graph as reset to defaults
+        patch_differ = FlowgraphDiffer(catalog)
+        previous_snapshot = None
+        previous_flowgraph = None
+        previous_dump = None
+
         with trace_file.open('r') as fp:
             for line in fp:
                 line = line.strip()
@@ -78,18 +101,52 @@ def build_datasets(trace_dir: Path, dataset_dir: Path):
                     raise ValueError('Empty line in flowgraph trace file')
 
                 entry = json.loads(line)
-                actions = normalize_flowgraph_entry(line)
+                timestamp = datetime.fromisoformat(entry['timestamp'])
+                flowgraph_0_json = entry['snapshot_0']
+                flowgraph_1_json = entry['snapshot_1']
+
+                follows = bool(flowgraph_0_json) and flowgraph_0_json == previous_snapshot
+                if follows:
+                    flowgraph_0_json = previous_snapshot
+
+                actions = differ.diff(
+                    flowgraph_0_json or EMPTY_SNAPSHOT,
+                    flowgraph_1_json,
+                    entry['id'],
+                    timestamp
+                )
                 if len(actions) == 0:
                     continue
 
-                flowgraph_0_json = entry['snapshot_0']
                 flowgraph_0 = None
-                if flowgraph_0_json:
-                    flowgraph_0 = Flowgraph(**flowgraph_0_json)
-                    flowgraph_0 = minimize_flowgraph(flowgraph_0)
-
-                flowgraph_1 = Flowgraph(**entry['snapshot_1'])
-                flowgraph_1 = minimize_flowgraph(flowgraph_1)
+                dump_0 = None
+                if follows:
+                    flowgraph_0 = previous_flowgraph
+                    dump_0 = previous_dump
+                elif flowgraph_0_json:
+                    flowgraph_0 = minimize_flowgraph(Flowgraph(**flowgraph_0_json), catalog)
+
+                flowgraph_1 = Flowgraph(**flowgraph_1_json)
+                flowgraph_1 = minimize_flowgraph(flowgraph_1, catalog)
+                dump_1 = flowgraph_1.model_dump() if patch else None
+
+                previous_snapshot = flowgraph_1_json
+                previous_flowgraph = flowgraph_1
+                previous_dump = dump_1
+
+                completion = flowgraph_1
+                if patch and flowgraph_0:
+                    # Diff the minimized graphs so the patch applies to the
+                    # context the model actually sees
+                    actions = patch_differ.diff(
+                        dump_0 if dump_0 is not None else flowgraph_0.model_dump(),
+                        dump_1,
+                        entry['id'],
+                        timestamp
+                    )
+                    if len(actions) == 0:
+                        continue
+                    completion = make_patch(actions)
 
                 prompt = ''
                 for action in actions:
@@ -102,31 +159,37 @@ def build_datasets(trace_dir: Path, dataset_dir: Path):
                 history.append({
                     'prompt': prompt,
                     'context': context,
-                    'completion': encode_completion(flowgraph_1)
+                    'completion': encode_completion(completion)
                 })
 
         if history:
             flowgraphs_dataset.append(history)
 
     for trace_file in actions_dir.glob('*.jsonl'):
-        history = []
+        entries = []
         with trace_file.open('r') as fp:
             for line in fp:
                 line = line.strip()
                 if not line:
                     raise ValueError('Empty line in actions trace file')
+                entries.append(json.loads(line))
 
-                entry = json.loads(line)
-                actions = normalize_runtime_entry(line)
-                flowgraph = Flowgraph(**entry['snapshot'])
-                flowgraph = minimize_flowgraph(flowgraph)
-
-                for action in actions:
-                    history.append({
-                        'prompt': generate_prompt(action),
-                        'context': encode_completion(flowgraph),
-                        'completion': encode_completion(action)
-                    })
+        history = []
+        previous_snapshot = None
+        previous_flowgraph = None
+
+        for entry, action in zip(entries, normalize_runtime_entries(entries)):
+            # Runtime calls of a session usually share one snapshot
+            snapshot = entry['snapshot']
+            if previous_flowgraph is None or snapshot != previous_snapshot:
+                previous_snapshot = snapshot
+                previous_flowgraph = minimize_flowgraph(Flowgraph(**snapshot), catalog)
+
+            history.append({
+                'prompt': generate_prompt(action),
+                'context': encode_completion(previous_flowgraph),
+                'completion': encode_completion(action)
+            })
         if history:
             actions_dataset.append(history)
 
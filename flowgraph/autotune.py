@@ -0,0 +1,148 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import os
+
+from dataclasses import dataclass, fields, replace
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from flowgraph.perf import BlockStats
+from flowgraph.schema import Flowgraph
+
+
+# Candidate values of every setting, the first one being the GRC default
+TUNE_SPACE: Dict[str, Sequence] = {
+    'max_nouts': (0, 512, 4096, 16384),
+    'maxoutbuf': (0, 4096, 65536),
+    'affinity': ('none', 'spread', 'packed'),
+}
+
+# Relative throughput gain required to prefer a setting over the current
+# one, so trial noise does not pick arbitrary settings
+MIN_GAIN = 0.05
+
+
+@dataclass(frozen=True)
+class TuneSettings:
+    """
+    Scheduler settings of a flowgraph.
+
+    max_nouts caps the items per work() call (0 lets GNU Radio decide),
+    maxoutbuf sets the output buffer size of every block (0 keeps the
+    default) and affinity pins the blocks to cores: 'spread' gives each
+    block its own core in turn, 'packed' puts them all on one core.
+    """
+    max_nouts: int = 0
+    maxoutbuf: int = 0
+    affinity: str = 'none'
+
+
+def available_cores() -> List[int]:
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def apply_settings(flowgraph: Flowgraph, settings: TuneSettings,
+                   cores: Sequence[int]) -> Flowgraph:
+    """
+    Return a copy of the flowgraph with the settings written into the
+    options and block parameters GRC generates them from.
+    """
+    options = dict(flowgraph.options)
+    options['parameters'] = {
+        **options.get('parameters', {}),
+        'max_nouts': str(settings.max_nouts)
+    }
+
+    # Only blocks taking part in connections run in the scheduler
+    sources = {c[0] for c in flowgraph.connections}
+    streaming = sources | {c[2] for c in flowgraph.connections}
+
+    blocks = []
+    index = 0
+    for block in flowgraph.blocks:
+        name = block.get('name')
+        if name not in streaming:
+            blocks.append(block)
+            continue
+
+        parameters = dict(block.get('parameters', {}))
+        if name in sources:
+            parameters['maxoutbuf'] = str(settings.maxoutbuf)
+        if settings.affinity == 'spread':
+            parameters['affinity'] = f'[{cores[index % len(cores)]}]'
+        elif settings.affinity == 'packed':
+            parameters['affinity'] = f'[{cores[0]}]'
+        else:
+            parameters['affinity'] = ''
+        blocks.append({**block, 'parameters': parameters})
+        index += 1
+
+    return Flowgraph(
+        options=options,
+        blocks=blocks,
+        connections=flowgraph.connections,
+        metadata=flowgraph.metadata
+    )
+
+
+def throttle_names(flowgraph: Flowgraph) -> List[str]:
+    return [b.get('name') for b in flowgraph.blocks
+            if str(b.get('id', '')).startswith('blocks_throttle')]
+
+
+def trial_score(stats: List[BlockStats], throttles: Sequence[str] = ()) -> float:
+    """
+    Items per second the flowgraph could sustain with its busiest block
+    saturated.
+
+    Throttled flowgraphs run at about their sample rate whatever the
+    settings, so raw throughput would make every trial tie. Scaling it by
+    the busy share of the bottleneck, leaving out throttles which sleep in
+    work(), scores the headroom each setting leaves instead.
+    """
+    throughput = max((s.items_per_s for s in stats), default=0.0)
+    busy = max((s.busy for s in stats if s.name not in throttles), default=0.0)
+    if busy <= 0.0:
+        return throughput
+    return throughput / min(busy, 1.0)
+
+
+def headless_flowgraph(flowgraph: Flowgraph) -> Flowgraph:
+    """
+    The flowgraph generated without a Qt GUI when none of its blocks need
+    one, so trials run in a headless worker.
+    """
+    if any('qtgui' in str(b.get('id', '')) for b in flowgraph.blocks):
+        return flowgraph
+    options = dict(flowgraph.options)
+    options['parameters'] = {**options.get('parameters', {}), 'generate_options': 'no_gui'}
+    return flowgraph.model_copy(update={'options': options})
+
+
+def coordinate_search(measure: Callable[[TuneSettings], float],
+                      space: Dict[str, Sequence] = TUNE_SPACE,
+                      min_gain: float = MIN_GAIN
+                      ) -> Tuple[TuneSettings, List[Tuple[TuneSettings, float]]]:
+    """
+    Tune one setting at a time, keeping the best value of each before
+    moving on to the next.
+
+    This needs one trial per candidate value instead of one per
+    combination. Returns the best settings and every (settings,
+    throughput) trial in the order they ran.
+    """
+    best = TuneSettings(**{name: values[0] for name, values in space.items()})
+    best_score = measure(best)
+    trials = [(best, best_score)]
+
+    for setting in (f.name for f in fields(TuneSettings)):
+        for value in space.get(setting, ())[1:]:
+            candidate = replace(best, **{setting: value})
+            score = measure(candidate)
+            trials.append((candidate, score))
+            if score > best_score * (1 + min_gain):
+                best, best_score = candidate, score
+    return best, trials
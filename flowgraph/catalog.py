@@ -0,0 +1,261 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import json
+
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+from flowgraph.schema import Flowgraph
+
+
+DEFAULT_CATALOG_PATH = Path.home() / '.cache' / 'gnuradio_llm' / 'block_catalog.json'
+
+# The options block is not listed among the flowgraph blocks
+OPTIONS_KEY = 'options'
+
+# Port key standing for any further stream port index
+ANY_STREAM_PORT = '*'
+
+# Blocks whose parameters and ports come from user code
+UNINDEXED_BLOCKS = frozenset(('epy_block', 'epy_module'))
+
+
+def _param_default(param: Dict[str, Any]) -> Optional[str]:
+    if 'default' in param:
+        default = param['default']
+    elif param.get('options'):
+        # GRC falls back to the first option of enum parameters
+        default = param['options'][0]
+    else:
+        return None
+    if isinstance(default, (list, dict)):
+        return None
+    return str(default)
+
+
+def _port_keys(ports_data: Iterable[Dict[str, Any]]) -> FrozenSet[str]:
+    """
+    Keys GRC gives to the ports of a block. Stream ports are numbered in
+    order and message ports use their ID.
+    """
+    keys = set()
+    index = 0
+    for port in ports_data:
+        if port.get('domain') == 'message':
+            keys.add(str(port.get('id')))
+            continue
+        multiplicity = str(port.get('multiplicity', 1))
+        if not multiplicity.isdigit():
+            # Set by a parameter, e.g. ${ num_inputs }
+            keys.add(ANY_STREAM_PORT)
+            continue
+        for _ in range(int(multiplicity)):
+            keys.add(str(index))
+            index += 1
+    return frozenset(keys)
+
+
+def _has_port(keys: FrozenSet[str], port: str) -> bool:
+    return port in keys or (ANY_STREAM_PORT in keys and port.isdigit())
+
+
+class BlockCatalog:
+    """
+    Default parameter values of the blocks in the GRC block library.
+
+    Flowgraphs exported by GRC list every parameter of every block. The
+    catalog is used to drop the ones left at their defaults when
+    minimizing a flowgraph, and to restore them before it is compiled.
+
+    It also indexes the parameter names and port keys of every block, so
+    generated flowgraphs can be checked without loading GRC.
+    """
+    def __init__(self,
+                 defaults: Dict[str, Dict[str, str]],
+                 version: str = '',
+                 params: Optional[Dict[str, Iterable[str]]] = None,
+                 ports: Optional[Dict[str, Dict[str, Iterable[str]]]] = None):
+        self.defaults = defaults
+        self.version = version
+        self.params = {k: frozenset(v) for k, v in (params or {}).items()}
+        self.ports = {
+            k: {d: frozenset(keys) for d, keys in v.items()}
+            for k, v in (ports or {}).items()
+        }
+
+    @classmethod
+    def from_platform(cls, platform) -> 'BlockCatalog':
+        """
+        Build the catalog from a GRC platform with its library loaded.
+        """
+        defaults, params, ports = {}, {}, {}
+        for key, block in platform.blocks.items():
+            block_defaults = {}
+            parameters_data = getattr(block, 'parameters_data', [])
+            for param in parameters_data:
+                default = _param_default(param)
+                if param.get('id') and default is not None:
+                    block_defaults[param['id']] = default
+            defaults[key] = block_defaults
+
+            if key in UNINDEXED_BLOCKS:
+                continue
+            params[key] = {p['id'] for p in parameters_data if p.get('id')}
+            ports[key] = {
+                'sink': _port_keys(getattr(block, 'inputs_data', [])),
+                'source': _port_keys(getattr(block, 'outputs_data', [])),
+            }
+        return cls(defaults, params=params, ports=ports)
+
+    @classmethod
+    def load(cls, path: Path) -> 'BlockCatalog':
+        data = json.loads(path.read_text())
+        return cls(
+            data['defaults'],
+            version=data.get('version', ''),
+            params=data.get('params'),
+            ports=data.get('ports')
+        )
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            'version': self.version,
+            'defaults': self.defaults,
+            'params': {k: sorted(v) for k, v in self.params.items()},
+            'ports': {
+                k: {d: sorted(keys) for d, keys in v.items()}
+                for k, v in self.ports.items()
+            },
+        }))
+
+    def _block_params(self, key: str, params: Dict[str, Any], elide: bool) -> Dict[str, Any]:
+        defaults = self.defaults.get(key)
+        if not defaults:
+            return params
+        if elide:
+            return {k: v for k, v in params.items() if defaults.get(k) != v}
+        return {**defaults, **params}
+
+    def _apply(self, flowgraph: Flowgraph, elide: bool) -> Flowgraph:
+        options = flowgraph.options
+        if 'parameters' in options:
+            options = {
+                **options,
+                'parameters': self._block_params(OPTIONS_KEY, options['parameters'], elide)
+            }
+
+        blocks = []
+        for block in flowgraph.blocks:
+            if 'parameters' in block:
+                block = {
+                    **block,
+                    'parameters': self._block_params(block.get('id'), block['parameters'], elide)
+                }
+            blocks.append(block)
+
+        return Flowgraph(
+            options=options,
+            blocks=blocks,
+            connections=flowgraph.connections,
+            metadata=flowgraph.metadata
+        )
+
+    def elide_defaults(self, flowgraph: Flowgraph) -> Flowgraph:
+        """
+        Return a flowgraph without the parameters that equal their defaults.
+        """
+        return self._apply(flowgraph, elide=True)
+
+    def expand_defaults(self, flowgraph: Flowgraph) -> Flowgraph:
+        """
+        Return a flowgraph with every missing parameter set to its default.
+        """
+        return self._apply(flowgraph, elide=False)
+
+    def _check_params(self, key: str, name: str, params: Dict[str, Any]) -> List[str]:
+        known = self.params.get(key)
+        if known is None:
+            return []
+        return [
+            f"Block '{name}' ({key}) has no parameter '{param}'"
+            for param in params if param not in known
+        ]
+
+    def check_flowgraph(self, flowgraph: Flowgraph) -> List[str]:
+        """
+        Check the block keys, parameter names and connections of a
+        flowgraph against the block library.
+
+        Returns the errors found, phrased as feedback for the model. A
+        catalog without an index (e.g. loaded from an older cache) finds
+        no errors.
+        """
+        if not self.params:
+            return []
+
+        errors = []
+        if 'parameters' in flowgraph.options:
+            errors += self._check_params(OPTIONS_KEY, OPTIONS_KEY, flowgraph.options['parameters'])
+
+        block_keys = {}
+        for block in flowgraph.blocks:
+            name, key = block.get('name'), block.get('id')
+            if name in block_keys:
+                errors.append(f"Block name '{name}' is used more than once")
+            block_keys[name] = key
+            if key in UNINDEXED_BLOCKS:
+                continue
+            if key not in self.params:
+                errors.append(f"Block '{name}' has unknown block ID '{key}'")
+                continue
+            errors += self._check_params(key, name, block.get('parameters', {}))
+
+        for connection in flowgraph.connections:
+            if len(connection) != 4:
+                errors.append(f'Connection {connection} must be [src, src_port, dst, dst_port]')
+                continue
+            for name, port, direction in ((connection[0], connection[1], 'source'),
+                                          (connection[2], connection[3], 'sink')):
+                if name not in block_keys:
+                    errors.append(f"Connection {connection} refers to unknown block '{name}'")
+                    continue
+                ports = self.ports.get(block_keys[name])
+                if ports is not None and not _has_port(ports[direction], str(port)):
+                    valid = ', '.join(sorted(ports[direction])) or 'none'
+                    errors.append(
+                        f"Connection {connection}: block '{name}' has no {direction} "
+                        f"port '{port}' (valid: {valid})"
+                    )
+        return errors
+
+
+def load_catalog(path: Path = DEFAULT_CATALOG_PATH) -> BlockCatalog:
+    """
+    Load the cached block catalog, rebuilding it from the GRC block library
+    when it is missing or was built for another GNU Radio version.
+
+    Without GNU Radio installed, the cached catalog is used as is.
+    """
+    catalog = BlockCatalog.load(path) if path.exists() else None
+
+    # GNU Radio is imported on first use to keep CLI startup fast
+    try:
+        from gnuradio import gr
+    except ImportError:
+        if catalog is None:
+            raise
+        return catalog
+
+    # Caches written before the index was added are rebuilt as well
+    if catalog is not None and catalog.version == gr.version() and catalog.params:
+        return catalog
+
+    from flowgraph.loader import make_platform
+
+    catalog = BlockCatalog.from_platform(make_platform())
+    catalog.version = gr.version()
+    catalog.save(path)
+    return catalog
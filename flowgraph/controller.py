@@ -2,58 +2,488 @@
 # This file is part of the GNU Radio LLM project.
 #
 
+import time
+import threading
 import multiprocessing as mp
 
+from collections import deque
+
+from datetime import datetime, timezone
 from multiprocessing import connection
 
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
 from rich.console import Console
 
-from flowgraph.schema import Flowgraph, FlowgraphAction
-from flowgraph.loader import generate_flowgraph
-from flowgraph.remote import RemoteTopBlock
+from dataset_generation.flowgraph import flowgraph_diff
+from flowgraph.autotune import (
+    TUNE_SPACE,
+    TuneSettings,
+    apply_settings,
+    available_cores,
+    coordinate_search,
+    headless_flowgraph,
+    throttle_names,
+    trial_score
+)
+from flowgraph.catalog import BlockCatalog
+from flowgraph.perf import BlockStats, PerfSample, summarize
+from flowgraph.protocol import describe_result, recv_message
+from flowgraph.schema import Flowgraph, FlowgraphAction, has_exclusive_blocks, requires_gui
+from flowgraph.tap import DEFAULT_TAP_CAPACITY, TAP_DTYPES, SampleRing, sample_stats
+from profiling.spans import span
 
 
 class FlowgraphController:
-    def __init__(self, console: Console):
+    def __init__(self, console: Console, make_before_break: bool = False,
+                 stats_interval: float = 0.0, stats_history: int = 120,
+                 catalog: Optional[BlockCatalog] = None):
         self.console = console
+        # Defaults of parameters that minimized flowgraphs leave out
+        self.catalog = catalog
         self.generated_path = None
+        self.flowgraph = None
+        # Workers only start Qt for flowgraphs that need it
+        self.gui = True
+
+        # Prepare replacement flowgraphs in a second worker before stopping
+        # the running one, and record the resulting stream gaps in seconds
+        self.make_before_break = make_before_break
+        self.swap_gaps = []
 
         self.process = None
         self.parent_conn = None
         self.child_conn = None
         self.state = 'idle'
 
+        # Shared-memory rings of the tapped outputs by (block name, port)
+        self.taps: Dict[Tuple[str, str], SampleRing] = {}
+
+        # Performance counters sampled every stats_interval seconds while
+        # running. The sampler thread shares the pipe, so requests are
+        # serialized by the lock
+        self.lock = threading.RLock()
+        self.stats_interval = stats_interval
+        self.perf_samples = deque(maxlen=stats_history)
+        self.sampler = None
+        self.sampler_stop = threading.Event()
+
     def load_flowgraph(self, flowgraph: Flowgraph):
-        self.generated_path = generate_flowgraph(flowgraph)
+        # GNU Radio is imported on first use to keep CLI startup fast
+        from flowgraph.loader import generate_flowgraph
+
+        previous = self.flowgraph
+        with span('flowgraph.generate'):
+            self.generated_path = generate_flowgraph(flowgraph)
+        self.flowgraph = flowgraph
+        self.gui = requires_gui(flowgraph)
+
+        if self.state == 'running' and previous is not None:
+            if self._reconfigure(previous, flowgraph):
+                self.console.print('🔧 Flowgraph reconfigured live.')
+                return
+
+            if self.make_before_break and self._swap():
+                return
+
+            # The running graph could not be patched, restart it instead
+            self.console.print('⚠️ Live reconfiguration failed, restarting flowgraph.')
+            if self.state == 'running':
+                self.stop()
+            self.state = 'loaded'
+            self.start()
+            return
+
         self.state = 'loaded'
         self.console.print('🔧 Flowgraph loaded.')
 
-    def _start_process(self):
-        self.parent_conn, self.child_conn = mp.Pipe()
-        self.process = mp.Process(
-            target=RemoteTopBlock.entry_point,
-            args=(self.generated_path, self.child_conn)
+    def _needs_restart(self, old: Flowgraph, new: Flowgraph) -> bool:
+        """
+        Changes that flowgraph_diff does not describe cannot be applied live.
+        """
+        if old.options != new.options:
+            return True
+
+        # The worker only has a Qt application if the old graph needed one
+        if requires_gui(old) != requires_gui(new):
+            return True
+
+        # The worker takes added blocks from a second instance of the whole
+        # top block, which would open devices and widgets a second time
+        added = {b.get('name') for b in new.blocks} - {b.get('name') for b in old.blocks}
+        if added and has_exclusive_blocks(new):
+            return True
+
+        # A parameter left out of a block is reset to a default that only
+        # the catalog knows
+        old_params = {b.get('name'): b.get('parameters', {}) for b in old.blocks}
+        for block in new.blocks:
+            params = block.get('parameters', {})
+            dropped = old_params.get(block.get('name'), {}).keys() - params.keys()
+            defaults = self.catalog.defaults.get(block.get('id'), {}) if self.catalog else {}
+            if dropped - defaults.keys():
+                return True
+
+        old_states = {b.get('name'): b.get('states', {}).get('state') for b in old.blocks}
+        new_states = {b.get('name'): b.get('states', {}).get('state') for b in new.blocks}
+        return any(
+            old_states[name] != state
+            for name, state in new_states.items() if name in old_states
+        )
+
+    def _reconfigure(self, old: Flowgraph, new: Flowgraph) -> bool:
+        """
+        Apply the difference between two flowgraphs to the running process.
+        """
+        if self._needs_restart(old, new):
+            return False
+
+        changes = flowgraph_diff(
+            old.model_dump(),
+            new.model_dump(),
+            new.options.get('parameters', {}).get('id', ''),
+            datetime.now(timezone.utc).isoformat(),
+            self.catalog
         )
-        self.process.start()
+        if not changes:
+            return True
 
-        response = self.parent_conn.recv()
+        try:
+            response = self._send({
+                'type': 'reconfigure',
+                'path': str(self.generated_path),
+                'changes': [change.model_dump(mode='json') for change in changes]
+            })
+        except RuntimeError as e:
+            self.console.print(f'[dim]{e}[/dim]')
+            return False
+
+        # The worker untaps blocks that are removed or disconnected
+        for block_id, port in response.get('untapped', []):
+            ring = self.taps.pop((block_id, port), None)
+            if ring is not None:
+                ring.close()
+                self.console.print(f'[dim]Untapped {block_id}:{port}[/dim]')
+        return True
+
+    def _spawn_process(self, generated_path: Optional[Path] = None, gui: Optional[bool] = None):
+        from flowgraph.remote import RemoteTopBlock
+
+        with span('flowgraph.spawn'):
+            parent_conn, child_conn = mp.Pipe()
+            process = mp.Process(
+                target=RemoteTopBlock.entry_point,
+                args=(
+                    generated_path or self.generated_path,
+                    child_conn,
+                    self.gui if gui is None else gui
+                )
+            )
+            process.start()
+
+            # The worker reports ready once the top block is constructed
+            response = parent_conn.recv()
         if response.get('type') != 'status' or response.get('msg') != 'ready':
+            process.terminate()
             raise RuntimeError(f'Failed to start remote process: {response}')
+        return process, parent_conn, child_conn
 
-    def _send(self, msg: dict):
-        if not self.parent_conn:
-            raise RuntimeError('No connection to remote process.')
-        self.parent_conn.send(msg)
+    def _start_process(self):
+        self.process, self.parent_conn, self.child_conn = self._spawn_process()
+
+    @staticmethod
+    def _request(conn: connection.Connection, msg: dict):
+        with span(f'flowgraph.send.{msg.get("type")}'):
+            conn.send(msg)
+            response = recv_message(conn)
 
-        response_codes = ('started', 'stopped', 'set', 'get')
-        response = self.parent_conn.recv()
+        response_codes = (
+            'started', 'stopped', 'set', 'get', 'reconfigured', 'tapped', 'untapped',
+            'stats'
+        )
         if response.get('type') == 'error':
             raise RuntimeError(response.get('err'))
         elif response.get('type') in response_codes:
             return response
         return response
 
+    def _send(self, msg: dict):
+        with self.lock:
+            if not self.parent_conn:
+                raise RuntimeError('No connection to remote process.')
+            return self._request(self.parent_conn, msg)
+
+    def _block(self, block_id: str) -> dict:
+        blocks = self.flowgraph.blocks if self.flowgraph else []
+        for block in blocks:
+            if block.get('name') == block_id:
+                return block
+        raise ValueError(f'No block named {block_id} in the flowgraph')
+
+    def sample_rate(self) -> float:
+        """
+        The samp_rate variable when it is a plain number, otherwise 1.0 so
+        frequencies are in cycles per sample.
+        """
+        try:
+            value = self._block('samp_rate').get('parameters', {}).get('value')
+            return float(value)
+        except (ValueError, TypeError):
+            return 1.0
+
+    def tap(self, block_id: str, port: str = '0', capacity: int = DEFAULT_TAP_CAPACITY):
+        """
+        Stream the samples of a block output of the running flowgraph into
+        a shared-memory ring.
+        """
+        if self.state != 'running':
+            raise RuntimeError('Flowgraph is not running.')
+
+        block_type = self._block(block_id).get('parameters', {}).get('type', 'complex')
+        dtype = TAP_DTYPES.get(block_type)
+        if dtype is None:
+            raise ValueError(f'Cannot tap {block_id} outputs of type {block_type}')
+
+        self.untap(block_id, port)
+        ring = SampleRing.create(capacity, dtype)
+        try:
+            self._send({
+                'type': 'tap',
+                'block_id': block_id,
+                'port': port,
+                'ring': ring.name,
+                'dtype': dtype
+            })
+        except RuntimeError:
+            ring.close()
+            raise
+        self.taps[(block_id, port)] = ring
+
+    def untap(self, block_id: str, port: str = '0'):
+        ring = self.taps.pop((block_id, port), None)
+        if ring is None:
+            return
+        try:
+            if self.parent_conn:
+                self._send({'type': 'untap', 'block_id': block_id, 'port': port})
+        finally:
+            ring.close()
+
+    def _close_taps(self):
+        # The worker and its sinks are gone, only the rings are left
+        for ring in self.taps.values():
+            ring.close()
+        self.taps.clear()
+
+    def tap_stats(self, block_id: str, port: str = '0', count: int = 4096,
+                  sample_rate: Optional[float] = None) -> Dict[str, float]:
+        """
+        Power and spectral peak of the latest samples of a tapped output,
+        computed on a view of the shared memory.
+        """
+        ring = self.taps.get((block_id, port))
+        if ring is None:
+            raise ValueError(f'{block_id}:{port} is not tapped')
+
+        for _ in range(3):
+            samples, first = ring.latest(count)
+            stats = sample_stats(samples, sample_rate or self.sample_rate())
+            del samples
+            # Retry when the writer lapped the samples during the computation
+            if ring.is_intact(first):
+                return stats
+        raise RuntimeError(f'Samples of {block_id}:{port} are overwritten too fast')
+
+    def _shutdown(self, process, conn: connection.Connection):
+        try:
+            conn.send({'type': 'quit'})
+        except (OSError, BrokenPipeError):
+            pass
+        conn.close()
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+    def _swap(self) -> bool:
+        """
+        Make-before-break swap to the loaded flowgraph.
+
+        The new top block is imported and constructed in a second worker
+        while the old one keeps streaming. The old flowgraph is then stopped
+        and the new one started back to back, so the gap only covers
+        tb.stop() and tb.start().
+        """
+        try:
+            process, parent_conn, child_conn = self._spawn_process()
+        except Exception as e:
+            self.console.print(f'[dim]Could not prepare replacement flowgraph: {e}[/dim]')
+            return False
+
+        old_process, old_conn = self.process, self.parent_conn
+
+        with self.lock:
+            start = time.perf_counter()
+            try:
+                self._request(old_conn, {'type': 'stop'})
+            except RuntimeError:
+                # The old worker is shut down below either way
+                pass
+            try:
+                self._request(parent_conn, {'type': 'start'})
+            except (RuntimeError, OSError, EOFError) as e:
+                self.console.print(f'[dim]Could not start replacement flowgraph: {e}[/dim]')
+                resumed = self._resume(old_conn)
+            else:
+                self.process, self.parent_conn, self.child_conn = process, parent_conn, child_conn
+                gap = time.perf_counter() - start
+
+                # Counters start over in the new worker
+                self.perf_samples.clear()
+                resumed = None
+
+        if resumed is not None:
+            self._shutdown(process, parent_conn)
+            if not resumed:
+                # Neither worker runs, leave the loaded flowgraph to start()
+                self._stop_sampler()
+                self._shutdown(old_process, old_conn)
+                self.parent_conn = None
+                self._close_taps()
+                self.perf_samples.clear()
+                self.state = 'loaded'
+            return False
+
+        self._shutdown(old_process, old_conn)
+        self._close_taps()
+
+        self.swap_gaps.append(gap)
+        self.console.print(f'🔁 Flowgraph swapped, stream gap {gap * 1000:.1f} ms.')
+        return True
+
+    def _resume(self, conn: connection.Connection) -> bool:
+        """
+        Restart the flowgraph of a worker stopped by a failed swap.
+        """
+        try:
+            self._request(conn, {'type': 'start'})
+        except (RuntimeError, OSError, EOFError):
+            return False
+        return True
+
+    def sample_perf(self) -> PerfSample:
+        """
+        Read the performance counters of the running flowgraph.
+        """
+        with self.lock:
+            result = self._send({'type': 'stats'})['result']
+            sample = PerfSample(timestamp=time.monotonic(), blocks=result)
+            self.perf_samples.append(sample)
+        return sample
+
+    def _sample_loop(self):
+        while not self.sampler_stop.wait(self.stats_interval):
+            try:
+                self.sample_perf()
+            except (RuntimeError, OSError, EOFError):
+                # The worker is being stopped or replaced
+                continue
+
+    def _start_sampler(self):
+        if self.stats_interval <= 0:
+            return
+        self.sampler_stop.clear()
+        self.sampler = threading.Thread(
+            target=self._sample_loop, name='perf-sampler', daemon=True
+        )
+        self.sampler.start()
+
+    def _stop_sampler(self):
+        if self.sampler is None:
+            return
+        self.sampler_stop.set()
+        self.sampler.join()
+        self.sampler = None
+
+    def perf_stats(self, window: float = 10.0) -> List[BlockStats]:
+        """
+        Per-block throughput and busy time over the last window seconds,
+        bottleneck first. Without sampled history, the counters are read
+        twice one second apart.
+        """
+        if self.state != 'running':
+            raise RuntimeError('Flowgraph is not running.')
+
+        if len(self.perf_samples) < 2:
+            self.sample_perf()
+            time.sleep(1.0)
+            self.sample_perf()
+
+        samples = list(self.perf_samples)
+        last = samples[-1]
+        first = next(
+            (s for s in samples[:-1] if s.timestamp >= last.timestamp - window),
+            samples[-2]
+        )
+        return summarize(first, last)
+
+    def _trial(self, flowgraph: Flowgraph, seconds: float) -> float:
+        """
+        Run a flowgraph in a separate worker for a few seconds and return
+        its trial score in items per second, or 0.0 if it fails to run.
+        """
+        from flowgraph.loader import generate_flowgraph
+
+        trial = headless_flowgraph(flowgraph)
+        try:
+            process, conn, _ = self._spawn_process(generate_flowgraph(trial), requires_gui(trial))
+        except (RuntimeError, ValueError, EOFError, OSError) as e:
+            # Includes workers that crash before reporting ready
+            self.console.print(f'[dim]Trial failed to start: {e}[/dim]')
+            return 0.0
+
+        try:
+            self._request(conn, {'type': 'start'})
+            # Let the buffers fill before measuring
+            time.sleep(min(seconds / 4, 1.0))
+            first = PerfSample(time.monotonic(), self._request(conn, {'type': 'stats'})['result'])
+            time.sleep(seconds)
+            last = PerfSample(time.monotonic(), self._request(conn, {'type': 'stats'})['result'])
+            self._request(conn, {'type': 'stop'})
+            return trial_score(summarize(first, last), throttle_names(trial))
+        except (RuntimeError, ValueError, EOFError, OSError) as e:
+            self.console.print(f'[dim]Trial failed: {e}[/dim]')
+            return 0.0
+        finally:
+            self._shutdown(process, conn)
+
+    def autotune(self, trial_seconds: float = 2.0,
+                 space=TUNE_SPACE) -> Tuple[TuneSettings, List[Tuple[TuneSettings, float]]]:
+        """
+        Search buffer sizes and CPU affinity for the loaded flowgraph in
+        short trial runs, and load it again with the fastest settings.
+
+        Returns the chosen settings and every (settings, score) trial, see
+        trial_score().
+        """
+        if self.flowgraph is None:
+            raise RuntimeError('No flowgraph loaded.')
+        if self.state == 'running':
+            raise RuntimeError('Stop the flowgraph before tuning it.')
+
+        base = self.flowgraph
+        cores = available_cores()
+
+        def measure(settings: TuneSettings) -> float:
+            with span('flowgraph.autotune.trial'):
+                score = self._trial(apply_settings(base, settings, cores), trial_seconds)
+            self.console.print(f'[dim]{settings}: {score:,.0f} items/s capacity[/dim]')
+            return score
+
+        best, trials = coordinate_search(measure, space)
+        self.load_flowgraph(apply_settings(base, best, cores))
+        return best, trials
+
     def start(self):
         if self.state == 'running':
             self.console.print('⚠️ Flowgraph is already running.')
@@ -69,6 +499,7 @@ class FlowgraphController:
         self._start_process()
         self._send({'type': 'start'})
         self.state = 'running'
+        self._start_sampler()
         self.console.print('▶️ Flowgraph started.')
 
     def stop(self):
@@ -79,10 +510,12 @@ class FlowgraphController:
         if self.process is None:
             raise RuntimeError('No process to stop.')
 
+        self._stop_sampler()
         self._send({'type': 'stop'})
-        self.process.join(timeout=5)
-        if self.process.is_alive():
-            self.process.terminate()
+        self._shutdown(self.process, self.parent_conn)
+        self.parent_conn = None
+        self._close_taps()
+        self.perf_samples.clear()
 
         self.state = 'idle'
         self.console.print('⏹️ Flowgraph stopped.')
@@ -103,7 +536,8 @@ class FlowgraphController:
             result = self._send({
                 'type': 'get',
                 'method': action.method
-            })
-            self.console.print(f'🔍 Get {action.method}: {result}')
+            })['result']
+            self.console.print(f'🔍 Get {action.method}: {describe_result(result)}')
+            return result
         else:
             raise ValueError(f'Unknown action: {action.action}')
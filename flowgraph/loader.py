@@ -16,7 +16,9 @@ from gnuradio.gr.top_block import top_block
 from gnuradio.grc.core.platform import Platform
 from gnuradio.grc.core.generator.top_block import TopBlockGenerator
 
+from flowgraph.catalog import BlockCatalog
 from flowgraph.schema import Flowgraph
+from profiling.spans import span
 
 
 def load_top_block(path: Path) -> Tuple[Any, Type[top_block]]:
@@ -45,7 +47,10 @@ def load_top_block(path: Path) -> Tuple[Any, Type[top_block]]:
     return (main_func, top_block_cls)
 
 
-def generate_flowgraph(flowgraph: Flowgraph) -> Path:
+def make_platform() -> Platform:
+    """
+    Create a GRC platform with the block library loaded.
+    """
     platform = Platform(
         version=gr.version(),
         version_parts=(
@@ -55,12 +60,29 @@ def generate_flowgraph(flowgraph: Flowgraph) -> Path:
         prefs=gr.prefs(),
         install_prefix=gr.prefix()
     )
-    platform.build_library()
-    grc_flowgraph = platform.make_flow_graph()
-    grc_flowgraph.import_data(flowgraph.model_dump())
-    grc_flowgraph.rewrite()
-    grc_flowgraph.validate()
-
-    generator = TopBlockGenerator(grc_flowgraph, tempfile.gettempdir())
-    generator.write()
+    with span('flowgraph.build_library'):
+        platform.build_library()
+    return platform
+
+
+def generate_flowgraph(flowgraph: Flowgraph) -> Path:
+    platform = make_platform()
+
+    # Minimized flowgraphs may omit parameters left at their defaults
+    with span('flowgraph.expand'):
+        catalog = BlockCatalog.from_platform(platform)
+        errors = catalog.check_flowgraph(flowgraph)
+        if errors:
+            raise ValueError('\n'.join(errors))
+        flowgraph = catalog.expand_defaults(flowgraph)
+
+    with span('flowgraph.import'):
+        grc_flowgraph = platform.make_flow_graph()
+        grc_flowgraph.import_data(flowgraph.model_dump())
+        grc_flowgraph.rewrite()
+        grc_flowgraph.validate()
+
+    with span('flowgraph.write'):
+        generator = TopBlockGenerator(grc_flowgraph, tempfile.gettempdir())
+        generator.write()
     return Path(generator.file_path)
@@ -0,0 +1,145 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import re
+
+from datetime import datetime, timezone
+from typing import Annotated, Any, Dict, List, Iterable, Union
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+from dataset_generation.schema import (
+    AddBlockAction,
+    RemoveBlockAction,
+    ParameterAction,
+    ConnectAction,
+    DisconnectAction,
+)
+from flowgraph.schema import Flowgraph
+
+
+PatchAction = Annotated[
+    Union[
+        AddBlockAction,
+        RemoveBlockAction,
+        ParameterAction,
+        ConnectAction,
+        DisconnectAction
+    ],
+    Field(discriminator='action')
+]
+
+PATCH_ACTIONS_ADAPTER: TypeAdapter[List[PatchAction]] = TypeAdapter(List[PatchAction])
+
+# Fields that only matter for traces and are filled in when parsing a patch
+PATCH_CONTEXT_FIELDS = {'timestamp', 'flowgraph_id', 'source'}
+
+
+class FlowgraphPatch(BaseModel):
+    """
+    Represents a compact edit script against the current flowgraph.
+    """
+    patch: List[Dict[str, Any]]
+
+
+def make_patch(actions: Iterable[PatchAction]) -> FlowgraphPatch:
+    """
+    Build a compact patch from flowgraph actions.
+    """
+    return FlowgraphPatch(patch=[
+        action.model_dump(mode='json', exclude=PATCH_CONTEXT_FIELDS, exclude_none=True)
+        for action in actions
+    ])
+
+
+def patch_actions(patch: FlowgraphPatch, flowgraph_id: str) -> List[PatchAction]:
+    """
+    Validate the entries of a patch into flowgraph action models.
+    """
+    context = {
+        'timestamp': datetime.now(timezone.utc),
+        'flowgraph_id': flowgraph_id,
+        'source': 'flowgraph',
+    }
+
+    # ValidationError is a ValueError, unknown actions are reported by tag
+    return PATCH_ACTIONS_ADAPTER.validate_python(
+        [{**item, **context} for item in patch.patch]
+    )
+
+
+def _block_key(action: AddBlockAction) -> str:
+    if action.block_key:
+        return action.block_key
+    # GRC names instances <key>_<index>, e.g. blocks_throttle2_0
+    return re.sub(r'_\d+$', '', action.block_id)
+
+
+def apply_patch(flowgraph: Flowgraph, patch: FlowgraphPatch) -> Flowgraph:
+    """
+    Apply a patch to a flowgraph and return the resulting flowgraph.
+
+    The input flowgraph is left untouched. Any action that does not apply
+    cleanly raises a ValueError describing the problem.
+    """
+    flowgraph_id = flowgraph.options.get('parameters', {}).get('id', '')
+    actions = patch_actions(patch, flowgraph_id)
+
+    blocks = {block.get('name') or block.get('id'): block for block in flowgraph.blocks}
+    connections = [list(conn) for conn in flowgraph.connections]
+    removed = set()
+
+    def require_block(name: str):
+        if name not in blocks:
+            raise ValueError(f'Unknown block: {name}')
+        return blocks[name]
+
+    for action in actions:
+        if isinstance(action, AddBlockAction):
+            if action.block_id in blocks:
+                raise ValueError(f'Block already exists: {action.block_id}')
+            blocks[action.block_id] = {
+                'name': action.block_id,
+                'id': _block_key(action),
+                'parameters': dict(action.parameters),
+                'states': {'state': 'enabled'},
+            }
+        elif isinstance(action, RemoveBlockAction):
+            require_block(action.block_id)
+            del blocks[action.block_id]
+            removed.add(action.block_id)
+            connections = [
+                conn for conn in connections
+                if action.block_id not in (conn[0], conn[2])
+            ]
+        elif isinstance(action, ParameterAction):
+            block = require_block(action.block_id)
+            block = dict(block)
+            block['parameters'] = {
+                **block.get('parameters', {}),
+                action.parameter: action.value
+            }
+            blocks[action.block_id] = block
+        elif isinstance(action, ConnectAction):
+            require_block(action.src[0])
+            require_block(action.dst[0])
+            conn = [action.src[0], action.src[1], action.dst[0], action.dst[1]]
+            if conn not in connections:
+                connections.append(conn)
+        elif isinstance(action, DisconnectAction):
+            conn = [action.src[0], action.src[1], action.dst[0], action.dst[1]]
+            # flowgraph_diff also disconnects the connections of removed
+            # blocks, which were dropped along with them
+            if removed & {conn[0], conn[2]}:
+                continue
+            if conn not in connections:
+                raise ValueError(f'Unknown connection: {conn}')
+            connections.remove(conn)
+
+    return Flowgraph(
+        options=flowgraph.options,
+        blocks=list(blocks.values()),
+        connections=connections,
+        metadata=flowgraph.metadata
+    )
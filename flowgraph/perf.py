@@ -0,0 +1,100 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+
+@dataclass
+class PerfSample:
+    """
+    Cumulative performance counters of the blocks of a running top block.
+    """
+    timestamp: float
+    blocks: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+@dataclass
+class BlockStats:
+    name: str
+    items_per_s: float
+    busy: float
+    input_full: float
+    output_full: float
+
+
+def enable_perf_counters():
+    """
+    Turn on the GNU Radio performance counters. Block executors read the
+    setting when the top block is started.
+    """
+    # GNU Radio is only needed in the flowgraph worker
+    from gnuradio import gr
+
+    gr.prefs().set_bool('PerfCounters', 'on', True)
+    gr.prefs().set_bool('PerfCounters', 'export', False)
+
+
+def _mean(values: List[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def read_counters(tb) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the counters of every block attribute of a top block.
+
+    Item counts are cumulative, from nitems_written() on the first output
+    or nitems_read() on the first input of sinks.
+    """
+    from gnuradio import gr
+
+    ticks_per_s = float(gr.high_res_timer_tps())
+    counters = {}
+    for name, block in vars(tb).items():
+        if not callable(getattr(block, 'pc_work_time_total', None)):
+            continue
+        try:
+            input_full = list(block.pc_input_buffers_full())
+            output_full = list(block.pc_output_buffers_full())
+            if output_full:
+                items = block.nitems_written(0)
+            elif input_full:
+                items = block.nitems_read(0)
+            else:
+                items = 0
+            counters[name] = {
+                'work_time_s': block.pc_work_time_total() / ticks_per_s,
+                'items': int(items),
+                'input_full': input_full,
+                'output_full': output_full,
+            }
+        except (RuntimeError, ValueError):
+            # Blocks that are not part of the running graph have no detail
+            continue
+    return counters
+
+
+def summarize(first: PerfSample, last: PerfSample) -> List[BlockStats]:
+    """
+    Per-block throughput and the share of time spent in work() between two
+    samples, busiest block first. The busiest block is the bottleneck.
+    """
+    elapsed = last.timestamp - first.timestamp
+    if elapsed <= 0:
+        raise ValueError('Samples must be taken at different times')
+
+    stats = []
+    for name, counters in last.blocks.items():
+        previous = first.blocks.get(name)
+        if previous is None:
+            continue
+        stats.append(BlockStats(
+            name=name,
+            items_per_s=(counters['items'] - previous['items']) / elapsed,
+            busy=(counters['work_time_s'] - previous['work_time_s']) / elapsed,
+            input_full=_mean(counters['input_full']),
+            output_full=_mean(counters['output_full'])
+        ))
+    stats.sort(key=lambda s: s.busy, reverse=True)
+    return stats
@@ -0,0 +1,89 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import pickle
+import numpy as np
+
+from multiprocessing import connection
+from typing import Any, Dict, List, Tuple
+
+
+# Results of these types are sent inline with the message
+SCALAR_TYPES = (type(None), bool, int, float, complex, str)
+
+
+def pack_result(value: Any) -> Tuple[Dict[str, Any], List[pickle.PickleBuffer]]:
+    """
+    Message fields carrying a getter result, and the buffers to send after
+    the message.
+
+    Scalars are kept inline. Other values are pickled with protocol 5, so
+    the data of NumPy arrays is left out of the pickle as raw buffers.
+    Values that cannot be pickled, such as some bound C++ objects, are
+    sent as strings.
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if type(value) in SCALAR_TYPES:
+        return {'result': value}, []
+
+    buffers: List[pickle.PickleBuffer] = []
+    try:
+        data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return {'result': str(value)}, []
+    return {
+        'result': data,
+        'pickled': True,
+        'buffers': [buffer.raw().nbytes for buffer in buffers]
+    }, buffers
+
+
+def send_message(conn: connection.Connection, msg: Dict[str, Any]):
+    """
+    Send a message, with a 'result' field encoded by pack_result().
+    """
+    buffers = []
+    if 'result' in msg:
+        fields, buffers = pack_result(msg['result'])
+        msg = {**msg, **fields}
+    conn.send(msg)
+    for buffer in buffers:
+        conn.send_bytes(buffer.raw())
+
+
+def recv_message(conn: connection.Connection) -> Dict[str, Any]:
+    """
+    Receive a message sent by send_message(). Out-of-band buffers are read
+    straight into the memory the unpickled arrays are backed by.
+    """
+    msg = conn.recv()
+    if not msg.get('pickled'):
+        return msg
+
+    buffers = []
+    for size in msg.pop('buffers'):
+        buffer = bytearray(size)
+        if size:
+            conn.recv_bytes_into(buffer)
+        else:
+            conn.recv_bytes()
+        buffers.append(buffer)
+    msg['result'] = pickle.loads(msg.pop('result'), buffers=buffers)
+    del msg['pickled']
+    return msg
+
+
+def describe_result(value: Any) -> str:
+    """
+    Short printable form of a getter result.
+    """
+    if isinstance(value, np.ndarray):
+        values = np.array2string(value, threshold=16, edgeitems=4)
+        return f'array(shape={value.shape}, dtype={value.dtype}) {values}'
+    if isinstance(value, (list, tuple)) and len(value) > 16:
+        head = ', '.join(str(v) for v in value[:4])
+        tail = ', '.join(str(v) for v in value[-4:])
+        return f'{type(value).__name__} of {len(value)}: [{head}, ..., {tail}]'
+    return str(value)
@@ -4,48 +4,222 @@
 
 from multiprocessing import connection
 
-from typing import Dict, Any
+from typing import Dict, Any, List
 from pathlib import Path
 
-from PyQt5 import Qt, QtCore # type: ignore
-
 from flowgraph.loader import load_top_block
+from flowgraph.perf import enable_perf_counters, read_counters
+from flowgraph.protocol import send_message
+from flowgraph.tap import SampleRing, make_tap_sink
+
+
+# Seconds between checks for commands in the Qt event loop
+QT_POLL_INTERVAL = 0.03
 
 
 class RemoteTopBlock:
-    def __init__(self, generated_path: Path, connection: connection.Connection):
+    """
+    Runs a generated top block in a worker process and serves the
+    controller's commands.
+
+    Flowgraphs with Qt GUI widgets are driven from the Qt event loop.
+    Headless ones wait on the connection directly and never import Qt, so
+    they start faster, use less memory and run without a display.
+    """
+    def __init__(self, generated_path: Path, connection: connection.Connection,
+                 gui: bool = True):
         self.generated_path = generated_path
         self.connection = connection
-        self.app = Qt.QApplication([])
-        self.timer = QtCore.QTimer()
+        self.gui = gui
+        self.running = True
+        self.app = None
+        self.timer = None
+        if gui:
+            from PyQt5 import Qt, QtCore # type: ignore
+
+            self.app = Qt.QApplication([])
+            self.timer = QtCore.QTimer()
 
+        enable_perf_counters()
         tb_cls = self._load_tb_cls()
         self.tb = tb_cls()
 
+        # Tap sinks and their rings by (block name, port)
+        self.taps = {}
+
     @staticmethod
-    def entry_point(generated_path: Path, connection: connection.Connection):
-        remote_top_block = RemoteTopBlock(generated_path, connection)
+    def entry_point(generated_path: Path, connection: connection.Connection,
+                    gui: bool = True):
+        remote_top_block = RemoteTopBlock(generated_path, connection, gui)
         remote_top_block.main()
 
+    def _quit(self):
+        self.connection.close()
+        self.running = False
+        if self.app is not None:
+            self.app.quit()
+
+    def _poll(self, timeout: float = 0.0):
+        try:
+            if self.connection and not self.connection.closed and self.connection.poll(timeout):
+                command = self.connection.recv()
+                self._handle_command(command)
+        except (EOFError, BrokenPipeError):
+            self._quit()
+
     def _poll_timer(self):
-        self.timer.setInterval(30)
-        def poll():
-            try:
-                if self.connection and self.connection.poll():
-                    command = self.connection.recv()
-                    self._handle_command(command)
-            except (EOFError, BrokenPipeError):
-                self.connection.close()
-                self.app.quit()
-        self.timer.timeout.connect(poll)
+        self.timer.setInterval(int(QT_POLL_INTERVAL * 1000))
+        self.timer.timeout.connect(self._poll)
         self.timer.start()
 
     def _load_tb_cls(self):
-        _, tb_cls = load_top_block(self.generated_path)
+        main_func, tb_cls = load_top_block(self.generated_path)
+        # Parameter expressions are evaluated in the generated module
+        self.namespace = main_func.__globals__
         return tb_cls
 
-    def _send(self, msg: Dict[str, str]):
-        self.connection.send(msg)
+    def _evaluate(self, expr: Any) -> Any:
+        if not isinstance(expr, str):
+            return expr
+        return eval(expr, self.namespace, dict(vars(self.tb)))
+
+    def _endpoint(self, block_name: str, port: str):
+        block = getattr(self.tb, block_name)
+        if port.isdigit():
+            return (block, int(port))
+        return (block, port)
+
+    def _set_parameter(self, change: Dict[str, Any]):
+        block_name = change['block_id']
+        parameter = change['parameter']
+        value = self._evaluate(change['value'])
+
+        # Variables are exposed as set_<name> callbacks on the top block,
+        # everything else through set_<parameter> on the block object
+        variable_setter = getattr(self.tb, f'set_{block_name}', None)
+        if parameter == 'value' and callable(variable_setter):
+            variable_setter(value)
+            return
+
+        block = getattr(self.tb, block_name, None)
+        setter = getattr(block, f'set_{parameter}', None)
+        if not callable(setter):
+            raise ValueError(f'No live setter for {block_name}.{parameter}')
+        setter(value)
+
+    def _connect(self, src: tuple, dst: tuple, connect: bool):
+        src_block, src_port = self._endpoint(*src)
+        dst_block, dst_port = self._endpoint(*dst)
+        if isinstance(src_port, int):
+            method = self.tb.connect if connect else self.tb.disconnect
+            method((src_block, src_port), (dst_block, dst_port))
+        else:
+            method = self.tb.msg_connect if connect else self.tb.msg_disconnect
+            method(src_block, src_port, dst_block, dst_port)
+
+    def _reconfigure(self, generated_path: Path,
+                     changes: List[Dict[str, Any]]) -> List[List[str]]:
+        """
+        Apply a flowgraph diff to the running top block.
+
+        Parameter changes go through the generated setters. Structural
+        changes are applied between lock() and unlock(); new blocks are
+        taken from an instance of the regenerated top block. That instance
+        constructs every block again, so the controller restarts graphs
+        with device or Qt blocks instead of adding blocks to them.
+
+        The diff knows nothing about tap sinks, so blocks that are removed
+        or disconnected are untapped first. Returns the untapped outputs.
+        """
+        untapped = []
+        structural = [c for c in changes if c['action'] != 'parameter']
+        if structural:
+            staged_tb = None
+            if any(c['action'] == 'add_block' for c in structural):
+                main_func, tb_cls = load_top_block(generated_path)
+                staged_tb = tb_cls()
+
+            touched = set()
+            for change in structural:
+                if change['action'] == 'remove_block':
+                    touched.add(change['block_id'])
+                elif change['action'] == 'disconnect':
+                    touched.update((change['src'][0], change['dst'][0]))
+
+            self.tb.lock()
+            try:
+                for key in [key for key in self.taps if key[0] in touched]:
+                    self._disconnect_tap(*key)
+                    untapped.append(list(key))
+                for change in structural:
+                    if change['action'] == 'disconnect':
+                        self._connect(change['src'], change['dst'], connect=False)
+                for change in structural:
+                    if change['action'] == 'remove_block':
+                        delattr(self.tb, change['block_id'])
+                    elif change['action'] == 'add_block':
+                        block = getattr(staged_tb, change['block_id'])
+                        setattr(self.tb, change['block_id'], block)
+                for change in structural:
+                    if change['action'] == 'connect':
+                        self._connect(change['src'], change['dst'], connect=True)
+            finally:
+                self.tb.unlock()
+
+            if staged_tb is not None:
+                self.namespace = main_func.__globals__
+
+        for change in changes:
+            if change['action'] == 'parameter':
+                self._set_parameter(change)
+
+        self.generated_path = generated_path
+        return untapped
+
+    def _tap(self, block_name: str, port: str, ring_name: str, dtype: str):
+        """
+        Connect a sink writing the samples of a block output into the
+        shared-memory ring created by the controller.
+        """
+        if (block_name, port) in self.taps:
+            self._untap(block_name, port)
+
+        block, index = self._endpoint(block_name, port)
+        ring = SampleRing.attach(ring_name, dtype)
+        try:
+            itemsize = block.output_signature().sizeof_stream_item(index)
+            if itemsize % ring.dtype.itemsize:
+                raise ValueError(
+                    f'Output {block_name}:{port} has {itemsize} byte items, not {ring.dtype}'
+                )
+            sink = make_tap_sink(ring, vlen=itemsize // ring.dtype.itemsize)
+
+            self.tb.lock()
+            try:
+                self.tb.connect((block, index), sink)
+            finally:
+                self.tb.unlock()
+        except Exception:
+            ring.close()
+            raise
+        self.taps[(block_name, port)] = (sink, ring)
+
+    def _disconnect_tap(self, block_name: str, port: str):
+        # Callers hold the top block lock
+        sink, ring = self.taps.pop((block_name, port))
+        block, index = self._endpoint(block_name, port)
+        self.tb.disconnect((block, index), sink)
+        ring.close()
+
+    def _untap(self, block_name: str, port: str):
+        self.tb.lock()
+        try:
+            self._disconnect_tap(block_name, port)
+        finally:
+            self.tb.unlock()
+
+    def _send(self, msg: Dict[str, Any]):
+        send_message(self.connection, msg)
 
     def _handle_command(self, cmd: Dict[str, Any]):
         command_type = cmd.get('type')
@@ -57,6 +231,19 @@ class RemoteTopBlock:
                 self.tb.stop()
                 self.tb.wait()
                 self._send({'type': 'stopped'})
+            elif command_type == 'quit':
+                self._quit()
+            elif command_type == 'reconfigure':
+                untapped = self._reconfigure(Path(cmd['path']), cmd['changes'])
+                self._send({'type': 'reconfigured', 'untapped': untapped})
+            elif command_type == 'stats':
+                self._send({'type': 'stats', 'result': read_counters(self.tb)})
+            elif command_type == 'tap':
+                self._tap(cmd['block_id'], cmd['port'], cmd['ring'], cmd['dtype'])
+                self._send({'type': 'tapped'})
+            elif command_type == 'untap':
+                self._untap(cmd['block_id'], cmd['port'])
+                self._send({'type': 'untapped'})
             elif command_type == 'set':
                 method = getattr(self.tb, cmd['method'], None)
                 if callable(method):
@@ -78,7 +265,7 @@ class RemoteTopBlock:
                     self._send({
                         'type': 'get',
                         'method': cmd['method'],
-                        'result': str(result)
+                        'result': result
                     })
                 else:
                     self._send({
@@ -97,10 +284,16 @@ class RemoteTopBlock:
             })
 
     def main(self):
-        self._poll_timer()
         self._send({'type': 'status', 'msg': 'ready'})
         try:
-            self.app.exec()
+            if self.gui:
+                self._poll_timer()
+                self.app.exec()
+            else:
+                # The scheduler runs on its own threads, commands are
+                # handled as soon as they arrive
+                while self.running:
+                    self._poll(timeout=None)
         finally:
             self.tb.stop()
             self.tb.wait()
@@ -2,9 +2,12 @@
 # This file is part of the GNU Radio LLM project.
 #
 
-from typing import List, Dict, Optional, Any
+from typing import TYPE_CHECKING, List, Dict, Optional, Any
 from pydantic import BaseModel, Field
 
+if TYPE_CHECKING:
+    from flowgraph.catalog import BlockCatalog
+
 
 class Flowgraph(BaseModel):
     """
@@ -16,6 +19,36 @@ class Flowgraph(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
+def requires_gui(flowgraph: Flowgraph) -> bool:
+    """
+    Whether the generated top block needs a Qt application to run.
+
+    GRC generates a Qt widget for the qt_gui output, its default, and
+    qtgui blocks (including variable_qtgui_*) only work in that mode.
+    """
+    generate_options = flowgraph.options.get('parameters', {}).get('generate_options', 'qt_gui')
+    if generate_options == 'qt_gui':
+        return True
+    return any('qtgui' in str(b.get('id', '')) for b in flowgraph.blocks)
+
+
+# Block ID prefixes of sources and sinks that open a device
+DEVICE_BLOCK_PREFIXES = (
+    'audio_', 'uhd_', 'osmosdr_', 'soapy_', 'iio_', 'rtlsdr_', 'limesdr_', 'bladerf_'
+)
+
+
+def has_exclusive_blocks(flowgraph: Flowgraph) -> bool:
+    """
+    Whether the flowgraph has blocks that cannot be instantiated twice in
+    one process: device sources and sinks, and Qt widgets.
+    """
+    return any(
+        str(b.get('id', '')).startswith(DEVICE_BLOCK_PREFIXES) or 'qtgui' in str(b.get('id', ''))
+        for b in flowgraph.blocks
+    )
+
+
 class FlowgraphAction(BaseModel):
     """
     Represents an action to be performed on a flowgraph.
@@ -25,44 +58,59 @@ class FlowgraphAction(BaseModel):
     value: Optional[float | int | str | bool] = None
 
 
-def minimize_flowgraph(flowgraph: Flowgraph) -> Flowgraph:
+# Cosmetic GRC keys that do not affect the generated flowgraph
+MINIMIZE_KEYS = frozenset((
+    'comment',
+    'coordinate',
+    'copyright',
+    'description',
+    'category',
+    'bus_sink',
+    'bus_source',
+    'bus_structure',
+    'rotation',
+    'alias',
+    'affinity',
+    'grc_version',
+    'cmake_opt',
+    'gen_cmake',
+    'gen_linking',
+    'placement',
+    'qt_qss_theme',
+    'window_size',
+    'author',
+    'sizing_mode',
+    'realtime_scheduling',
+    'bus_structure_sink',
+    'run_options',
+    'thread_safe_setters'
+))
+
+
+def _remove_keys(data: Any) -> Any:
+    if isinstance(data, dict):
+        return {k: _remove_keys(v) for k, v in data.items() if k not in MINIMIZE_KEYS}
+    elif isinstance(data, list):
+        return [_remove_keys(item) for item in data]
+    return data
+
+
+def minimize_flowgraph(flowgraph: Flowgraph,
+                       catalog: Optional['BlockCatalog'] = None) -> Flowgraph:
     """
     Minimize flowgraph by removing unnecessary data.
+
+    With a block catalog, parameters left at their GRC defaults are dropped
+    as well. BlockCatalog.expand_defaults() restores them.
     """
-    def remove_keys(data: Dict[str, Any], keys: tuple) -> Any:
-        if isinstance(data, dict):
-            return {k: remove_keys(v, keys) for k, v in data.items() if k not in keys}
-        elif isinstance(data, list):
-            return [remove_keys(item, keys) for item in data]
-        else:
-            return data
-
-    keys_to_remove = (
-        'comment',
-        'coordinate',
-        'copyright',
-        'description',
-        'category',
-        'bus_sink',
-        'bus_source',
-        'bus_structure',
-        'rotation',
-        'alias',
-        'affinity',
-        'grc_version',
-        'cmake_opt',
-        'gen_cmake',
-        'gen_linking',
-        'placement',
-        'qt_qss_theme',
-        'window_size',
-        'author',
-        'sizing_mode',
-        'realtime_scheduling',
-        'bus_structure_sink',
-        'run_options',
-        'thread_safe_setters'
+    # The cleaned containers are new, so the fields are walked directly
+    # instead of going through a deep model_dump() copy
+    minimized = Flowgraph(
+        options=_remove_keys(flowgraph.options),
+        blocks=_remove_keys(flowgraph.blocks),
+        connections=flowgraph.connections,
+        metadata=_remove_keys(flowgraph.metadata)
     )
-
-    cleaned = remove_keys(flowgraph.model_dump(), keys_to_remove)
-    return Flowgraph(**cleaned)
+    if catalog is not None:
+        minimized = catalog.elide_defaults(minimized)
+    return minimized
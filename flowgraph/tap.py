@@ -0,0 +1,181 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import numpy as np
+
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+
+# Stream dtypes by the value of the GRC 'type' parameter
+TAP_DTYPES = {
+    'complex': 'complex64',
+    'float': 'float32',
+    'int': 'int32',
+    'short': 'int16',
+    'byte': 'int8',
+}
+
+DEFAULT_TAP_CAPACITY = 1 << 16
+
+# Header slots, stored as int64 in front of the samples. _WRITING is the
+# sample count a write in progress will reach, _WRITTEN the completed one
+_WRITTEN, _CAPACITY, _WRITING, _HEADER_SIZE = 0, 1, 2, 3
+
+
+class SampleRing:
+    """
+    Single-writer ring buffer of samples in shared memory.
+
+    The samples are mirrored, every sample is stored at its ring position
+    and again one capacity further. Any window of up to capacity recent
+    samples is then contiguous and is returned as a NumPy view of the
+    shared memory, without copying.
+
+    Writes are published like a seqlock: the count a write will reach is
+    stored before the samples are copied and the completed count after,
+    so readers can tell whether a view was overwritten, even partially.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, dtype: Any, owner: bool):
+        self.shm = shm
+        self.dtype = np.dtype(dtype)
+        self.owner = owner
+
+        self.header = np.ndarray((_HEADER_SIZE,), dtype=np.int64, buffer=shm.buf)
+        self.capacity = int(self.header[_CAPACITY])
+        self.samples = np.ndarray(
+            (2 * self.capacity,), dtype=self.dtype,
+            buffer=shm.buf, offset=self.header.nbytes
+        )
+
+    @classmethod
+    def create(cls, capacity: int = DEFAULT_TAP_CAPACITY,
+               dtype: Any = np.complex64) -> 'SampleRing':
+        size = _HEADER_SIZE * 8 + 2 * capacity * np.dtype(dtype).itemsize
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        header = np.ndarray((_HEADER_SIZE,), dtype=np.int64, buffer=shm.buf)
+        header[_WRITTEN] = header[_WRITING] = 0
+        header[_CAPACITY] = capacity
+        del header
+        return cls(shm, dtype, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, dtype: Any) -> 'SampleRing':
+        return cls(shared_memory.SharedMemory(name=name), dtype, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def written(self) -> int:
+        """
+        Total number of samples written since the ring was created.
+        """
+        return int(self.header[_WRITTEN])
+
+    def write(self, samples: np.ndarray):
+        samples = samples.reshape(-1)
+        if len(samples) > self.capacity:
+            # Older samples would be overwritten right away
+            skipped = len(samples) - self.capacity
+            samples = samples[skipped:]
+        else:
+            skipped = 0
+
+        written = self.written + skipped
+        start = written % self.capacity
+        count = len(samples)
+
+        # Announced first, samples before written + count - capacity are
+        # about to be overwritten
+        self.header[_WRITING] = written + count
+
+        # Both copies, wrapping the second back to the start of the buffer
+        self.samples[start:start + count] = samples
+        end = start + self.capacity + count
+        head = min(end, 2 * self.capacity) - (start + self.capacity)
+        self.samples[start + self.capacity:start + self.capacity + head] = samples[:head]
+        self.samples[:count - head] = samples[head:]
+
+        # Published last, readers never see unwritten samples
+        self.header[_WRITTEN] = written + count
+
+    def latest(self, count: Optional[int] = None) -> Tuple[np.ndarray, int]:
+        """
+        Return a view of the most recent samples and the index of the
+        first one, which is_intact() takes to detect overwritten views.
+        """
+        written = self.written
+        count = min(count or self.capacity, self.capacity, written)
+        first = written - count
+        start = first % self.capacity
+        view = self.samples[start:start + count]
+        view.flags.writeable = False
+        return view, first
+
+    def is_intact(self, first: int) -> bool:
+        """
+        Whether samples from index first on have not been overwritten,
+        or started to be by a write in progress.
+        """
+        return int(self.header[_WRITING]) - self.capacity <= first
+
+    def close(self):
+        # Views into the buffer must be released before it is closed
+        self.header = self.samples = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def sample_stats(samples: np.ndarray, sample_rate: float = 1.0) -> Dict[str, float]:
+    """
+    Power and spectral peak of a block of samples.
+
+    The peak frequency comes from a Hann-windowed FFT, in Hz when the
+    sample rate is known and in cycles per sample otherwise.
+    """
+    if len(samples) == 0:
+        raise ValueError('No samples to compute statistics on')
+
+    samples = samples.astype(np.complex128 if np.iscomplexobj(samples) else np.float64)
+    power = float(np.mean(np.abs(samples) ** 2))
+
+    windowed = samples * np.hanning(len(samples))
+    if np.iscomplexobj(samples):
+        spectrum = np.abs(np.fft.fft(windowed)) ** 2
+        freqs = np.fft.fftfreq(len(samples), d=1 / sample_rate)
+    else:
+        spectrum = np.abs(np.fft.rfft(windowed)) ** 2
+        freqs = np.fft.rfftfreq(len(samples), d=1 / sample_rate)
+    peak = int(np.argmax(spectrum))
+
+    return {
+        'samples': len(samples),
+        'power': power,
+        'power_db': float(10 * np.log10(power)) if power > 0 else float('-inf'),
+        'rms': float(np.sqrt(power)),
+        'peak_abs': float(np.max(np.abs(samples))),
+        'peak_freq': float(freqs[peak]),
+    }
+
+
+def make_tap_sink(ring: SampleRing, vlen: int = 1):
+    """
+    Create a GNU Radio sink writing its input into a sample ring.
+    """
+    # GNU Radio is only needed in the flowgraph worker
+    from gnuradio import gr
+
+    class TapSink(gr.sync_block):
+        def __init__(self):
+            in_sig = [ring.dtype.type if vlen == 1 else (ring.dtype.type, vlen)]
+            gr.sync_block.__init__(self, name='tap_sink', in_sig=in_sig, out_sig=None)
+
+        def work(self, input_items, output_items):
+            ring.write(input_items[0])
+            return len(input_items[0])
+
+    return TapSink()
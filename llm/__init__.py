@@ -0,0 +1,5 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+__version__ = '0.1.0'
@@ -0,0 +1,51 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import threading
+
+from typing import Any, Optional
+
+
+class BackgroundModelEngine:
+    """
+    Loads and warms up a ModelEngine on a background thread.
+
+    torch and transformers are only imported by the loader thread, so the
+    caller can show its prompt while the model is still loading.
+    """
+    def __init__(self, **engine_kwargs: Any):
+        self.engine_kwargs = engine_kwargs
+        self.engine = None
+        self.error: Optional[BaseException] = None
+        self.ready = threading.Event()
+
+        self.thread = threading.Thread(
+            target=self._load, name='model-loader', daemon=True
+        )
+        self.thread.start()
+
+    def _load(self):
+        try:
+            from llm.inference import ModelEngine
+
+            engine = ModelEngine(**self.engine_kwargs)
+            engine.warm_up()
+            self.engine = engine
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.ready.set()
+
+    def is_ready(self) -> bool:
+        return self.ready.is_set()
+
+    def get(self, timeout: Optional[float] = None):
+        """
+        Wait for the engine to finish loading and return it.
+        """
+        if not self.ready.wait(timeout):
+            raise TimeoutError('Model is still loading')
+        if self.error is not None:
+            raise RuntimeError(f'Failed to load model: {self.error}') from self.error
+        return self.engine
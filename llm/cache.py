@@ -0,0 +1,157 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+DEFAULT_CACHE_PATH = Path.home() / '.cache' / 'gnuradio_llm' / 'responses.sqlite'
+
+
+def normalize_prompt(user_prompt: str) -> str:
+    return ' '.join(user_prompt.lower().split())
+
+
+def canonical_context(context_json: Optional[str]) -> str:
+    if not context_json:
+        return ''
+    try:
+        context = json.loads(context_json)
+    except json.JSONDecodeError:
+        return context_json.strip()
+    return json.dumps(context, sort_keys=True, separators=(',', ':'))
+
+
+class ResponseCache:
+    """
+    Size-bounded, least recently used on-disk cache of validated responses.
+
+    Entries are keyed by the model ID, the context serializer settings, the
+    normalized user prompt and the canonical context JSON. Each model keeps
+    its own fingerprint, and only the entries of a model are dropped when
+    the fingerprint of its artifact changes.
+    """
+    def __init__(self,
+                 model_id: str,
+                 fingerprint: str,
+                 path: Path = DEFAULT_CACHE_PATH,
+                 max_bytes: int = 16 * 1024 * 1024,
+                 context_settings: Optional[Dict[str, Any]] = None):
+        self.model_id = model_id
+        self.fingerprint = fingerprint
+        # The serializer settings change what the model sees of the context
+        self.context_settings = json.dumps(context_settings or {}, sort_keys=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        with self.db:
+            columns = [row[1] for row in self.db.execute('PRAGMA table_info(responses)')]
+            if columns and 'model_id' not in columns:
+                # Entries of the single-fingerprint layout cannot be attributed
+                self.db.execute('DROP TABLE responses')
+                self.db.execute('DROP TABLE IF EXISTS meta')
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS fingerprints ('
+                'model_id TEXT PRIMARY KEY, fingerprint TEXT)'
+            )
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, model_id TEXT, response TEXT, size INTEGER, '
+                'last_used REAL)'
+            )
+        self._check_fingerprint()
+
+    def _check_fingerprint(self):
+        with self.lock, self.db:
+            row = self.db.execute(
+                'SELECT fingerprint FROM fingerprints WHERE model_id = ?', (self.model_id,)
+            ).fetchone()
+            if row is None or row[0] != self.fingerprint:
+                self.db.execute('DELETE FROM responses WHERE model_id = ?', (self.model_id,))
+                self.db.execute(
+                    'INSERT OR REPLACE INTO fingerprints VALUES (?, ?)',
+                    (self.model_id, self.fingerprint)
+                )
+
+    def make_key(self, user_prompt: str, context_json: Optional[str]) -> str:
+        digest = hashlib.sha256()
+        for part in (self.model_id, self.context_settings, normalize_prompt(user_prompt),
+                     canonical_context(context_json)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, user_prompt: str, context_json: Optional[str]) -> Optional[str]:
+        key = self.make_key(user_prompt, context_json)
+        with self.lock, self.db:
+            row = self.db.execute(
+                'SELECT response FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.db.execute(
+                'UPDATE responses SET last_used = ? WHERE key = ?',
+                (time.time(), key)
+            )
+            self.hits += 1
+            return row[0]
+
+    def put(self, user_prompt: str, context_json: Optional[str], response: str):
+        """
+        Store a response. Only call this for responses that passed validation.
+        """
+        key = self.make_key(user_prompt, context_json)
+        size = len(response.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self.lock, self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                (key, self.model_id, response, size, time.time())
+            )
+            self._evict()
+
+    def discard(self, user_prompt: str, context_json: Optional[str]):
+        key = self.make_key(user_prompt, context_json)
+        with self.lock, self.db:
+            self.db.execute('DELETE FROM responses WHERE key = ?', (key,))
+
+    def _evict(self):
+        total = self.db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM responses'
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self.db.execute(
+            'SELECT key, size FROM responses ORDER BY last_used ASC'
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self.db.executemany('DELETE FROM responses WHERE key = ?', evicted)
+
+    def size(self) -> int:
+        with self.lock:
+            return self.db.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM responses'
+            ).fetchone()[0]
+
+    def close(self):
+        self.db.close()
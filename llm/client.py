@@ -0,0 +1,94 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import json
+import socket
+import itertools
+
+from typing import Any, Callable, Dict, Optional
+
+from profiling.spans import span
+
+
+DEFAULT_SOCKET_PATH = '/tmp/gnuradio_llm.sock'
+
+
+class RemoteModelEngine:
+    """
+    Client for an InferenceServer with the ModelEngine generation API.
+
+    It also provides is_ready() and get() like BackgroundModelEngine, so
+    callers can use either interchangeably.
+    """
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH):
+        self.socket_path = socket_path
+        self.ids = itertools.count()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.stream = self.sock.makefile('rwb')
+
+    def is_ready(self) -> bool:
+        return True
+
+    def get(self, timeout: Optional[float] = None):
+        return self
+
+    def _exchange(self, request: Dict[str, Any],
+                  on_text: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Send a request and return its final message.
+        """
+        request['id'] = next(self.ids)
+        with span('llm.remote'):
+            self.stream.write(json.dumps(request).encode('utf-8') + b'\n')
+            self.stream.flush()
+
+            while True:
+                line = self.stream.readline()
+                if not line:
+                    raise ConnectionError('Inference server closed the connection')
+                msg = json.loads(line)
+                if msg['type'] == 'token' and on_text:
+                    on_text(msg['text'])
+                elif msg['type'] in ('done', 'info'):
+                    return msg
+                elif msg['type'] == 'error':
+                    raise RuntimeError(msg['err'])
+
+    def _request(self, request: Dict[str, Any],
+                 on_text: Optional[Callable[[str], None]] = None) -> str:
+        return self._exchange(request, on_text)['response']
+
+    def info(self) -> Dict[str, Any]:
+        """
+        The model served, its fingerprint and its context settings.
+        """
+        return self._exchange({'type': 'info'})
+
+    def generate(self,
+                 user_prompt: str,
+                 flowgraph_json: Optional[str] = None,
+                 max_tokens: int = 2048,
+                 on_text: Optional[Callable[[str], None]] = None) -> str:
+        return self._request({
+            'prompt': user_prompt,
+            'context': flowgraph_json,
+            'max_tokens': max_tokens,
+        }, on_text)
+
+    def retry_with_feedback(self,
+                            user_prompt: str,
+                            feedback: str,
+                            flowgraph_json: Optional[str] = None,
+                            max_tokens: int = 2048) -> str:
+        return self._request({
+            'prompt': user_prompt,
+            'feedback': feedback,
+            'context': flowgraph_json,
+            'max_tokens': max_tokens,
+        })
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
@@ -22,7 +22,9 @@ def decode_completion(completion_json: str) -> str:
 
 
 def load_dataset_jsonl(dataset_dir: str) -> Iterator[Dict[str, Any]]:
-    for filename in os.listdir(dataset_dir):
+    # Sorted so that the sample order, and therefore the position restored
+    # when resuming training from a checkpoint, is stable across runs.
+    for filename in sorted(os.listdir(dataset_dir)):
         if not filename.endswith('.jsonl'):
             continue
         path = os.path.join(dataset_dir, filename)
@@ -0,0 +1,157 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import os
+import socket
+import tempfile
+import multiprocessing as mp
+
+from typing import Any, Dict, List, Optional
+
+import torch
+
+from llm.tune import ModelTrainer
+
+
+def partition_cores(num_procs: int,
+                    cores: Optional[List[int]] = None) -> List[List[int]]:
+    """
+    Split the available cores into num_procs contiguous, disjoint subsets.
+    """
+    if cores is None:
+        cores = sorted(os.sched_getaffinity(0))
+    if num_procs < 1:
+        raise ValueError('Number of processes must be at least 1')
+    if num_procs > len(cores):
+        raise ValueError(f'Cannot run {num_procs} processes on {len(cores)} cores')
+
+    size, extra = divmod(len(cores), num_procs)
+    subsets = []
+    start = 0
+    for rank in range(num_procs):
+        end = start + size + (1 if rank < extra else 0)
+        subsets.append(cores[start:end])
+        start = end
+    return subsets
+
+
+def accumulation_per_process(accumulation: int, num_procs: int) -> int:
+    """
+    Gradient accumulation steps per process that come closest to the
+    single-process effective batch. The batch is only kept exactly when
+    num_procs divides the accumulation.
+    """
+    return max(1, round(accumulation / num_procs))
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _train_worker(rank: int,
+                  world_size: int,
+                  cores: List[int],
+                  port: int,
+                  trainer_kwargs: Dict[str, Any],
+                  train_kwargs: Dict[str, Any],
+                  results: Any):
+    os.sched_setaffinity(0, cores)
+    os.environ.update({
+        'MASTER_ADDR': '127.0.0.1',
+        'MASTER_PORT': str(port),
+        'RANK': str(rank),
+        'LOCAL_RANK': str(rank),
+        'WORLD_SIZE': str(world_size),
+        'LOCAL_WORLD_SIZE': str(world_size),
+        'OMP_NUM_THREADS': str(len(cores)),
+    })
+
+    # One intra-op thread per pinned core, no oversubscription across ranks
+    torch.set_num_threads(len(cores))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    trainer = ModelTrainer(**trainer_kwargs)
+    metrics = trainer.train(ddp_backend='gloo', **train_kwargs)
+    if rank == 0:
+        results.put(metrics)
+
+
+def train_distributed(num_procs: int,
+                      trainer_kwargs: Dict[str, Any],
+                      train_kwargs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Run CPU data parallel training with DDP over gloo across local processes.
+
+    Every process is pinned to its own subset of cores and the gradient
+    accumulation is divided between processes. The effective batch size
+    matches the single-process run when num_procs divides the accumulation
+    and is the nearest multiple of num_procs otherwise; the metrics report
+    it as effective_batch_size.
+    """
+    train_kwargs = dict(train_kwargs or {})
+    accumulation = train_kwargs.pop('gradient_accumulation_steps', 8)
+    steps = accumulation_per_process(accumulation, num_procs)
+    train_kwargs['gradient_accumulation_steps'] = steps
+
+    ctx = mp.get_context('spawn')
+    results = ctx.Queue()
+    port = _free_port()
+
+    processes = []
+    for rank, cores in enumerate(partition_cores(num_procs)):
+        process = ctx.Process(
+            target=_train_worker,
+            args=(rank, num_procs, cores, port, trainer_kwargs, train_kwargs, results)
+        )
+        process.start()
+        processes.append(process)
+
+    for process in processes:
+        process.join()
+
+    failed = [p.exitcode for p in processes if p.exitcode != 0]
+    if failed:
+        raise RuntimeError(f'Distributed training failed with exit codes: {failed}')
+
+    metrics = results.get(timeout=5)
+    # One sample per device and step
+    metrics['effective_batch_size'] = steps * num_procs
+    return metrics
+
+
+def scaling_benchmark(max_procs: int,
+                      trainer_kwargs: Dict[str, Any],
+                      max_steps: int = 10) -> List[Dict[str, float]]:
+    """
+    Measure training throughput for 1..max_procs processes.
+
+    Efficiency is the throughput at N processes divided by N times the
+    single-process throughput.
+    """
+    report = []
+    baseline = None
+    for num_procs in range(1, max_procs + 1):
+        with tempfile.TemporaryDirectory() as output_dir:
+            kwargs = dict(trainer_kwargs, output_dir=output_dir)
+            metrics = train_distributed(
+                num_procs,
+                kwargs,
+                {'max_steps': max_steps, 'save_steps': max_steps + 1}
+            )
+
+        throughput = metrics['train_samples_per_second']
+        if baseline is None:
+            baseline = throughput
+        report.append({
+            'procs': num_procs,
+            'samples_per_second': throughput,
+            'speedup': throughput / baseline,
+            'efficiency': throughput / (num_procs * baseline),
+        })
+    return report
@@ -0,0 +1,142 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import os
+import json
+import struct
+
+from pathlib import Path
+from typing import Dict
+
+import torch
+
+from accelerate import init_empty_weights
+from peft import AutoPeftModelForCausalLM
+from transformers import AutoConfig, AutoModelForCausalLM, AutoTokenizer
+
+from llm.prompts import ContextSerializer
+
+
+EXPORT_MANIFEST = 'gnuradio_llm_export.json'
+EXPORT_WEIGHTS = 'model.safetensors'
+
+EXPORT_DTYPES = {
+    'fp32': torch.float32,
+    'fp16': torch.float16,
+    'bf16': torch.bfloat16,
+}
+
+SAFETENSORS_DTYPES = {
+    'F64': torch.float64,
+    'F32': torch.float32,
+    'F16': torch.float16,
+    'BF16': torch.bfloat16,
+    'I64': torch.int64,
+    'I32': torch.int32,
+    'I16': torch.int16,
+    'I8': torch.int8,
+    'U8': torch.uint8,
+    'BOOL': torch.bool,
+}
+
+
+def is_exported_model(model_dir: str) -> bool:
+    """
+    Check whether a directory holds a merged model written by export_merged_model.
+    """
+    return os.path.isfile(os.path.join(model_dir, EXPORT_MANIFEST))
+
+
+def export_merged_model(adapter_dir: str, export_dir: str, dtype: str = 'bf16') -> Path:
+    """
+    Merge the LoRA adapter in adapter_dir into its base model and save the
+    result as a single safetensors file, along with config and tokenizer.
+    """
+    torch_dtype = EXPORT_DTYPES[dtype]
+    model = AutoPeftModelForCausalLM.from_pretrained(
+        adapter_dir,
+        device_map='cpu',
+        torch_dtype=torch_dtype,
+        low_cpu_mem_usage=True
+    )
+    model = model.merge_and_unload()
+
+    export_path = Path(export_dir)
+    export_path.mkdir(parents=True, exist_ok=True)
+
+    # A shard size larger than any model keeps the weights in one file,
+    # which is what the mmap loader below expects.
+    model.save_pretrained(
+        export_path,
+        safe_serialization=True,
+        max_shard_size='1000GB'
+    )
+
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(adapter_dir)
+    except (OSError, ValueError):
+        tokenizer = AutoTokenizer.from_pretrained(model.config._name_or_path)
+    tokenizer.save_pretrained(export_path)
+    ContextSerializer.load(adapter_dir).save(export_path)
+
+    with open(export_path / EXPORT_MANIFEST, 'w') as fp:
+        json.dump({
+            'format': 1,
+            'dtype': dtype,
+            'weights': EXPORT_WEIGHTS,
+            'source': str(adapter_dir),
+        }, fp, indent=4)
+    return export_path
+
+
+def load_safetensors_mmap(path: str) -> Dict[str, torch.Tensor]:
+    """
+    Map a safetensors file into memory and return tensors viewing into it.
+
+    Unlike safetensors.torch.load_file nothing is copied; pages are read
+    from disk the first time a tensor is touched.
+    """
+    with open(path, 'rb') as fp:
+        header_size = struct.unpack('<Q', fp.read(8))[0]
+        header = json.loads(fp.read(header_size))
+    header.pop('__metadata__', None)
+
+    nbytes = os.path.getsize(path)
+    storage = torch.UntypedStorage.from_file(str(path), shared=False, nbytes=nbytes)
+    buffer = torch.empty(0, dtype=torch.uint8).set_(storage, 0, (nbytes,))
+    data_start = 8 + header_size
+
+    tensors = {}
+    for name, info in header.items():
+        dtype = SAFETENSORS_DTYPES[info['dtype']]
+        begin, end = info['data_offsets']
+        raw = buffer[data_start + begin:data_start + end]
+        if raw.storage_offset() % torch.empty(0, dtype=dtype).element_size():
+            raw = raw.clone()
+        tensors[name] = raw.view(dtype).view(info['shape'])
+    return tensors
+
+
+def load_exported_model(model_dir: str):
+    """
+    Build the model skeleton without allocating weights and attach the
+    memory-mapped tensors from the exported safetensors file.
+    """
+    with open(os.path.join(model_dir, EXPORT_MANIFEST), 'r') as fp:
+        manifest = json.load(fp)
+
+    config = AutoConfig.from_pretrained(model_dir)
+    with init_empty_weights(include_buffers=False):
+        model = AutoModelForCausalLM.from_config(
+            config, torch_dtype=EXPORT_DTYPES[manifest['dtype']]
+        )
+
+    state_dict = load_safetensors_mmap(os.path.join(model_dir, manifest['weights']))
+    model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+
+    missing = [name for name, param in model.named_parameters() if param.is_meta]
+    if missing:
+        raise RuntimeError(f'Exported model is missing weights: {missing[:5]}')
+    return model
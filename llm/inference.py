@@ -3,24 +3,139 @@
 #
 
 import os
+import shutil
 import torch
+import transformers
 
-from typing import Optional
+from typing import List, Optional
 from pathlib import Path
 
-from llm.prompts import build_prompt
-from llm.utils import extract_json_from_text
+from llm.export import is_exported_model, load_exported_model
+from llm.prompts import ContextSerializer, build_prompt, build_retry_prompt
+from llm.speculative import prompt_lookup_generate
+from llm.utils import extract_response, model_fingerprint
+from profiling.spans import span
 
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers import AutoConfig, AutoTokenizer, AutoModelForCausalLM, GenerationConfig
+from transformers.modeling_utils import no_init_weights
 from transformers.utils.quantization_config import BitsAndBytesConfig
 
 
+CPU_MODES = ('fp32', 'bf16', 'int8')
+
+SPECULATIVE_MODES = ('prompt_lookup', 'draft')
+
+CANDIDATE_MODES = ('sample', 'beam')
+
+CONVERTED_CACHE_DIR = Path.home() / '.cache' / 'gnuradio_llm_converted'
+
+
 class ModelEngine:
     def __init__(self,
-                 model_name: str = 'Qwen/Qwen2.5-Coder-1.5B-Instruct'):
+                 model_name: str = 'Qwen/Qwen2.5-Coder-1.5B-Instruct',
+                 cpu_mode: str = 'fp32',
+                 speculative: Optional[str] = None,
+                 draft_model_name: Optional[str] = None,
+                 context_serializer: Optional[ContextSerializer] = None):
+        if cpu_mode not in CPU_MODES:
+            raise ValueError(f'Unknown CPU mode: {cpu_mode}')
+        if speculative is not None and speculative not in SPECULATIVE_MODES:
+            raise ValueError(f'Unknown speculative mode: {speculative}')
+        if speculative == 'draft' and not draft_model_name:
+            raise ValueError('Draft speculative decoding requires a draft model')
         self.model_name = model_name
+        self.cpu_mode = cpu_mode
+        self.speculative = speculative
+        self.draft_model_name = draft_model_name
+        self.draft_model = None
+        self.speculative_stats = None
+
+        # Default to the context settings the model was trained with
+        self.context_serializer = context_serializer or ContextSerializer.load(model_name)
         self._load_model()
 
+    def _converted_cache_path(self) -> Path:
+        # Quantized weight layouts are not stable across library releases
+        fingerprint = model_fingerprint(self.model_name)
+        versions = f'torch{torch.__version__}-transformers{transformers.__version__}'
+        return CONVERTED_CACHE_DIR / f'{fingerprint}-{self.cpu_mode}-{versions}'
+
+    def _convert(self, model):
+        if self.cpu_mode == 'int8':
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        return model
+
+    def _load_converted(self, cache_path: Path):
+        """
+        Rebuild a converted model from its config and cached weights.
+
+        The weights are a plain state dict, so they are loaded without
+        unpickling arbitrary objects and memory-mapped.
+        """
+        dtype = torch.bfloat16 if self.cpu_mode == 'bf16' else torch.float32
+        config = AutoConfig.from_pretrained(self.model_name)
+        with no_init_weights():
+            model = AutoModelForCausalLM.from_config(config, torch_dtype=dtype)
+        model = self._convert(model)
+
+        state_dict = torch.load(cache_path / 'weights.pt', weights_only=True, mmap=True)
+        model.load_state_dict(state_dict, strict=True, assign=True)
+        model.tie_weights()
+        model.generation_config = GenerationConfig.from_pretrained(cache_path)
+        return model
+
+    def _save_converted(self, model, cache_path: Path):
+        tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+        model.generation_config.save_pretrained(tmp_path)
+        torch.save(model.state_dict(), tmp_path / 'weights.pt')
+        shutil.rmtree(cache_path, ignore_errors=True)
+        os.replace(tmp_path, cache_path)
+
+    def _load_cpu_model(self, offload_dir: Path):
+        """
+        Load the model for CPU inference in the requested precision.
+
+        bf16 and int8 models are converted once and their weights cached
+        locally, so later startups skip the fp32 load and the conversion.
+        Models with unmerged adapters are converted on every load. Merged
+        exports are memory-mapped in the precision they were exported
+        with, unless int8 is requested.
+        """
+        if is_exported_model(self.model_name) and self.cpu_mode != 'int8':
+            return load_exported_model(self.model_name)
+
+        if self.cpu_mode == 'fp32':
+            return AutoModelForCausalLM.from_pretrained(
+                self.model_name,
+                device_map='cpu',
+                offload_folder=str(offload_dir),
+                torch_dtype=torch.float32,
+                low_cpu_mem_usage=True
+            )
+
+        cache_path = self._converted_cache_path()
+        if cache_path.exists():
+            return self._load_converted(cache_path)
+
+        dtype = torch.bfloat16 if self.cpu_mode == 'bf16' else torch.float32
+        model = AutoModelForCausalLM.from_pretrained(
+            self.model_name,
+            device_map='cpu',
+            torch_dtype=dtype,
+            low_cpu_mem_usage=True
+        )
+        # Adapter layers are not part of the model rebuilt from its config
+        cacheable = not getattr(model, '_hf_peft_config_loaded', False)
+        model = self._convert(model)
+
+        if cacheable:
+            self._save_converted(model, cache_path)
+        return model
+
     def _load_model(self):
         if torch.cuda.is_available():
             self.tokenizer = AutoTokenizer.from_pretrained(
@@ -45,13 +160,7 @@ class ModelEngine:
                 self.model_name,
                 use_fast=True
             )
-            self.model = AutoModelForCausalLM.from_pretrained(
-                self.model_name,
-                device_map='cpu',
-                offload_folder=str(offload_dir),
-                torch_dtype=torch.float32,
-                low_cpu_mem_usage=True
-            )
+            self.model = self._load_cpu_model(offload_dir)
 
         if self.tokenizer.pad_token_id is None:
             self.tokenizer.pad_token = self.tokenizer.eos_token or '</s>'
@@ -61,20 +170,16 @@ class ModelEngine:
         self.model.config.use_cache = True
         self.model.eval()
 
-    def generate(self,
-                 user_prompt: str,
-                 flowgraph_json: Optional[str] = None,
-                 max_tokens: int = 2048) -> str:
-        prompt = build_prompt(
-            tokenizer=self.tokenizer,
-            user_prompt=user_prompt,
-            context_json=flowgraph_json
-        )
-        inputs = self.tokenizer(
-            prompt,
-            return_tensors='pt'
-        ).to(self.model.device)
+        if self.speculative == 'draft':
+            self.draft_model = AutoModelForCausalLM.from_pretrained(
+                self.draft_model_name,
+                device_map=self.model.device,
+                torch_dtype=self.model.dtype,
+                low_cpu_mem_usage=True
+            )
+            self.draft_model.eval()
 
+    def _eos_token_ids(self) -> List[int]:
         eos_ids = {self.tokenizer.eos_token_id}
         eos_candidates = (
             '<|im_end|>', '</s>', '<|end|>', '<|eot_id|>', '<|endoftext|>'
@@ -83,14 +188,38 @@ class ModelEngine:
             tid = self.tokenizer.convert_tokens_to_ids(token)
             if isinstance(tid, int) and tid >= 0:
                 eos_ids.add(tid)
+        return list(eos_ids)
+
+    def warm_up(self):
+        """
+        Run one short forward pass so the first real request does not pay
+        for page faults on mapped weights and lazy kernel initialization.
+        """
+        prompt = build_prompt(tokenizer=self.tokenizer, user_prompt='start')
+        inputs = self.tokenizer(prompt, return_tensors='pt').to(self.model.device)
+        with torch.inference_mode():
+            self.model(**inputs)
 
-        output = self.model.generate(
+    def _generate_ids(self,
+                      inputs,
+                      max_tokens: int,
+                      eos_ids: List[int]) -> torch.Tensor:
+        if self.speculative == 'prompt_lookup':
+            output, self.speculative_stats = prompt_lookup_generate(
+                self.model,
+                inputs['input_ids'],
+                max_new_tokens=max_tokens,
+                eos_token_ids=eos_ids
+            )
+            return output
+        return self.model.generate(
             **inputs,
+            assistant_model=self.draft_model,
             max_new_tokens=max_tokens,
             do_sample=False,
             num_beams=1,
             early_stopping=False,
-            eos_token_id=list(eos_ids),
+            eos_token_id=eos_ids,
             pad_token_id=self.tokenizer.pad_token_id,
             use_cache=True,
             return_dict_in_generate=False,
@@ -99,22 +228,121 @@ class ModelEngine:
             top_p=1.0,
             top_k=None
         )
-        decoded = self.tokenizer.decode(output[0], skip_special_tokens=True)
-        results = extract_json_from_text(decoded)
-        return results[-1] if results else ''
+
+    def generate(self,
+                 user_prompt: str,
+                 flowgraph_json: Optional[str] = None,
+                 max_tokens: int = 2048,
+                 max_continuations: int = 1) -> str:
+        """
+        Generate a response and return its JSON object.
+
+        A response cut off at max_tokens is continued from where it
+        stopped, up to max_continuations times, and a malformed one is
+        repaired locally before giving up on it.
+        """
+        with span('llm.tokenize'):
+            prompt = build_prompt(
+                tokenizer=self.tokenizer,
+                user_prompt=user_prompt,
+                context_json=flowgraph_json,
+                serializer=self.context_serializer
+            )
+            inputs = self.tokenizer(
+                prompt,
+                return_tensors='pt'
+            ).to(self.model.device)
+        prompt_length = inputs['input_ids'].shape[1]
+
+        eos_ids = self._eos_token_ids()
+
+        for _ in range(max_continuations + 1):
+            input_length = inputs['input_ids'].shape[1]
+            with span('llm.generate'):
+                output = self._generate_ids(inputs, max_tokens, eos_ids)
+            truncated = (output.shape[1] - input_length >= max_tokens
+                         and output[0, -1].item() not in eos_ids)
+            if not truncated:
+                break
+            inputs = {'input_ids': output, 'attention_mask': torch.ones_like(output)}
+
+        with span('llm.decode'):
+            completion = self.tokenizer.decode(output[0, prompt_length:], skip_special_tokens=True)
+        with span('llm.extract_json'):
+            response = extract_response(completion)
+        return self.context_serializer.restore_omitted(
+            response, flowgraph_json, user_prompt, self.tokenizer
+        )
+
+    def generate_candidates(self,
+                            user_prompt: str,
+                            flowgraph_json: Optional[str] = None,
+                            num_candidates: int = 4,
+                            mode: str = 'sample',
+                            max_tokens: int = 2048) -> List[str]:
+        """
+        Generate several responses to the same prompt in one batched call,
+        either by sampling or with diverse beam search.
+
+        Returns the distinct JSON responses in the order they were produced.
+        """
+        if mode not in CANDIDATE_MODES:
+            raise ValueError(f'Unknown candidate mode: {mode}')
+
+        with span('llm.tokenize'):
+            prompt = build_prompt(
+                tokenizer=self.tokenizer,
+                user_prompt=user_prompt,
+                context_json=flowgraph_json,
+                serializer=self.context_serializer
+            )
+            inputs = self.tokenizer(
+                prompt,
+                return_tensors='pt'
+            ).to(self.model.device)
+
+        if mode == 'sample':
+            search = {'do_sample': True, 'temperature': 0.7, 'top_p': 0.95, 'num_beams': 1}
+        else:
+            search = {
+                'do_sample': False,
+                'num_beams': num_candidates,
+                'num_beam_groups': num_candidates,
+                'diversity_penalty': 1.0
+            }
+
+        with span('llm.generate'):
+            output = self.model.generate(
+                **inputs,
+                **search,
+                max_new_tokens=max_tokens,
+                num_return_sequences=num_candidates,
+                eos_token_id=self._eos_token_ids(),
+                pad_token_id=self.tokenizer.pad_token_id,
+                use_cache=True
+            )
+        with span('llm.decode'):
+            decoded = self.tokenizer.batch_decode(
+                output[:, inputs['input_ids'].shape[1]:], skip_special_tokens=True
+            )
+
+        candidates = []
+        with span('llm.extract_json'):
+            for text in decoded:
+                response = self.context_serializer.restore_omitted(
+                    extract_response(text), flowgraph_json, user_prompt, self.tokenizer
+                )
+                if response and response not in candidates:
+                    candidates.append(response)
+        return candidates
 
     def retry_with_feedback(self,
                             user_prompt: str,
                             feedback: str,
                             flowgraph_json: Optional[str] = None,
                             max_tokens: int = 2048) -> str:
-        retry_prompt = (
-            f'The previous attempt failed with the following feedback:\n{feedback}\n'
-            f'Please try again and correct the error.\n\n'
-            f'Original prompt: {user_prompt}\n\n'
-        )
         return self.generate(
-            retry_prompt,
+            build_retry_prompt(user_prompt, feedback),
             flowgraph_json=flowgraph_json,
             max_tokens=max_tokens
         )
@@ -2,7 +2,12 @@
 # This file is part of the GNU Radio LLM project.
 #
 
-from typing import Optional
+import os
+import re
+import json
+
+from collections import deque
+from typing import Any, Dict, Optional, Set
 
 
 SYSTEM_PROMPT_PREFIX = '''
@@ -16,16 +21,198 @@ def get_system_prompt() -> str:
     return system_prompt
 
 
+def build_retry_prompt(user_prompt: str, feedback: str) -> str:
+    """
+    Wrap a user prompt with the feedback from a failed attempt.
+    """
+    return (
+        f'The previous attempt failed with the following feedback:\n{feedback}\n'
+        f'Please try again and correct the error.\n\n'
+        f'Original prompt: {user_prompt}\n\n'
+    )
+
+
+def _block_name(block: Dict[str, Any]) -> str:
+    return block.get('name') or block.get('id')
+
+
+class ContextSerializer:
+    """
+    Compact and deterministic serialization of the flowgraph context.
+
+    The context is dumped with sorted keys and minimal separators. With
+    pruning enabled, blocks that are not connected to any block named in
+    the user prompt are left out; variables are always kept since other
+    blocks refer to them in expressions. With a token budget, states and
+    metadata are dropped first, then the blocks furthest from the named
+    ones, until the context fits.
+    """
+    CONFIG_NAME = 'context_serializer.json'
+
+    def __init__(self, max_tokens: Optional[int] = None, prune: bool = False):
+        self.max_tokens = max_tokens
+        self.prune = prune
+
+    def settings(self) -> Dict[str, Any]:
+        return {'max_tokens': self.max_tokens, 'prune': self.prune}
+
+    def save(self, model_dir: str):
+        """
+        Store the settings next to a trained model, so inference picks them up.
+        """
+        with open(os.path.join(model_dir, self.CONFIG_NAME), 'w') as fp:
+            json.dump(self.settings(), fp)
+
+    @classmethod
+    def load(cls, model_dir: str) -> 'ContextSerializer':
+        """
+        Load the settings a model was trained with, or the defaults.
+        """
+        path = os.path.join(model_dir, cls.CONFIG_NAME)
+        if not os.path.isfile(path):
+            return cls()
+        with open(path, 'r') as fp:
+            return cls(**json.load(fp))
+
+    @staticmethod
+    def _dumps(data: Any) -> str:
+        return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+    @staticmethod
+    def _distances(data: Dict[str, Any], mentioned: Set[str]) -> Dict[str, float]:
+        """
+        Hops from each block to the nearest block named in the prompt.
+        """
+        blocks = {_block_name(b): b for b in data['blocks']}
+        neighbours = {name: set() for name in blocks}
+        for conn in data.get('connections', []):
+            if len(conn) == 4 and conn[0] in neighbours and conn[2] in neighbours:
+                neighbours[conn[0]].add(conn[2])
+                neighbours[conn[2]].add(conn[0])
+
+        distances = {name: 0 for name in mentioned}
+        queue = deque(mentioned)
+        while queue:
+            name = queue.popleft()
+            for other in neighbours[name]:
+                if other not in distances:
+                    distances[other] = distances[name] + 1
+                    queue.append(other)
+
+        for name, block in blocks.items():
+            if str(block.get('id', '')).startswith('variable'):
+                distances[name] = 0
+        return {name: distances.get(name, float('inf')) for name in blocks}
+
+    @staticmethod
+    def _keep_blocks(data: Dict[str, Any], keep: Set[str]) -> Dict[str, Any]:
+        return {
+            **data,
+            'blocks': [b for b in data['blocks'] if _block_name(b) in keep],
+            'connections': [
+                c for c in data.get('connections', [])
+                if len(c) == 4 and c[0] in keep and c[2] in keep
+            ],
+        }
+
+    def serialize(self, context_json: str, user_prompt: str = '', tokenizer=None) -> str:
+        try:
+            data = json.loads(context_json)
+        except json.JSONDecodeError:
+            return context_json
+        if not isinstance(data, dict) or not isinstance(data.get('blocks'), list):
+            return self._dumps(data)
+
+        words = set(re.findall(r'[A-Za-z0-9_]+', user_prompt))
+        mentioned = {_block_name(b) for b in data['blocks']} & words
+        distances = self._distances(data, mentioned)
+
+        if self.prune and mentioned:
+            reachable = {name for name, d in distances.items() if d != float('inf')}
+            data = self._keep_blocks(data, reachable)
+
+        text = self._dumps(data)
+        if self.max_tokens is None or tokenizer is None:
+            return text
+
+        def fits(text: str) -> bool:
+            return len(tokenizer(text)['input_ids']) <= self.max_tokens
+
+        if fits(text):
+            return text
+
+        data = {k: v for k, v in data.items() if k != 'metadata'}
+        data['blocks'] = [{k: v for k, v in b.items() if k != 'states'} for b in data['blocks']]
+        text = self._dumps(data)
+
+        # Drop the furthest blocks first, keeping the original order on ties
+        order = sorted(
+            (_block_name(b) for b in data['blocks']),
+            key=lambda name: distances[name]
+        )
+        while order and not fits(text):
+            order.pop()
+            text = self._dumps(self._keep_blocks(data, set(order)))
+        return text
+
+    def restore_omitted(self, response_json: str, context_json: str,
+                        user_prompt: str = '', tokenizer=None) -> str:
+        """
+        Add the blocks left out of the context back into a full flowgraph
+        response, with their connections, so replacing the current
+        flowgraph with it does not delete blocks the model never saw.
+
+        Blocks that were shown to the model and are missing from the
+        response stay deleted. Patches and actions are returned unchanged.
+        """
+        if not self.prune and self.max_tokens is None:
+            return response_json
+        try:
+            response = json.loads(response_json)
+            context = json.loads(context_json)
+            shown = json.loads(self.serialize(context_json, user_prompt, tokenizer))
+        except (TypeError, json.JSONDecodeError):
+            return response_json
+        if not all(isinstance(d, dict) and isinstance(d.get('blocks'), list)
+                   for d in (response, context, shown)):
+            return response_json
+
+        names = {_block_name(b) for b in response['blocks']}
+        omitted = {_block_name(b) for b in context['blocks']} - names - {
+            _block_name(b) for b in shown['blocks']
+        }
+        if not omitted:
+            return response_json
+
+        response['blocks'] += [b for b in context['blocks'] if _block_name(b) in omitted]
+        names |= omitted
+        connections = response.setdefault('connections', [])
+        connections += [
+            c for c in context.get('connections', [])
+            if len(c) == 4 and (c[0] in omitted or c[2] in omitted)
+            and c[0] in names and c[2] in names and c not in connections
+        ]
+        return json.dumps(response, ensure_ascii=False)
+
+
 def build_prompt(tokenizer,
                  user_prompt: str,
                  context_json: Optional[str] = None,
-                 completion_json: Optional[str] = None) -> str:
+                 completion_json: Optional[str] = None,
+                 serializer: Optional[ContextSerializer] = None) -> str:
     """
     Build a consistent prompt for inference.
+
+    Training and inference must pass the same serializer, otherwise the
+    context format seen at inference does not match the training data.
+    Without one, the context is embedded verbatim.
     """
     system_prompt = get_system_prompt()
     messages = []
 
+    if context_json and serializer is not None:
+        context_json = serializer.serialize(context_json, user_prompt, tokenizer)
+
     if context_json:
         system_prompt += f'Here is the current flowgraph:\n{context_json}\n\n'
 
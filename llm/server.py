@@ -0,0 +1,334 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import os
+import json
+import queue
+import asyncio
+import threading
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+import torch
+
+from transformers import DynamicCache
+
+from llm.client import DEFAULT_SOCKET_PATH
+from llm.prompts import build_prompt, build_retry_prompt
+from llm.utils import extract_response, model_fingerprint
+
+
+@dataclass
+class GenerationRequest:
+    prompt_ids: List[int]
+    max_tokens: int
+    emit: Callable[[Dict[str, Any]], None]
+    generated: List[int] = field(default_factory=list)
+    sent_length: int = 0
+
+
+class BatchScheduler:
+    """
+    Greedy decoding with continuous batching over a shared KV cache.
+
+    New requests are prefilled and merged into the running batch between
+    decode steps, and finished requests leave the batch immediately, so a
+    long generation never holds up a short one. Sequences are left-padded
+    inside the cache and masked out through the attention mask.
+    """
+    def __init__(self, engine, max_batch_size: int = 8):
+        self.engine = engine
+        self.model = engine.model
+        self.tokenizer = engine.tokenizer
+        self.tokenizer.padding_side = 'left'
+        self.eos_ids = set(engine._eos_token_ids())
+        self.max_batch_size = max_batch_size
+        self.device = self.model.device
+
+        self.pending = queue.Queue()
+        self.active: List[GenerationRequest] = []
+        self.cache = None
+        self.attention_mask = None
+        self.positions = None
+        self.last_tokens = None
+
+        self.thread = threading.Thread(target=self._run, name='batch-scheduler', daemon=True)
+        self.thread.start()
+
+    def submit(self, request: GenerationRequest):
+        self.pending.put(request)
+
+    def _run(self):
+        while True:
+            if not self.active:
+                # Nothing to decode, block until work arrives
+                self._try_admit([self.pending.get()])
+
+            admitted = []
+            while len(self.active) + len(admitted) < self.max_batch_size:
+                try:
+                    admitted.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            if admitted:
+                self._try_admit(admitted)
+
+            if self.active:
+                try:
+                    self._step()
+                except Exception as e:
+                    # Every sequence shares the failed decode step
+                    self._fail(list(self.active), e)
+
+    def _try_admit(self, requests: List[GenerationRequest]):
+        try:
+            self._admit(requests)
+        except Exception as e:
+            self._fail(requests, e)
+
+    def _fail(self, requests: List[GenerationRequest], error: Exception):
+        """
+        Report an error to the requests and drop them from the batch, so
+        the scheduler keeps serving the others.
+        """
+        for request in requests:
+            try:
+                request.emit({'type': 'error', 'err': str(error)})
+            except Exception:
+                pass
+
+        failed = {id(r) for r in requests}
+        if any(id(r) in failed for r in self.active):
+            self._evict(failed)
+
+    @torch.inference_mode()
+    def _admit(self, requests: List[GenerationRequest]):
+        length = max(len(r.prompt_ids) for r in requests)
+        pad_id = self.tokenizer.pad_token_id
+        input_ids = torch.tensor(
+            [[pad_id] * (length - len(r.prompt_ids)) + r.prompt_ids for r in requests],
+            device=self.device
+        )
+        attention_mask = torch.tensor(
+            [[0] * (length - len(r.prompt_ids)) + [1] * len(r.prompt_ids) for r in requests],
+            device=self.device
+        )
+        positions = (attention_mask.cumsum(-1) - 1).clamp(min=0)
+
+        outputs = self.model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            position_ids=positions,
+            past_key_values=DynamicCache(),
+            use_cache=True
+        )
+        cache = outputs.past_key_values.to_legacy_cache()
+        next_tokens = outputs.logits[:, -1].argmax(dim=-1)
+        next_positions = positions[:, -1] + 1
+
+        if self.active:
+            cache, attention_mask = self._merge(cache, attention_mask)
+            next_tokens = torch.cat([self.last_tokens, next_tokens])
+            next_positions = torch.cat([self.positions, next_positions])
+
+        # The batch state only changes once the prefill has succeeded
+        self.active = self.active + list(requests)
+        self.cache = cache
+        self.attention_mask = attention_mask
+        self.positions = next_positions
+        self.last_tokens = next_tokens
+        self._collect(next_tokens[-len(requests):], requests)
+
+    def _merge(self, cache: tuple, attention_mask: torch.Tensor):
+        """
+        Left-pad the running and the newly prefilled caches to a common
+        length and stack them along the batch dimension.
+        """
+        old_length = self.attention_mask.shape[1]
+        new_length = attention_mask.shape[1]
+        length = max(old_length, new_length)
+
+        def pad(tensor: torch.Tensor, dim: int, amount: int) -> torch.Tensor:
+            if amount == 0:
+                return tensor
+            shape = list(tensor.shape)
+            shape[dim] = amount
+            return torch.cat([tensor.new_zeros(shape), tensor], dim=dim)
+
+        merged = tuple(
+            (torch.cat([pad(k0, 2, length - old_length), pad(k1, 2, length - new_length)]),
+             torch.cat([pad(v0, 2, length - old_length), pad(v1, 2, length - new_length)]))
+            for (k0, v0), (k1, v1) in zip(self.cache, cache)
+        )
+        mask = torch.cat([
+            pad(self.attention_mask, 1, length - old_length),
+            pad(attention_mask, 1, length - new_length)
+        ])
+        return merged, mask
+
+    @torch.inference_mode()
+    def _step(self):
+        attention_mask = torch.cat([
+            self.attention_mask,
+            self.attention_mask.new_ones((len(self.active), 1))
+        ], dim=1)
+        outputs = self.model(
+            input_ids=self.last_tokens[:, None],
+            attention_mask=attention_mask,
+            position_ids=self.positions[:, None],
+            past_key_values=DynamicCache.from_legacy_cache(self.cache),
+            use_cache=True
+        )
+        self.cache = outputs.past_key_values.to_legacy_cache()
+        self.attention_mask = attention_mask
+        self.positions = self.positions + 1
+        self.last_tokens = outputs.logits[:, -1].argmax(dim=-1)
+        self._collect(self.last_tokens, self.active)
+
+    def _collect(self, tokens: torch.Tensor, requests: List[GenerationRequest]):
+        finished = set()
+        for request, token in zip(requests, tokens.tolist()):
+            request.generated.append(token)
+            done = token in self.eos_ids or len(request.generated) >= request.max_tokens
+            self._emit_text(request, done)
+            if done:
+                finished.add(id(request))
+
+        if finished:
+            self._evict(finished)
+
+    def _emit_text(self, request: GenerationRequest, done: bool):
+        text = self.tokenizer.decode(request.generated, skip_special_tokens=True)
+        if len(text) > request.sent_length:
+            request.emit({'type': 'token', 'text': text[request.sent_length:]})
+            request.sent_length = len(text)
+
+        if done:
+            request.emit({'type': 'done', 'response': extract_response(text)})
+
+    def _evict(self, finished: set):
+        keep = [i for i, r in enumerate(self.active) if id(r) not in finished]
+        self.active = [self.active[i] for i in keep]
+        if not self.active:
+            self.cache = self.attention_mask = self.positions = self.last_tokens = None
+            return
+
+        index = torch.tensor(keep, device=self.device)
+        mask = self.attention_mask.index_select(0, index)
+
+        # Drop leading columns that are padding for every remaining sequence
+        start = int(mask.any(dim=0).nonzero()[0])
+        self.attention_mask = mask[:, start:]
+        self.cache = tuple(
+            (k.index_select(0, index)[:, :, start:], v.index_select(0, index)[:, :, start:])
+            for k, v in self.cache
+        )
+        self.positions = self.positions.index_select(0, index)
+        self.last_tokens = self.last_tokens.index_select(0, index)
+
+
+class InferenceServer:
+    """
+    Serves one ModelEngine to many clients over a Unix socket.
+
+    Requests and responses are JSON lines. Each request streams back
+    'token' messages followed by a single 'done' message. An 'info' request
+    is answered with the model served and its context settings.
+    """
+    def __init__(self, engine, socket_path: str = DEFAULT_SOCKET_PATH,
+                 max_batch_size: int = 8):
+        self.engine = engine
+        self.socket_path = socket_path
+        self.scheduler = BatchScheduler(engine, max_batch_size=max_batch_size)
+        self.info = {
+            'model': engine.model_name,
+            'fingerprint': model_fingerprint(engine.model_name),
+            'context': engine.context_serializer.settings(),
+        }
+
+    @staticmethod
+    def _user_prompt(request: Dict[str, Any]) -> str:
+        if request.get('feedback'):
+            return build_retry_prompt(request['prompt'], request['feedback'])
+        return request['prompt']
+
+    def _encode(self, request: Dict[str, Any]) -> List[int]:
+        user_prompt = self._user_prompt(request)
+        prompt = build_prompt(
+            tokenizer=self.engine.tokenizer,
+            user_prompt=user_prompt,
+            context_json=request.get('context'),
+            serializer=self.engine.context_serializer
+        )
+        return self.engine.tokenizer(prompt)['input_ids']
+
+    async def _write(self, writer: asyncio.StreamWriter, lock: asyncio.Lock,
+                     msg: Dict[str, Any]):
+        async with lock:
+            writer.write(json.dumps(msg).encode('utf-8') + b'\n')
+            await writer.drain()
+
+    async def _handle_request(self, request: Dict[str, Any],
+                              writer: asyncio.StreamWriter, lock: asyncio.Lock):
+        if request.get('type') == 'info':
+            await self._write(writer, lock, {'type': 'info', 'id': request.get('id'), **self.info})
+            return
+
+        loop = asyncio.get_running_loop()
+        messages = asyncio.Queue()
+
+        def emit(msg: Dict[str, Any]):
+            loop.call_soon_threadsafe(messages.put_nowait, msg)
+
+        try:
+            self.scheduler.submit(GenerationRequest(
+                prompt_ids=self._encode(request),
+                max_tokens=int(request.get('max_tokens', 2048)),
+                emit=emit
+            ))
+        except Exception as e:
+            emit({'type': 'error', 'err': str(e)})
+
+        while True:
+            msg = await messages.get()
+            msg['id'] = request.get('id')
+            if msg['type'] == 'done':
+                msg['response'] = self.engine.context_serializer.restore_omitted(
+                    msg['response'], request.get('context'),
+                    self._user_prompt(request), self.engine.tokenizer
+                )
+            await self._write(writer, lock, msg)
+            if msg['type'] in ('done', 'error'):
+                break
+
+    async def _handle_client(self, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter):
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError('Request must be a JSON object')
+                except ValueError as e:
+                    # Only this line is rejected, the connection stays open
+                    await self._write(writer, lock, {
+                        'type': 'error', 'id': None, 'err': f'Malformed request: {e}'
+                    })
+                    continue
+                task = asyncio.create_task(self._handle_request(request, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def serve(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        async with server:
+            await server.serve_forever()
@@ -0,0 +1,115 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import torch
+
+from dataclasses import dataclass
+from typing import Iterable, List, Tuple
+
+from transformers import DynamicCache
+
+
+@dataclass
+class SpeculativeStats:
+    forward_passes: int = 0
+    drafted_tokens: int = 0
+    accepted_tokens: int = 0
+    generated_tokens: int = 0
+
+    @property
+    def acceptance_rate(self) -> float:
+        if not self.drafted_tokens:
+            return 0.0
+        return self.accepted_tokens / self.drafted_tokens
+
+    @property
+    def tokens_per_pass(self) -> float:
+        if not self.forward_passes:
+            return 0.0
+        return self.generated_tokens / self.forward_passes
+
+
+def find_draft_tokens(tokens: List[int],
+                      max_ngram_size: int = 3,
+                      num_draft_tokens: int = 10) -> List[int]:
+    """
+    Propose draft tokens by looking up the trailing n-gram earlier in the
+    sequence and copying what followed its most recent occurrence.
+
+    Edits of an existing flowgraph mostly repeat the context JSON from the
+    system prompt, so the copied continuation is usually right.
+    """
+    length = len(tokens)
+    for ngram_size in range(min(max_ngram_size, length - 1), 0, -1):
+        ngram = tokens[length - ngram_size:]
+        first = ngram[0]
+        for start in range(length - ngram_size - 1, -1, -1):
+            if tokens[start] != first:
+                continue
+            if tokens[start:start + ngram_size] == ngram:
+                follow = start + ngram_size
+                return tokens[follow:follow + num_draft_tokens]
+    return []
+
+
+@torch.inference_mode()
+def prompt_lookup_generate(model,
+                           input_ids: torch.Tensor,
+                           max_new_tokens: int,
+                           eos_token_ids: Iterable[int],
+                           max_ngram_size: int = 3,
+                           num_draft_tokens: int = 10) -> Tuple[torch.Tensor, SpeculativeStats]:
+    """
+    Greedy decoding with prompt lookup drafts verified in a single forward pass.
+
+    The output is identical to greedy decoding: a draft token is only kept
+    when it matches the model's argmax at that position, and every pass
+    contributes one extra token from the model itself.
+    """
+    eos_ids = set(eos_token_ids)
+    stats = SpeculativeStats()
+    cache = DynamicCache()
+
+    outputs = model(input_ids=input_ids, past_key_values=cache, use_cache=True)
+    stats.forward_passes += 1
+
+    tokens = input_ids[0].tolist()
+    prompt_length = len(tokens)
+    tokens.append(int(outputs.logits[0, -1].argmax()))
+
+    while len(tokens) - prompt_length < max_new_tokens and tokens[-1] not in eos_ids:
+        remaining = max_new_tokens - (len(tokens) - prompt_length)
+        draft = find_draft_tokens(tokens, max_ngram_size, num_draft_tokens)
+        draft = draft[:remaining - 1]
+
+        # The last accepted token is not in the cache yet, so it leads the
+        # candidate sequence and its logits verify the first draft token.
+        cached = cache.get_seq_length()
+        candidate = torch.tensor([[tokens[-1]] + draft], device=input_ids.device)
+        outputs = model(input_ids=candidate, past_key_values=cache, use_cache=True)
+        stats.forward_passes += 1
+
+        predicted = outputs.logits[0].argmax(dim=-1).tolist()
+        accepted = 0
+        for token, target in zip(draft, predicted):
+            if token != target:
+                break
+            accepted += 1
+            if token in eos_ids:
+                break
+
+        stats.drafted_tokens += len(draft)
+        stats.accepted_tokens += accepted
+
+        new_tokens = draft[:accepted]
+        if not new_tokens or new_tokens[-1] not in eos_ids:
+            new_tokens.append(predicted[accepted])
+        tokens.extend(new_tokens)
+
+        # Drop the cache entries of rejected draft tokens
+        cache.crop(cached + 1 + accepted)
+
+    stats.generated_tokens = len(tokens) - prompt_length
+    output = torch.tensor([tokens], device=input_ids.device)
+    return output, stats
@@ -6,26 +6,38 @@ import os
 
 import torch
 
-from typing import Any
+from typing import Any, Optional
 
 from peft import LoraConfig, prepare_model_for_kbit_training # type: ignore
 from peft.mapping import get_peft_model
 from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers.trainer_utils import get_last_checkpoint
 from transformers.utils.quantization_config import BitsAndBytesConfig
 from trl import SFTTrainer, SFTConfig
 
-from llm.prompts import build_prompt
+from llm.prompts import ContextSerializer, build_prompt
 from llm.dataset import load_dataset
 
 
+def find_last_checkpoint(output_dir: str) -> Optional[str]:
+    """
+    Return the most recent checkpoint-* directory in output_dir, if any.
+    """
+    if not os.path.isdir(output_dir):
+        return None
+    return get_last_checkpoint(str(output_dir))
+
+
 class ModelTrainer:
     def __init__(self,
                  model_name: str = 'Qwen/Qwen2.5-Coder-1.5B-Instruct',
                  dataset_dir: str = 'dataset',
-                 output_dir: str = 'output'):
+                 output_dir: str = 'output',
+                 context_serializer: Optional[ContextSerializer] = None):
         self.model_name = model_name
         self.dataset_dir = dataset_dir
         self.output_dir = output_dir
+        self.context_serializer = context_serializer or ContextSerializer()
 
         self.model = self._load_model()
 
@@ -88,7 +100,7 @@ class ModelTrainer:
         return self._apply_lora(model)
 
     @staticmethod
-    def _make_formatting_func(tokenizer):
+    def _make_formatting_func(tokenizer, serializer: Optional[ContextSerializer] = None):
         def format_batch(batch):
             prompts = batch['prompt']
             contexts = batch['context']
@@ -96,7 +108,7 @@ class ModelTrainer:
 
             result = []
             for p, ctx, comp in zip(prompts, contexts, completions):
-                prompt = build_prompt(tokenizer, p, ctx, comp)
+                prompt = build_prompt(tokenizer, p, ctx, comp, serializer=serializer)
                 result.append(prompt)
             return result
 
@@ -105,8 +117,26 @@ class ModelTrainer:
     def train(self,
               max_seq_length: int = 2048,
               learning_rate: float = 2e-4,
-              num_train_epochs: int = 5):
-
+              num_train_epochs: int = 5,
+              save_steps: int = 100,
+              save_total_limit: Optional[int] = None,
+              adapter_only_checkpoints: bool = False,
+              resume_from_checkpoint: Optional[str] = None,
+              gradient_accumulation_steps: int = 8,
+              max_steps: int = -1,
+              ddp_backend: Optional[str] = None) -> dict:
+        """
+        Train the model, optionally resuming from a checkpoint directory.
+
+        Resuming restores the adapter weights, optimizer, scheduler and RNG
+        state, and skips the batches that were already consumed. With
+        adapter_only_checkpoints only the LoRA weights are saved, so a resume
+        from such a checkpoint restarts the optimizer and scheduler. All
+        checkpoints are kept unless save_total_limit is set, in which case
+        the oldest ones are deleted.
+
+        Returns the training metrics reported by the trainer.
+        """
         dataset = load_dataset(self.dataset_dir)
 
         if torch.cuda.is_available():
@@ -114,12 +144,15 @@ class ModelTrainer:
                 output_dir=self.output_dir,
                 max_seq_length=max_seq_length,
                 per_device_train_batch_size=1,
-                gradient_accumulation_steps=8,
+                gradient_accumulation_steps=gradient_accumulation_steps,
                 num_train_epochs=num_train_epochs,
+                max_steps=max_steps,
                 learning_rate=learning_rate,
                 fp16=True,
                 logging_steps=10,
-                save_steps=100,
+                save_steps=save_steps,
+                save_total_limit=save_total_limit,
+                save_only_model=adapter_only_checkpoints,
                 use_liger=True
             )
         else:
@@ -127,22 +160,32 @@ class ModelTrainer:
                 output_dir=self.output_dir,
                 max_seq_length=max_seq_length,
                 per_device_train_batch_size=1,
-                gradient_accumulation_steps=8,
+                gradient_accumulation_steps=gradient_accumulation_steps,
                 num_train_epochs=num_train_epochs,
+                max_steps=max_steps,
                 learning_rate=learning_rate,
                 fp16=False,
                 logging_steps=10,
-                save_steps=100,
+                save_steps=save_steps,
+                save_total_limit=save_total_limit,
+                save_only_model=adapter_only_checkpoints,
+                use_cpu=ddp_backend is not None,
+                ddp_backend=ddp_backend,
+                ddp_find_unused_parameters=False if ddp_backend else None,
             )
 
         trainer = SFTTrainer(
             model=self.model,
-            formatting_func=self._make_formatting_func(self.tokenizer),
+            formatting_func=self._make_formatting_func(
+                self.tokenizer, self.context_serializer
+            ),
             peft_config=self.peft_config,
             train_dataset=dataset,
             args=config,
             packing=False,
         )
 
-        trainer.train()
+        result = trainer.train(resume_from_checkpoint=resume_from_checkpoint)
         trainer.save_model(self.output_dir)
+        self.context_serializer.save(self.output_dir)
+        return result.metrics
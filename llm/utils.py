@@ -2,9 +2,11 @@
 # This file is part of the GNU Radio LLM project.
 #
 
+import os
 import json
+import hashlib
 
-from typing import List
+from typing import List, Optional
 
 
 def extract_json_from_text(text: str) -> List[str]:
@@ -52,3 +54,180 @@ def extract_json_from_text(text: str) -> List[str]:
                         pass
                     start_idx = None
     return results
+
+
+def model_fingerprint(model_name: str) -> str:
+    """
+    Fingerprint a model artifact so caches derived from it can be invalidated.
+
+    Local directories are fingerprinted by the names, sizes and modification
+    times of their files; hub model names are used as-is.
+    """
+    digest = hashlib.sha256(model_name.encode('utf-8'))
+    if os.path.isdir(model_name):
+        for root, dirs, files in os.walk(model_name):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('checkpoint-'))
+            for filename in sorted(files):
+                stat = os.stat(os.path.join(root, filename))
+                relpath = os.path.relpath(os.path.join(root, filename), model_name)
+                digest.update(f'{relpath}:{stat.st_size}:{stat.st_mtime_ns}'.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+# Python literals models tend to write instead of their JSON spelling
+_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+
+_DELIMITERS = frozenset(' \t\r\n,:[]{}"\'')
+
+
+def _is_scalar(token: str) -> bool:
+    try:
+        json.loads(token)
+    except json.JSONDecodeError:
+        return False
+    return True
+
+
+def repair_json(text: str) -> Optional[str]:
+    """
+    Repair the first JSON object of a malformed or truncated model output.
+
+    Fixes unclosed strings, braces and brackets, trailing and repeated
+    commas, single-quoted strings, unquoted keys, Python literals and prose
+    around the object in a single pass. Members cut off by truncation,
+    including unterminated strings and numbers or literals running to the
+    end of the text, are dropped. Returns None when no object can be
+    recovered.
+    """
+    start = text.find('{')
+    if start < 0:
+        return None
+
+    out: List[str] = []
+    # Per open container: its closing character and what it expects next,
+    # one of 'key', 'colon', 'value' or 'comma'
+    stack: List[List[str]] = []
+    # Output length and closers at the last point where closing every open
+    # container yields valid JSON
+    safe = (0, '')
+
+    def mark_safe():
+        nonlocal safe
+        safe = (len(out), ''.join(frame[0] for frame in reversed(stack)))
+
+    def complete_value():
+        if stack:
+            stack[-1][1] = 'comma'
+            mark_safe()
+
+    def strip_trailing_comma():
+        while out and out[-1].isspace():
+            out.pop()
+        if out and out[-1] == ',':
+            out.pop()
+
+    i, n = start, len(text)
+    while i < n:
+        ch = text[i]
+        expect = stack[-1][1] if stack else 'value'
+
+        if ch in '{[':
+            if expect == 'value':
+                out.append(ch)
+                stack.append(['}', 'key'] if ch == '{' else [']', 'value'])
+                mark_safe()
+            i += 1
+        elif ch in '}]':
+            strip_trailing_comma()
+            if expect in ('colon', 'value') and stack and stack[-1][0] == '}':
+                # Drop a key left without a value
+                out[safe[0]:] = []
+                strip_trailing_comma()
+            out.append(stack.pop()[0])
+            if not stack:
+                break
+            complete_value()
+            i += 1
+        elif ch in '"\'':
+            # Copy the string, converting single quotes to double quotes
+            chars = ['"']
+            i += 1
+            closed = False
+            while i < n:
+                c = text[i]
+                if c == '\\' and i + 1 < n:
+                    escaped = text[i + 1]
+                    chars.append(escaped if escaped == "'" and ch == "'" else c + escaped)
+                    i += 2
+                    continue
+                i += 1
+                if c == ch:
+                    closed = True
+                    break
+                chars.append({'"': '\\"', '\n': '\\n', '\r': '\\r', '\t': '\\t'}.get(c, c))
+            chars.append('"')
+
+            if expect == 'key':
+                if not closed:
+                    break
+                out.extend(chars)
+                stack[-1][1] = 'colon'
+            elif expect == 'value':
+                out.extend(chars)
+                if closed:
+                    complete_value()
+        elif ch == ':':
+            if expect == 'colon':
+                out.append(ch)
+                stack[-1][1] = 'value'
+            i += 1
+        elif ch == ',':
+            if expect == 'comma':
+                out.append(ch)
+                stack[-1][1] = 'key' if stack[-1][0] == '}' else 'value'
+            i += 1
+        elif ch.isspace():
+            out.append(ch)
+            i += 1
+        else:
+            j = i
+            while j < n and text[j] not in _DELIMITERS:
+                j += 1
+            if j == n:
+                # A token running to the end of the text may be cut off,
+                # e.g. 2.4 of 2.45
+                break
+            token = _LITERALS.get(text[i:j], text[i:j])
+            if expect == 'value' and _is_scalar(token):
+                out.append(token)
+                complete_value()
+            elif expect == 'key' and token.isidentifier():
+                out.append(f'"{token}"')
+                stack[-1][1] = 'colon'
+            i = j
+
+    if stack:
+        # Truncated, keep what was complete and close the open containers
+        length, closers = safe
+        del out[length:]
+        strip_trailing_comma()
+        out.append(closers)
+
+    candidate = ''.join(out).strip()
+    try:
+        if isinstance(json.loads(candidate), dict):
+            return candidate
+    except json.JSONDecodeError:
+        pass
+    return None
+
+
+def extract_response(text: str) -> str:
+    """
+    Return the last JSON object in a model completion, or the repaired
+    object when none of them is well-formed.
+    """
+    results = extract_json_from_text(text)
+    if results:
+        return results[-1]
+    return repair_json(text) or ''
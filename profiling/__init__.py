@@ -0,0 +1,3 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
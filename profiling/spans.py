@@ -0,0 +1,154 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import json
+import time
+import threading
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# Upper bounds of the latency histogram buckets in seconds
+HISTOGRAM_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+@dataclass
+class Span:
+    name: str
+    parent: Optional[str]
+    start_ms: float
+    duration_ms: float
+
+
+@dataclass
+class Turn:
+    label: str
+    start: float
+    total_ms: float = 0.0
+    spans: List[Span] = field(default_factory=list)
+
+    def breakdown(self) -> Dict[str, float]:
+        """
+        Total milliseconds spent in each span name during the turn.
+        """
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        return totals
+
+    def to_record(self) -> dict:
+        return {
+            'label': self.label,
+            'timestamp': self.start,
+            'total_ms': self.total_ms,
+            'spans': [asdict(span) for span in self.spans],
+        }
+
+
+class SpanMetrics:
+    """
+    Cumulative per-span counters and latency histograms.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+        self.sums: Dict[str, float] = {}
+        self.buckets: Dict[str, List[int]] = {}
+
+    def observe(self, name: str, seconds: float):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.sums[name] = self.sums.get(name, 0.0) + seconds
+            buckets = self.buckets.setdefault(name, [0] * len(HISTOGRAM_BUCKETS))
+            for i, bound in enumerate(HISTOGRAM_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+
+    def prometheus_text(self, prefix: str = 'radio_cli') -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+        """
+        metric = f'{prefix}_span_seconds'
+        lines = [
+            f'# HELP {metric} Time spent in instrumented spans.',
+            f'# TYPE {metric} histogram',
+        ]
+        with self.lock:
+            for name in sorted(self.counts):
+                for bound, count in zip(HISTOGRAM_BUCKETS, self.buckets[name]):
+                    lines.append(f'{metric}_bucket{{span="{name}",le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{span="{name}",le="+Inf"}} {self.counts[name]}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {self.sums[name]:.6f}')
+                lines.append(f'{metric}_count{{span="{name}"}} {self.counts[name]}')
+        return '\n'.join(lines) + '\n'
+
+
+class Profiler:
+    """
+    Records nested timing spans for the turn running on the current thread.
+
+    Spans are only recorded between begin_turn() and end_turn(), so
+    instrumented code costs a thread-local lookup when profiling is off
+    and work on other threads, such as background model loading, does not
+    leak into a turn.
+    """
+    def __init__(self):
+        self.local = threading.local()
+        self.metrics = SpanMetrics()
+
+    def begin_turn(self, label: str = ''):
+        self.local.turn = Turn(label=label, start=time.time())
+        self.local.stack = []
+        self.local.origin = time.perf_counter()
+
+    def end_turn(self) -> Optional[Turn]:
+        turn = getattr(self.local, 'turn', None)
+        if turn is None:
+            return None
+        turn.total_ms = (time.perf_counter() - self.local.origin) * 1000
+        self.metrics.observe('turn', turn.total_ms / 1000)
+        self.local.turn = None
+        return turn
+
+    @contextmanager
+    def span(self, name: str):
+        turn = getattr(self.local, 'turn', None)
+        if turn is None:
+            yield
+            return
+
+        stack = self.local.stack
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            turn.spans.append(Span(
+                name=name,
+                parent=parent,
+                start_ms=(start - self.local.origin) * 1000,
+                duration_ms=elapsed * 1000
+            ))
+            self.metrics.observe(name, elapsed)
+
+
+PROFILER = Profiler()
+
+
+def span(name: str):
+    """
+    Time a block of code as a named span of the current turn.
+    """
+    return PROFILER.span(name)
+
+
+def append_jsonl(path: Path, turn: Turn):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(turn.to_record()) + '\n')
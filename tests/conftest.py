@@ -0,0 +1,68 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import pytest
+import torch
+
+from transformers import Qwen2Config, Qwen2ForCausalLM
+
+from llm.inference import ModelEngine
+from llm.prompts import ContextSerializer
+
+
+class Inputs(dict):
+    def to(self, device):
+        return self
+
+
+class Tokenizer:
+    """
+    Character-level stand-in for a chat tokenizer.
+    """
+    pad_token_id = 0
+    eos_token_id = 1
+
+    def apply_chat_template(self, messages, tokenize=False, add_generation_prompt=True):
+        return messages[-1]['content']
+
+    def encode(self, text):
+        return [10 + ord(c) % 90 for c in text]
+
+    def __call__(self, text, return_tensors=None):
+        ids = self.encode(text)
+        if return_tensors == 'pt':
+            ids = torch.tensor([ids])
+        return Inputs(input_ids=ids, attention_mask=torch.ones_like(ids))
+
+    def convert_tokens_to_ids(self, token):
+        return -1
+
+    def decode(self, ids, skip_special_tokens=False):
+        return ' '.join(str(int(i)) for i in ids)
+
+    def batch_decode(self, sequences, skip_special_tokens=False):
+        return [self.decode(ids, skip_special_tokens) for ids in sequences]
+
+
+@pytest.fixture
+def tiny_engine() -> ModelEngine:
+    """
+    ModelEngine around a small randomly initialised model.
+    """
+    torch.manual_seed(0)
+    config = Qwen2Config(
+        vocab_size=100,
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2
+    )
+    engine = object.__new__(ModelEngine)
+    engine.tokenizer = Tokenizer()
+    engine.context_serializer = ContextSerializer()
+    engine.speculative = None
+    engine.draft_model = None
+    engine.model = Qwen2ForCausalLM(config).eval()
+    return engine
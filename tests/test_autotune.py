@@ -0,0 +1,115 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import json
+import pytest
+
+from pathlib import Path
+
+from rich.console import Console
+
+from flowgraph.autotune import (
+    TuneSettings,
+    apply_settings,
+    coordinate_search,
+    headless_flowgraph,
+    throttle_names,
+    trial_score
+)
+from flowgraph.controller import FlowgraphController
+from flowgraph.perf import BlockStats
+from flowgraph.schema import Flowgraph, requires_gui
+
+
+def load_flowgraph(name: str = 'flowgraph_simple') -> Flowgraph:
+    return Flowgraph(**json.load(Path(f'tests/mock_json/{name}.json').open()))
+
+
+def block_params(flowgraph: Flowgraph) -> dict:
+    return {b['name']: b['parameters'] for b in flowgraph.blocks}
+
+
+def test_apply_settings():
+    flowgraph = load_flowgraph()
+    tuned = apply_settings(flowgraph, TuneSettings(4096, 65536, 'spread'), cores=[2, 3])
+
+    assert tuned.options['parameters']['max_nouts'] == '4096'
+    params = block_params(tuned)
+    assert params['analog_sig_source_x_0']['maxoutbuf'] == '65536'
+    assert params['blocks_throttle2_0']['maxoutbuf'] == '65536'
+    # Sinks have no output buffers
+    assert 'maxoutbuf' not in params['blocks_null_sink_0']
+    assert sorted(p['affinity'] for p in params.values()) == ['[2]', '[2]', '[3]']
+
+    packed = block_params(apply_settings(flowgraph, TuneSettings(affinity='packed'), cores=[2, 3]))
+    assert {p['affinity'] for p in packed.values()} == {'[2]'}
+
+    # The original flowgraph is left alone
+    assert block_params(flowgraph) == block_params(load_flowgraph())
+
+    callbacks = load_flowgraph('flowgraph_callbacks')
+    untouched = block_params(apply_settings(callbacks, TuneSettings(), cores=[0]))
+    assert untouched['samp_rate'] == block_params(callbacks)['samp_rate']
+
+
+def test_headless_flowgraph():
+    callbacks = load_flowgraph('flowgraph_callbacks')
+    assert requires_gui(headless_flowgraph(callbacks))
+
+    callbacks.blocks = [b for b in callbacks.blocks if 'qtgui' not in b['id']]
+    headless = headless_flowgraph(callbacks)
+    assert not requires_gui(headless)
+    assert requires_gui(callbacks)
+
+
+def test_trial_score():
+    def stats(src_busy: float, throttle_busy: float = 0.98) -> list:
+        return [
+            BlockStats('blocks_throttle2_0', 32000.0, throttle_busy, 0.0, 1.0),
+            BlockStats('analog_sig_source_x_0', 32000.0, src_busy, 0.0, 1.0),
+        ]
+
+    # Throttled graphs tie on throughput but not on the bottleneck's headroom
+    assert throttle_names(load_flowgraph()) == ['blocks_throttle2_0']
+    assert trial_score(stats(0.1), ['blocks_throttle2_0']) == pytest.approx(320000.0)
+    assert trial_score(stats(0.2), ['blocks_throttle2_0']) == pytest.approx(160000.0)
+
+    # Saturated graphs score their throughput
+    assert trial_score(stats(0.5, 1.0)) == pytest.approx(32000.0)
+    assert trial_score([]) == 0.0
+
+
+def test_coordinate_search():
+    space = {
+        'max_nouts': (0, 512, 4096),
+        'maxoutbuf': (0, 4096),
+        'affinity': ('none', 'spread'),
+    }
+    scores = {4096: 2.0, 512: 1.02}
+
+    def measure(settings: TuneSettings) -> float:
+        score = scores.get(settings.max_nouts, 1.0)
+        # Within the noise margin, the default is kept
+        return score * (1.01 if settings.affinity == 'spread' else 1.0)
+
+    best, trials = coordinate_search(measure, space)
+    assert best == TuneSettings(max_nouts=4096)
+    assert len(trials) == 5
+    assert trials[0] == (TuneSettings(), 1.0)
+
+
+def test_controller_autotune():
+    controller = FlowgraphController(Console(quiet=True))
+    controller.flowgraph = load_flowgraph()
+
+    loaded = []
+    controller.load_flowgraph = loaded.append
+    controller._trial = lambda flowgraph, seconds: float(
+        flowgraph.options['parameters']['max_nouts'] == '16384'
+    ) + 1
+
+    best, trials = controller.autotune(trial_seconds=0.0)
+    assert best.max_nouts == 16384
+    assert len(trials) == 8
+    assert loaded[0].options['parameters']['max_nouts'] == '16384'
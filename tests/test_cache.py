@@ -0,0 +1,75 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import pytest
+
+from llm.cache import ResponseCache, canonical_context
+
+
+def test_response_cache_hit_miss(tmp_path):
+    cache = ResponseCache('model', 'fp0', path=tmp_path / 'cache.sqlite')
+
+    assert cache.get('start', None) is None
+    cache.put('start', None, '{"action": "start"}')
+
+    assert cache.get('  START ', None) == '{"action": "start"}'
+    assert cache.get('start', '{"blocks": []}') is None
+    assert cache.hits == 1
+    assert cache.misses == 2
+
+    context = '{"blocks": [], "options": {"id": "test"}}'
+    cache.put('stop', context, '{"action": "stop"}')
+    assert cache.get('stop', '{ "options": {"id": "test"}, "blocks": [] }') is not None
+
+    cache.discard('stop', context)
+    assert cache.get('stop', context) is None
+
+
+def test_response_cache_fingerprint(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    cache = ResponseCache('model', 'fp0', path=path)
+    cache.put('start', None, '{"action": "start"}')
+    cache.close()
+
+    cache = ResponseCache('model', 'fp0', path=path)
+    assert cache.get('start', None) is not None
+    cache.close()
+
+    # Other models keep their entries when one model changes
+    other = ResponseCache('other', 'fp0', path=path)
+    other.put('start', None, '{"action": "stop"}')
+    other.close()
+
+    cache = ResponseCache('model', 'fp1', path=path)
+    assert cache.get('start', None) is None
+    cache.close()
+
+    other = ResponseCache('other', 'fp0', path=path)
+    assert other.get('start', None) == '{"action": "stop"}'
+
+
+def test_response_cache_context_settings(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    cache = ResponseCache('model', 'fp0', path=path)
+    cache.put('start', None, '{"action": "start"}')
+    cache.close()
+
+    pruned = ResponseCache('model', 'fp0', path=path,
+                           context_settings={'max_tokens': None, 'prune': True})
+    assert pruned.get('start', None) is None
+
+
+def test_response_cache_eviction(tmp_path):
+    cache = ResponseCache('model', 'fp0', path=tmp_path / 'cache.sqlite', max_bytes=100)
+
+    for i in range(5):
+        cache.put(f'prompt {i}', None, 'x' * 30)
+    assert cache.size() <= 100
+    assert cache.get('prompt 0', None) is None
+    assert cache.get('prompt 4', None) is not None
+
+
+def test_canonical_context():
+    assert canonical_context(None) == ''
+    assert canonical_context('{"b": 1, "a": [1, 2]}') == '{"a":[1,2],"b":1}'
@@ -0,0 +1,128 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import json
+
+from pathlib import Path
+
+from flowgraph.catalog import BlockCatalog
+from flowgraph.schema import Flowgraph, minimize_flowgraph
+
+
+CATALOG = BlockCatalog({
+    'options': {'generate_options': 'qt_gui', 'run': 'True', 'max_nouts': '0'},
+    'analog_sig_source_x': {
+        'type': 'complex', 'amp': '1', 'freq': '1000', 'offset': '0',
+        'maxoutbuf': '0', 'minoutbuf': '0'
+    },
+    'blocks_null_sink': {'type': 'complex', 'vlen': '1', 'num_inputs': '1'},
+})
+
+
+def load_flowgraph() -> Flowgraph:
+    graph_path = Path('tests/mock_json/flowgraph_simple.json')
+    return Flowgraph(**json.load(graph_path.open()))
+
+
+def test_catalog_elides_defaults():
+    flowgraph = load_flowgraph()
+    minimized = minimize_flowgraph(flowgraph)
+    elided = minimize_flowgraph(flowgraph, CATALOG)
+
+    sink = next(b for b in elided.blocks if b['id'] == 'blocks_null_sink')
+    assert sink['parameters'] == {}
+
+    options = elided.options['parameters']
+    assert 'run' not in options
+    assert options['generate_options'] == minimized.options['parameters']['generate_options']
+
+    # Blocks missing from the catalog keep all their parameters
+    throttle = next(b for b in elided.blocks if b['id'] == 'blocks_throttle2')
+    assert throttle == next(b for b in minimized.blocks if b['id'] == 'blocks_throttle2')
+    assert len(elided.model_dump_json()) < len(minimized.model_dump_json())
+
+
+def test_catalog_round_trip(tmp_path):
+    path = tmp_path / 'catalog.json'
+    CATALOG.save(path)
+    catalog = BlockCatalog.load(path)
+    assert catalog.defaults == CATALOG.defaults
+
+    minimized = minimize_flowgraph(load_flowgraph())
+    expanded = catalog.expand_defaults(catalog.elide_defaults(minimized))
+    assert expanded.model_dump() == catalog.expand_defaults(minimized).model_dump()
+
+    for block, original in zip(expanded.blocks, minimized.blocks):
+        assert block['parameters'].items() >= original['parameters'].items()
+
+
+class Block:
+    def __init__(self, parameters, inputs=(), outputs=()):
+        self.parameters_data = [{'id': p, 'default': '0'} for p in parameters]
+        self.inputs_data = list(inputs)
+        self.outputs_data = list(outputs)
+
+
+class Platform:
+    blocks = {
+        'options': Block(['id', 'title', 'generate_options', 'run', 'max_nouts',
+                          'author', 'catch_exceptions', 'category', 'cmake_opt',
+                          'comment', 'copyright', 'description', 'gen_cmake',
+                          'gen_linking', 'hier_block_src_path', 'output_language',
+                          'placement', 'qt_qss_theme', 'realtime_scheduling',
+                          'run_command', 'run_options', 'sizing_mode',
+                          'thread_safe_setters', 'window_size']),
+        'analog_sig_source_x': Block(
+            ['id', 'alias', 'affinity', 'comment', 'maxoutbuf', 'minoutbuf', 'type',
+             'samp_rate', 'waveform', 'freq', 'amp', 'offset', 'phase', 'showports'],
+            inputs=[{'domain': 'message', 'id': 'cmd', 'optional': True}],
+            outputs=[{'domain': 'stream', 'dtype': '${ type }'}]
+        ),
+        'blocks_throttle2': Block(
+            ['id', 'alias', 'affinity', 'comment', 'maxoutbuf', 'minoutbuf', 'type',
+             'samples_per_second', 'vlen', 'ignoretag', 'limit', 'maximum'],
+            inputs=[{'domain': 'stream'}],
+            outputs=[{'domain': 'stream'}]
+        ),
+        'blocks_null_sink': Block(
+            ['id', 'alias', 'affinity', 'comment', 'type', 'vlen', 'num_inputs',
+             'bus_structure_sink'],
+            inputs=[{'domain': 'stream', 'multiplicity': '${ num_inputs }'}]
+        ),
+    }
+
+
+def test_catalog_checks_flowgraph(tmp_path):
+    path = tmp_path / 'catalog.json'
+    BlockCatalog.from_platform(Platform()).save(path)
+    catalog = BlockCatalog.load(path)
+
+    flowgraph = load_flowgraph()
+    assert catalog.check_flowgraph(flowgraph) == []
+    assert catalog.check_flowgraph(minimize_flowgraph(flowgraph, catalog)) == []
+
+    data = flowgraph.model_dump()
+    data['blocks'][0]['parameters']['frequency'] = '1000'
+    data['blocks'].append({'name': 'fft_0', 'id': 'qtgui_fft', 'parameters': {}})
+    data['connections'] += [
+        ['analog_sig_source_x_0', '1', 'blocks_null_sink_0', '3'],
+        ['blocks_throttle2_0', 'out', 'blocks_null_sink_1', '0'],
+        ['analog_sig_source_x_0', '0'],
+    ]
+    errors = catalog.check_flowgraph(Flowgraph(**data))
+
+    assert errors == [
+        "Block 'analog_sig_source_x_0' (analog_sig_source_x) has no parameter 'frequency'",
+        "Block 'fft_0' has unknown block ID 'qtgui_fft'",
+        "Connection ['analog_sig_source_x_0', '1', 'blocks_null_sink_0', '3']: "
+        "block 'analog_sig_source_x_0' has no source port '1' (valid: 0)",
+        "Connection ['blocks_throttle2_0', 'out', 'blocks_null_sink_1', '0']: "
+        "block 'blocks_throttle2_0' has no source port 'out' (valid: 0)",
+        "Connection ['blocks_throttle2_0', 'out', 'blocks_null_sink_1', '0'] "
+        "refers to unknown block 'blocks_null_sink_1'",
+        "Connection ['analog_sig_source_x_0', '0'] must be [src, src_port, dst, dst_port]",
+    ]
+
+    # Catalogs without an index do not report errors
+    assert CATALOG.check_flowgraph(Flowgraph(**data)) == []
@@ -0,0 +1,81 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import sys
+import json
+
+from pathlib import Path
+
+from flowgraph.catalog import BlockCatalog
+from flowgraph.schema import Flowgraph
+
+# The CLI is a script rather than a package module
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'app'))
+
+from radio_cli import response_error, select_candidate  # noqa: E402
+
+
+def load_flowgraph() -> str:
+    return Path('tests/mock_json/flowgraph_simple.json').read_text()
+
+
+def load_catalog() -> BlockCatalog:
+    # Indexes the parameters of the blocks used by the flowgraph
+    flowgraph = Flowgraph.model_validate_json(load_flowgraph())
+    params = {'options': flowgraph.options['parameters'].keys()}
+    for block in flowgraph.blocks:
+        params[block['id']] = block['parameters'].keys()
+    return BlockCatalog({}, params=params)
+
+
+PATCH = json.dumps({'patch': [
+    {'action': 'parameter', 'block_id': 'analog_sig_source_x_0',
+     'parameter': 'freq', 'value': '2000'}
+]})
+
+UNKNOWN_BLOCK_PATCH = json.dumps({'patch': [
+    {'action': 'add_block', 'block_id': 'blocks_teleport_0', 'parameters': {}}
+]})
+
+
+def test_response_error_accepts_loop_payloads():
+    current = load_flowgraph()
+    catalog = load_catalog()
+
+    # Patches, flowgraphs and actions, as handled by the response loop
+    assert response_error(PATCH, current, catalog) is None
+    assert response_error(current, current, catalog) is None
+    assert response_error(current, None, catalog) is None
+    assert response_error('{"action": "start"}', current, catalog) is None
+    assert response_error('{"action": "block_set", "method": "set_freq", "value": 1}',
+                          None, None) is None
+
+    # Malformed JSON the loop repairs is accepted too
+    assert response_error(PATCH[:-2] + ',]}', current, catalog) is None
+    assert response_error("{'action': 'start',}", None, None) is None
+
+
+def test_response_error_rejects():
+    current = load_flowgraph()
+    catalog = load_catalog()
+
+    assert 'not valid JSON' in response_error('no JSON here', current, catalog)
+    assert 'blocks_teleport' in response_error(UNKNOWN_BLOCK_PATCH, current, catalog)
+    assert response_error('[1, 2]', current, catalog)
+
+    # Patches must apply cleanly to the current flowgraph
+    patch = json.dumps({'patch': [{'action': 'remove_block', 'block_id': 'missing_0'}]})
+    assert 'missing_0' in response_error(patch, current, catalog)
+
+
+def test_select_candidate():
+    current = load_flowgraph()
+    catalog = load_catalog()
+
+    candidates = [UNKNOWN_BLOCK_PATCH, 'no JSON here', PATCH, '{"action": "start"}']
+    assert select_candidate(candidates, current, catalog) == PATCH
+
+    # Without a valid candidate the first is kept for the loop to report
+    assert select_candidate(candidates[:2], current, catalog) == UNKNOWN_BLOCK_PATCH
+    assert select_candidate([], current, catalog) == ''
@@ -4,6 +4,9 @@
 
 import pytest
 import os
+import importlib.util
+import time
+import copy
 import json
 
 from pathlib import Path
@@ -15,8 +18,8 @@ from flowgraph.controller import FlowgraphController
 
 
 @pytest.mark.skipif(
-    not os.environ.get('DISPLAY'),
-    reason='Requires a display (Qt GUI) to run'
+    importlib.util.find_spec('gnuradio') is None,
+    reason='Requires GNU Radio to run'
 )
 @pytest.mark.filterwarnings('ignore::DeprecationWarning')
 def test_flowgraph_controller():
@@ -29,7 +32,9 @@ def test_flowgraph_controller():
 
     assert 'idle' in controller.state
 
+    # A no_gui flowgraph runs in a headless worker, without a display
     controller.load_flowgraph(flowgraph)
+    assert not controller.gui
 
     assert 'loaded' in controller.state
 
@@ -103,3 +108,203 @@ def test_flowgraph_controller_action():
     controller.handle_action(stop_action)
 
     assert 'idle' in controller.state
+
+
+def test_flowgraph_controller_reconfigure_changes():
+    graph_path = Path('tests/mock_json/flowgraph_callbacks.json')
+    graph = json.load(graph_path.open())
+    old = Flowgraph(**copy.deepcopy(graph))
+
+    graph['blocks'][1]['parameters']['value'] = '48000'
+    new = Flowgraph(**graph)
+
+    controller = FlowgraphController(Console())
+    sent = []
+    controller._send = lambda msg: sent.append(msg) or {'type': 'reconfigured'}
+
+    assert controller._reconfigure(old, new)
+    changes = sent[0]['changes']
+    assert sent[0]['type'] == 'reconfigure'
+    assert len(changes) == 1
+    assert changes[0]['action'] == 'parameter'
+    assert changes[0]['parameter'] == 'value'
+    assert changes[0]['value'] == '48000'
+
+    graph['options']['parameters']['generate_options'] = 'no_gui'
+    assert not controller._reconfigure(old, Flowgraph(**graph))
+
+    # Adding a Qt widget to a headless graph needs a worker with Qt
+    headless = json.load(Path('tests/mock_json/flowgraph_simple.json').open())
+    with_gui = copy.deepcopy(headless)
+    with_gui['blocks'].append({
+        'name': 'qtgui_time_sink_x_0', 'id': 'qtgui_time_sink_x', 'parameters': {}
+    })
+    assert controller._needs_restart(Flowgraph(**headless), Flowgraph(**with_gui))
+
+    # Added blocks come from a second top block, which cannot open devices twice
+    with_audio = copy.deepcopy(headless)
+    with_audio['blocks'].append({'name': 'audio_sink_0', 'id': 'audio_sink', 'parameters': {}})
+    assert controller._needs_restart(Flowgraph(**headless), Flowgraph(**with_audio))
+
+    throttle = {'name': 'blocks_throttle2_1', 'id': 'blocks_throttle2', 'parameters': {}}
+    with_throttle = copy.deepcopy(headless)
+    with_throttle['blocks'].append(throttle)
+    assert not controller._needs_restart(Flowgraph(**headless), Flowgraph(**with_throttle))
+    with_audio_throttle = copy.deepcopy(with_audio)
+    with_audio_throttle['blocks'].append(throttle)
+    assert controller._needs_restart(Flowgraph(**with_audio), Flowgraph(**with_audio_throttle))
+
+
+def test_flowgraph_controller_reconfigure_drops_taps():
+    from flowgraph.tap import SampleRing
+
+    graph_path = Path('tests/mock_json/flowgraph_callbacks.json')
+    graph = json.load(graph_path.open())
+    old = Flowgraph(**copy.deepcopy(graph))
+    removed = graph['blocks'].pop()['name']
+    new = Flowgraph(**graph)
+
+    controller = FlowgraphController(Console())
+    ring = SampleRing.create(capacity=16)
+    controller.taps[(removed, '0')] = ring
+    sent = []
+    controller._send = lambda msg: sent.append(msg) or {
+        'type': 'reconfigured', 'untapped': [[removed, '0']]
+    }
+
+    # The worker reports the taps of removed blocks, their rings are closed
+    assert controller._reconfigure(old, new)
+    assert any(c['action'] == 'remove_block' for c in sent[0]['changes'])
+    assert not controller.taps
+    assert ring.shm.buf is None
+
+
+def test_flowgraph_controller_reconfigure_elided_reset():
+    from flowgraph.catalog import BlockCatalog
+
+    graph_path = Path('tests/mock_json/flowgraph_callbacks.json')
+    graph = json.load(graph_path.open())
+    new = Flowgraph(**copy.deepcopy(graph))
+    block = graph['blocks'][1]
+    block['parameters']['note'] = 'reset me'
+    old = Flowgraph(**graph)
+
+    # Without the default of the elided parameter the graph is restarted
+    controller = FlowgraphController(Console())
+    controller._send = lambda msg: {'type': 'reconfigured'}
+    assert not controller._reconfigure(old, new)
+
+    controller.catalog = BlockCatalog({block['id']: {'note': ''}})
+    sent = []
+    controller._send = lambda msg: sent.append(msg) or {'type': 'reconfigured'}
+    assert controller._reconfigure(old, new)
+    assert [(c['parameter'], c['value']) for c in sent[0]['changes']] == [('note', '')]
+
+
+def stand_in_worker(conn):
+    conn.send({'type': 'status', 'msg': 'ready'})
+    stats = 0
+    while True:
+        try:
+            cmd = conn.recv()
+        except EOFError:
+            break
+        if cmd['type'] == 'quit':
+            break
+        if cmd['type'] == 'stats':
+            # Counters of a source doing most of the work
+            stats += 1
+            conn.send({'type': 'stats', 'result': {
+                'src': {'work_time_s': 0.04 * stats, 'items': 4000 * stats,
+                        'input_full': [], 'output_full': [0.9]},
+                'sink': {'work_time_s': 0.01 * stats, 'items': 4000 * stats,
+                         'input_full': [0.9], 'output_full': []},
+            }})
+            continue
+        replies = {'start': 'started', 'stop': 'stopped'}
+        conn.send({'type': replies.get(cmd['type'], 'error'), 'err': 'unknown'})
+
+
+def failing_worker(conn):
+    # Constructs its top block but fails to start it
+    conn.send({'type': 'status', 'msg': 'ready'})
+    while True:
+        try:
+            cmd = conn.recv()
+        except EOFError:
+            break
+        if cmd['type'] == 'quit':
+            break
+        conn.send({'type': 'error', 'err': 'start failed'})
+
+
+def spawn_stand_in(target=stand_in_worker):
+    import multiprocessing as mp
+
+    parent_conn, child_conn = mp.Pipe()
+    process = mp.Process(target=target, args=(child_conn,))
+    process.start()
+    assert parent_conn.recv()['msg'] == 'ready'
+    return process, parent_conn, child_conn
+
+
+def test_flowgraph_controller_swap():
+    spawn_process = spawn_stand_in
+
+    controller = FlowgraphController(Console(), make_before_break=True)
+    controller._spawn_process = spawn_process
+
+    controller._start_process()
+    controller._send({'type': 'start'})
+    controller.state = 'running'
+    old_process = controller.process
+
+    assert controller._swap()
+    assert len(controller.swap_gaps) == 1
+    assert controller.process is not old_process
+    assert not old_process.is_alive()
+
+    # A replacement that fails to start is shut down and the old worker
+    # keeps running
+    replacements = []
+
+    def spawn_failing():
+        replacements.append(spawn_stand_in(failing_worker))
+        return replacements[-1]
+
+    controller._spawn_process = spawn_failing
+    current = controller.process
+    assert not controller._swap()
+    assert controller.process is current
+    assert current.is_alive()
+    assert 'running' in controller.state
+    assert len(controller.swap_gaps) == 1
+    assert not replacements[0][0].is_alive()
+
+    controller.stop()
+    assert 'idle' in controller.state
+
+
+def test_flowgraph_controller_perf_sampler():
+    controller = FlowgraphController(Console(), stats_interval=0.02, stats_history=8)
+    controller._spawn_process = spawn_stand_in
+    controller.state = 'loaded'
+    controller.generated_path = Path('stand_in.py')
+
+    controller.start()
+
+    # Requests from this thread interleave with the sampler's
+    deadline = time.monotonic() + 5
+    while len(controller.perf_samples) < 8 and time.monotonic() < deadline:
+        controller._send({'type': 'start'})
+    assert len(controller.perf_samples) == 8
+
+    stats = controller.perf_stats()
+    assert [s.name for s in stats] == ['src', 'sink']
+    assert stats[0].busy > stats[1].busy > 0
+    assert stats[0].items_per_s > 0
+    assert stats[0].output_full == 0.9 and stats[0].input_full == 0.0
+
+    controller.stop()
+    assert controller.sampler is None
+    assert len(controller.perf_samples) == 0
@@ -0,0 +1,84 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import json
+import copy
+
+from pathlib import Path
+
+from dataset_generation.flowgraph import FlowgraphDiffer, flowgraph_diff
+from dataset_generation.schema import ParameterAction
+
+
+TIMESTAMP = '2025-01-01T00:00:00+00:00'
+
+
+def load_graph() -> dict:
+    graph_path = Path('tests/mock_json/flowgraph_callbacks.json')
+    return json.load(graph_path.open())
+
+
+def dump(changes) -> list:
+    return sorted(json.dumps(c.model_dump(mode='json'), sort_keys=True) for c in changes)
+
+
+def test_flowgraph_diff_changes():
+    graph_0 = load_graph()
+    graph_1 = copy.deepcopy(graph_0)
+    graph_1['blocks'][1]['parameters']['value'] = '48000'
+    graph_1['blocks'].pop()
+    graph_1['connections'] = graph_1['connections'][:1]
+
+    changes = flowgraph_diff(graph_0, graph_1, 'test', TIMESTAMP)
+    assert sorted(c.action for c in changes) == ['disconnect', 'parameter', 'remove_block']
+
+    # Constructed actions must match validated ones
+    for change in changes:
+        assert type(change).model_validate(change.model_dump()) == change
+
+    new = flowgraph_diff({'blocks': [], 'connections': []}, graph_0, 'test', TIMESTAMP)
+    assert [c.action for c in new] == ['new_flowgraph']
+
+
+def test_flowgraph_differ_carries_index():
+    graphs = [load_graph()]
+    for i in range(4):
+        graph = copy.deepcopy(graphs[-1])
+        graph['blocks'][1]['parameters']['value'] = str(48000 + i)
+        if i % 2:
+            block = copy.deepcopy(graph['blocks'][-1])
+            block['name'] = f'blocks_null_sink_{i + 1}'
+            graph['blocks'].append(block)
+        graphs.append(graph)
+
+    differ = FlowgraphDiffer()
+    for graph_0, graph_1 in zip(graphs, graphs[1:]):
+        # Consecutive entries are separately parsed copies of the same graph
+        expected = flowgraph_diff(graph_0, graph_1, 'test', TIMESTAMP)
+        changes = differ.diff(copy.deepcopy(graph_0), graph_1, 'test', TIMESTAMP)
+        assert dump(changes) == dump(expected)
+        assert any(isinstance(c, ParameterAction) for c in changes)
+
+    # A snapshot that does not follow the previous one is indexed afresh
+    changes = differ.diff(graphs[0], graphs[2], 'test', TIMESTAMP)
+    assert dump(changes) == dump(flowgraph_diff(graphs[0], graphs[2], 'test', TIMESTAMP))
+
+
+def test_flowgraph_diff_elided_reset():
+    from flowgraph.catalog import BlockCatalog
+
+    graph_0 = load_graph()
+    graph_1 = copy.deepcopy(graph_0)
+    block = graph_0['blocks'][1]
+    block['parameters']['freq'] = '5'
+    catalog = BlockCatalog({block['id']: {'freq': '1000'}})
+
+    # freq went back to its default and was elided from the new graph
+    changes = flowgraph_diff(graph_0, graph_1, 'test', TIMESTAMP, catalog)
+    assert [(c.block_id, c.parameter, c.value) for c in changes] == [
+        (block['name'], 'freq', '1000')
+    ]
+
+    # Without the catalog the default is unknown
+    assert flowgraph_diff(graph_0, graph_1, 'test', TIMESTAMP) == []
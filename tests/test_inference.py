@@ -0,0 +1,50 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import pytest
+import json
+
+
+def test_generate_candidates(tiny_engine):
+    engine = tiny_engine
+    # Render every completion as a JSON object of its tokens
+    engine.tokenizer.batch_decode = lambda sequences, skip_special_tokens=False: [
+        json.dumps({'tokens': ids.tolist()}) for ids in sequences
+    ]
+
+    for mode in ('sample', 'beam'):
+        candidates = engine.generate_candidates(
+            'add a throttle', num_candidates=4, mode=mode, max_tokens=6
+        )
+        assert 1 <= len(candidates) <= 4
+        assert len(set(candidates)) == len(candidates)
+        # Only the completion is decoded, without the prompt
+        assert all(len(json.loads(c)['tokens']) <= 6 for c in candidates)
+
+    with pytest.raises(ValueError):
+        engine.generate_candidates('add a throttle', mode='greedy')
+
+
+@pytest.mark.parametrize('cpu_mode', ['bf16', 'int8'])
+def test_converted_model_cache(tmp_path, monkeypatch, tiny_engine, cpu_mode):
+    import torch
+    import llm.inference
+    from llm.inference import ModelEngine
+
+    model_dir = tmp_path / 'model'
+    tiny_engine.model.save_pretrained(model_dir)
+    monkeypatch.setattr(llm.inference, 'CONVERTED_CACHE_DIR', tmp_path / 'converted')
+
+    engine = object.__new__(ModelEngine)
+    engine.model_name = str(model_dir)
+    engine.cpu_mode = cpu_mode
+
+    converted = engine._load_cpu_model(tmp_path / 'offload')
+    assert (engine._converted_cache_path() / 'weights.pt').exists()
+
+    # The second load rebuilds the model from the cached state dict
+    cached = engine._load_cpu_model(tmp_path / 'offload')
+    ids = torch.tensor([[5, 6, 7, 8]])
+    with torch.inference_mode():
+        assert torch.equal(converted.eval()(ids).logits, cached.eval()(ids).logits)
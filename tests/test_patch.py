@@ -0,0 +1,139 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import pytest
+import json
+import copy
+
+from pathlib import Path
+
+from dataset_generation.flowgraph import flowgraph_diff
+from flowgraph.schema import Flowgraph, minimize_flowgraph
+from flowgraph.patch import FlowgraphPatch, make_patch, apply_patch
+
+
+def load_flowgraph() -> Flowgraph:
+    graph_path = Path('tests/mock_json/flowgraph_simple.json')
+    graph = json.load(graph_path.open())
+    return minimize_flowgraph(Flowgraph(**graph))
+
+
+def test_apply_patch():
+    flowgraph = load_flowgraph()
+
+    patch = FlowgraphPatch.model_validate_json('''
+    {
+        "patch": [
+            {"action": "remove_block", "block_id": "blocks_throttle2_0"},
+            {"action": "add_block", "block_id": "blocks_head_0",
+             "parameters": {"num_items": "1024", "type": "complex"}},
+            {"action": "parameter", "block_id": "analog_sig_source_x_0",
+             "parameter": "freq", "value": "2000"},
+            {"action": "connect", "src": ["analog_sig_source_x_0", "0"],
+             "dst": ["blocks_head_0", "0"]},
+            {"action": "connect", "src": ["blocks_head_0", "0"],
+             "dst": ["blocks_null_sink_0", "0"]}
+        ]
+    }
+    ''')
+    patched = apply_patch(flowgraph, patch)
+
+    names = [block['name'] for block in patched.blocks]
+    assert 'blocks_throttle2_0' not in names
+    assert 'blocks_head_0' in names
+
+    head = next(b for b in patched.blocks if b['name'] == 'blocks_head_0')
+    assert head['id'] == 'blocks_head'
+
+    source = next(b for b in patched.blocks if b['name'] == 'analog_sig_source_x_0')
+    assert source['parameters']['freq'] == '2000'
+
+    assert patched.connections == [
+        ['analog_sig_source_x_0', '0', 'blocks_head_0', '0'],
+        ['blocks_head_0', '0', 'blocks_null_sink_0', '0'],
+    ]
+
+    # The original flowgraph is left untouched
+    assert len(flowgraph.connections) == 2
+    assert any(b['name'] == 'blocks_throttle2_0' for b in flowgraph.blocks)
+
+
+def test_apply_patch_invalid():
+    flowgraph = load_flowgraph()
+
+    patch = FlowgraphPatch(patch=[
+        {'action': 'remove_block', 'block_id': 'does_not_exist'}
+    ])
+    with pytest.raises(ValueError) as e:
+        apply_patch(flowgraph, patch)
+    assert 'does_not_exist' in str(e.value)
+
+    patch = FlowgraphPatch(patch=[{'action': 'explode'}])
+    with pytest.raises(ValueError):
+        apply_patch(flowgraph, patch)
+
+
+def test_patch_round_trip():
+    flowgraph_0 = load_flowgraph()
+
+    snapshot_1 = copy.deepcopy(flowgraph_0.model_dump())
+    snapshot_1['blocks'][0]['parameters']['freq'] = '500'
+    snapshot_1['blocks'].append({
+        'name': 'blocks_null_sink_1',
+        'id': 'blocks_null_sink',
+        'parameters': {'type': 'complex'},
+        'states': {'state': 'enabled'}
+    })
+    snapshot_1['connections'].append(
+        ['blocks_throttle2_0', '0', 'blocks_null_sink_1', '0']
+    )
+    flowgraph_1 = Flowgraph(**snapshot_1)
+
+    actions = flowgraph_diff(
+        flowgraph_0.model_dump(),
+        flowgraph_1.model_dump(),
+        'test',
+        '2025-01-01T00:00:00+00:00'
+    )
+    patch = make_patch(actions)
+    assert all('timestamp' not in item for item in patch.patch)
+
+    patched = apply_patch(flowgraph_0, patch)
+    key = lambda block: block['name']
+    assert sorted(patched.blocks, key=key) == sorted(flowgraph_1.blocks, key=key)
+    assert sorted(patched.connections) == sorted(flowgraph_1.connections)
+
+
+def test_patch_round_trip_removal():
+    flowgraph_0 = load_flowgraph()
+
+    snapshot_1 = copy.deepcopy(flowgraph_0.model_dump())
+    snapshot_1['blocks'] = [
+        b for b in snapshot_1['blocks'] if b['name'] != 'blocks_throttle2_0'
+    ]
+    snapshot_1['connections'] = [
+        ['analog_sig_source_x_0', '0', 'blocks_null_sink_0', '0']
+    ]
+    flowgraph_1 = Flowgraph(**snapshot_1)
+
+    actions = flowgraph_diff(
+        flowgraph_0.model_dump(),
+        flowgraph_1.model_dump(),
+        'test',
+        '2025-01-01T00:00:00+00:00'
+    )
+    assert any(a.action == 'disconnect' for a in actions)
+
+    patched = apply_patch(flowgraph_0, make_patch(actions))
+    key = lambda block: block['name']
+    assert sorted(patched.blocks, key=key) == sorted(flowgraph_1.blocks, key=key)
+    assert sorted(patched.connections) == sorted(flowgraph_1.connections)
+
+    # Connections of blocks that still exist must be known
+    patch = FlowgraphPatch(patch=[
+        {'action': 'disconnect', 'src': ['analog_sig_source_x_0', '0'],
+         'dst': ['blocks_null_sink_0', '0']}
+    ])
+    with pytest.raises(ValueError):
+        apply_patch(flowgraph_0, patch)
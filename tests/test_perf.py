@@ -0,0 +1,42 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import pytest
+
+from flowgraph.perf import PerfSample, summarize
+
+
+def counters(work_time_s: float, items: int, input_full=(), output_full=()) -> dict:
+    return {
+        'work_time_s': work_time_s,
+        'items': items,
+        'input_full': list(input_full),
+        'output_full': list(output_full),
+    }
+
+
+def test_summarize_finds_bottleneck():
+    first = PerfSample(10.0, {
+        'src': counters(1.0, 32000, output_full=[1.0]),
+        'filter': counters(2.0, 32000, [1.0], [0.0]),
+        'sink': counters(0.5, 32000, input_full=[0.0]),
+    })
+    last = PerfSample(12.0, {
+        'src': counters(1.2, 96000, output_full=[1.0]),
+        'filter': counters(3.9, 96000, [1.0, 0.5], [0.0]),
+        'sink': counters(0.6, 96000, input_full=[0.0]),
+        'added': counters(0.1, 10),
+    })
+
+    stats = summarize(first, last)
+    assert [s.name for s in stats] == ['filter', 'src', 'sink']
+
+    busiest = stats[0]
+    assert busiest.busy == pytest.approx(0.95)
+    assert busiest.items_per_s == pytest.approx(32000)
+    assert busiest.input_full == pytest.approx(0.75)
+    assert busiest.output_full == 0.0
+
+    with pytest.raises(ValueError):
+        summarize(last, last)
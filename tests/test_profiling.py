@@ -0,0 +1,66 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import json
+import threading
+
+from profiling.spans import Profiler, append_jsonl
+
+
+def test_profiler_nested_spans():
+    profiler = Profiler()
+
+    with profiler.span('ignored'):
+        pass
+
+    profiler.begin_turn('build a receiver')
+    with profiler.span('llm.generate'):
+        with profiler.span('llm.tokenize'):
+            pass
+    with profiler.span('llm.tokenize'):
+        pass
+    turn = profiler.end_turn()
+
+    assert turn.label == 'build a receiver'
+    assert [s.name for s in turn.spans] == ['llm.tokenize', 'llm.generate', 'llm.tokenize']
+    assert turn.spans[0].parent == 'llm.generate'
+    assert turn.spans[2].parent is None
+    assert turn.total_ms >= turn.spans[1].duration_ms
+    assert set(turn.breakdown()) == {'llm.generate', 'llm.tokenize'}
+    assert 'ignored' not in profiler.metrics.counts
+    assert profiler.end_turn() is None
+
+
+def test_profiler_ignores_other_threads():
+    profiler = Profiler()
+    profiler.begin_turn()
+
+    def work():
+        with profiler.span('background'):
+            pass
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    thread.join()
+
+    assert profiler.end_turn().spans == []
+
+
+def test_profiler_exports(tmp_path):
+    profiler = Profiler()
+    for _ in range(2):
+        profiler.begin_turn()
+        with profiler.span('validate.flowgraph'):
+            pass
+        append_jsonl(tmp_path / 'profile.jsonl', profiler.end_turn())
+
+    records = [json.loads(line) for line in open(tmp_path / 'profile.jsonl')]
+    assert len(records) == 2
+    assert records[0]['spans'][0]['name'] == 'validate.flowgraph'
+
+    text = profiler.metrics.prometheus_text()
+    assert '# TYPE radio_cli_span_seconds histogram' in text
+    assert 'radio_cli_span_seconds_count{span="validate.flowgraph"} 2' in text
+    assert 'radio_cli_span_seconds_bucket{span="validate.flowgraph",le="+Inf"} 2' in text
+    assert 'radio_cli_span_seconds_count{span="turn"} 2' in text
@@ -46,3 +46,106 @@ def test_build_prompt_with_chat_tokenizer():
     assert '{ "flowgraph": { "nodes": [], "edges": [] } }' in output
     assert 'assistant: { "ok": 1 }' in output
     assert 'ADD_GEN:False' in output
+
+
+class DummyTokenizer(DummyChatTokenizer):
+    def __call__(self, text):
+        return {'input_ids': text.split(',')}
+
+
+def make_context() -> dict:
+    return {
+        'options': {'parameters': {'id': 'test'}},
+        'blocks': [
+            {'name': 'samp_rate', 'id': 'variable', 'parameters': {'value': '32000'}},
+            {'name': 'src_0', 'id': 'analog_sig_source_x', 'parameters': {'freq': '1000'},
+             'states': {'state': 'enabled'}},
+            {'name': 'sink_0', 'id': 'blocks_null_sink', 'parameters': {}},
+            {'name': 'other_0', 'id': 'blocks_null_source', 'parameters': {}},
+            {'name': 'other_1', 'id': 'blocks_null_sink', 'parameters': {}},
+        ],
+        'connections': [
+            ['src_0', '0', 'sink_0', '0'],
+            ['other_0', '0', 'other_1', '0'],
+        ],
+        'metadata': {'file_format': 1},
+    }
+
+
+def test_context_serializer_compact():
+    import json
+    from llm.prompts import ContextSerializer
+
+    context = make_context()
+    pretty = json.dumps(context, indent=4)
+    serializer = ContextSerializer()
+
+    compact = serializer.serialize(pretty)
+    assert compact == serializer.serialize(json.dumps(context, sort_keys=True))
+    assert ' ' not in compact and '\n' not in compact
+    assert json.loads(compact) == context
+
+    output = build_prompt(DummyChatTokenizer(), 'Start', pretty, serializer=serializer)
+    assert compact in output
+    assert serializer.serialize('not json') == 'not json'
+
+
+def test_context_serializer_prune_and_budget():
+    import json
+    from llm.prompts import ContextSerializer
+
+    context_json = json.dumps(make_context())
+
+    pruned = json.loads(ContextSerializer(prune=True).serialize(
+        context_json, 'Set the freq of src_0 to 2000.'
+    ))
+    names = [b['name'] for b in pruned['blocks']]
+    assert names == ['samp_rate', 'src_0', 'sink_0']
+    assert pruned['connections'] == [['src_0', '0', 'sink_0', '0']]
+
+    # Nothing named in the prompt, nothing to prune
+    unpruned = ContextSerializer(prune=True).serialize(context_json, 'Start it.')
+    assert len(json.loads(unpruned)['blocks']) == 5
+
+    tokenizer = DummyTokenizer()
+    serializer = ContextSerializer(max_tokens=20)
+    text = serializer.serialize(context_json, 'Remove src_0.', tokenizer)
+    assert len(tokenizer(text)['input_ids']) <= 20
+    fitted = json.loads(text)
+    assert 'metadata' not in fitted
+    assert 'src_0' in [b['name'] for b in fitted['blocks']]
+
+
+def test_context_serializer_restore_omitted():
+    import json
+    from llm.prompts import ContextSerializer
+
+    context = make_context()
+    context_json = json.dumps(context)
+    user_prompt = 'Replace sink_0 of src_0 with a throttle.'
+    serializer = ContextSerializer(prune=True)
+
+    # The model only saw samp_rate, src_0 and sink_0, and dropped sink_0
+    response = {
+        'options': context['options'],
+        'blocks': context['blocks'][:2] + [
+            {'name': 'throttle_0', 'id': 'blocks_throttle2', 'parameters': {}}
+        ],
+        'connections': [['src_0', '0', 'throttle_0', '0']],
+    }
+    restored = json.loads(serializer.restore_omitted(
+        json.dumps(response), context_json, user_prompt
+    ))
+    names = [b['name'] for b in restored['blocks']]
+    assert names == ['samp_rate', 'src_0', 'throttle_0', 'other_0', 'other_1']
+    assert restored['connections'] == [
+        ['src_0', '0', 'throttle_0', '0'],
+        ['other_0', '0', 'other_1', '0'],
+    ]
+
+    # Patches, and contexts that were not reduced, are left as they are
+    patch = json.dumps({'patch': [{'action': 'remove_block', 'block_id': 'sink_0'}]})
+    assert serializer.restore_omitted(patch, context_json, user_prompt) == patch
+    assert ContextSerializer().restore_omitted(
+        json.dumps(response), context_json, user_prompt
+    ) == json.dumps(response)
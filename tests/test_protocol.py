@@ -0,0 +1,65 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import pickle
+import threading
+import numpy as np
+import multiprocessing as mp
+
+from flowgraph.protocol import describe_result, pack_result, recv_message, send_message
+
+
+def round_trip(msg: dict) -> dict:
+    parent_conn, child_conn = mp.Pipe()
+    # Large buffers do not fit the pipe, so they are sent from a thread
+    sender = threading.Thread(target=send_message, args=(child_conn, msg))
+    sender.start()
+    try:
+        return recv_message(parent_conn)
+    finally:
+        sender.join()
+        parent_conn.close()
+        child_conn.close()
+
+
+def test_scalars_are_sent_inline():
+    for value in (None, True, 3, 2.5, 1 + 2j, 'ok', np.float32(0.5)):
+        fields, buffers = pack_result(value)
+        assert 'pickled' not in fields and buffers == []
+        assert round_trip({'type': 'get', 'result': value})['result'] == value
+
+    assert type(round_trip({'type': 'get', 'result': np.int64(7)})['result']) is int
+    assert round_trip({'type': 'started'}) == {'type': 'started'}
+
+
+def test_arrays_use_out_of_band_buffers():
+    taps = np.arange(1 << 18, dtype=np.complex64)
+    fields, buffers = pack_result(taps)
+    assert fields['pickled'] and fields['buffers'] == [taps.nbytes]
+    assert len(fields['result']) < 1024
+
+    msg = round_trip({'type': 'get', 'method': 'taps', 'result': taps})
+    assert msg == {'type': 'get', 'method': 'taps', 'result': msg['result']}
+    assert msg['result'].dtype == taps.dtype
+    assert np.array_equal(msg['result'], taps)
+
+    nested = {'points': np.ones((4, 2)), 'labels': ['a', 'b'], 'empty': np.zeros(0)}
+    result = round_trip({'type': 'get', 'result': nested})['result']
+    assert np.array_equal(result['points'], nested['points'])
+    assert result['labels'] == ['a', 'b'] and result['empty'].size == 0
+
+    assert round_trip({'type': 'get', 'result': [0.5] * 100})['result'] == [0.5] * 100
+
+
+def test_unpicklable_results_fall_back_to_strings():
+    lock = threading.Lock()
+    assert round_trip({'type': 'get', 'result': lock})['result'] == str(lock)
+    assert pickle.loads(pack_result((1, 2))[0]['result']) == (1, 2)
+
+
+def test_describe_result():
+    assert describe_result(2.5) == '2.5'
+    text = describe_result(np.arange(1000, dtype=np.float32))
+    assert text.startswith('array(shape=(1000,), dtype=float32)') and len(text) < 200
+    assert describe_result(list(range(100))) == 'list of 100: [0, 1, 2, 3, ..., 96, 97, 98, 99]'
@@ -7,7 +7,7 @@ import json
 
 from pathlib import Path
 
-from flowgraph.schema import Flowgraph
+from flowgraph.schema import Flowgraph, requires_gui
 
 
 def test_flowgraph_validation():
@@ -22,6 +22,22 @@ def test_flowgraph_validation():
     assert 'test' in flowgraph.options['parameters']['id']
 
 
+def test_flowgraph_requires_gui():
+    simple = json.load(Path('tests/mock_json/flowgraph_simple.json').open())
+    callbacks = json.load(Path('tests/mock_json/flowgraph_callbacks.json').open())
+    assert not requires_gui(Flowgraph(**simple))
+    assert requires_gui(Flowgraph(**callbacks))
+
+    # qt_gui is the default when the option is left out
+    del simple['options']['parameters']['generate_options']
+    assert requires_gui(Flowgraph(**simple))
+
+    callbacks['options']['parameters']['generate_options'] = 'no_gui'
+    assert requires_gui(Flowgraph(**callbacks))
+    callbacks['blocks'] = [b for b in callbacks['blocks'] if 'qtgui' not in b['id']]
+    assert not requires_gui(Flowgraph(**callbacks))
+
+
 def test_flowgraph_invalid():
     graph = {
         "name": "Invalid Graph",
@@ -32,3 +48,35 @@ def test_flowgraph_invalid():
         Flowgraph(**graph)
 
         assert 'missing' in str(e.value)
+
+
+def test_validate_many_actions():
+    from pydantic import ValidationError
+    from dataset_generation.schema import (
+        ACTION_ADAPTER, ConnectAction, GetAction, validate_many
+    )
+
+    common = {
+        'timestamp': '2025-01-01T00:00:00+00:00',
+        'flowgraph_id': 'test',
+        'source': 'flowgraph',
+    }
+    items = [
+        {**common, 'action': 'connect', 'src': ['a_0', '0'], 'dst': ['b_0', '0']},
+        {**common, 'action': 'get', 'method': 'get_samp_rate', 'source': 'runtime'},
+        {**common, 'action': 'new_flowgraph'},
+    ]
+
+    actions = validate_many(items)
+    assert isinstance(actions[0], ConnectAction)
+    assert isinstance(actions[1], GetAction)
+    assert actions[2].action == 'new_flowgraph'
+
+    lines = [json.dumps(item) for item in items]
+    assert validate_many(lines) == actions
+    assert validate_many([line.encode('utf-8') for line in lines]) == actions
+    assert validate_many([]) == []
+
+    with pytest.raises(ValidationError) as e:
+        ACTION_ADAPTER.validate_python({**common, 'action': 'explode'})
+    assert 'explode' in str(e.value)
@@ -0,0 +1,64 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import queue
+
+from llm.server import BatchScheduler, GenerationRequest
+
+
+def submit(scheduler: BatchScheduler, prompt_ids, max_tokens: int) -> queue.Queue:
+    messages = queue.Queue()
+    scheduler.submit(GenerationRequest(
+        prompt_ids=prompt_ids,
+        max_tokens=max_tokens,
+        emit=messages.put
+    ))
+    return messages
+
+
+def wait_result(messages: queue.Queue) -> dict:
+    text = ''
+    while True:
+        msg = messages.get(timeout=60)
+        if msg['type'] == 'token':
+            text += msg['text']
+        else:
+            return {**msg, 'text': text}
+
+
+def test_batch_scheduler_matches_generate(tiny_engine):
+    engine = tiny_engine
+    prompts = ['set the frequency to 2 kHz', 'add a throttle']
+
+    expected = []
+    for prompt in prompts:
+        inputs = engine.tokenizer(prompt, return_tensors='pt')
+        output = engine._generate_ids(inputs, 12, engine._eos_token_ids())
+        text = engine.tokenizer.decode(output[0, inputs['input_ids'].shape[1]:])
+        expected.append((text, engine.generate(prompt, max_tokens=12)))
+
+    # Prompts of different lengths are left-padded inside the batch
+    scheduler = BatchScheduler(engine, max_batch_size=4)
+    pending = [
+        submit(scheduler, engine.tokenizer.encode(prompt), max_tokens=12)
+        for prompt in prompts
+    ]
+    results = [wait_result(messages) for messages in pending]
+
+    assert [r['type'] for r in results] == ['done', 'done']
+    assert [(r['text'], r['response']) for r in results] == expected
+
+
+def test_batch_scheduler_request_error(tiny_engine):
+    engine = tiny_engine
+    scheduler = BatchScheduler(engine, max_batch_size=4)
+
+    # Token ids outside the vocabulary fail in the prefill
+    failing = submit(scheduler, [5, 500, 7], max_tokens=8)
+    assert wait_result(failing)['type'] == 'error'
+
+    # The scheduler keeps serving other requests
+    working = submit(scheduler, engine.tokenizer.encode('add a throttle'), max_tokens=8)
+    assert wait_result(working)['type'] == 'done'
+    assert not scheduler.active
@@ -0,0 +1,110 @@
+#
+# This file is part of the GNU Radio LLM project.
+#
+
+import numpy as np
+import multiprocessing as mp
+
+from flowgraph.tap import SampleRing, sample_stats
+
+
+def write_chunks(name: str, chunks: int):
+    ring = SampleRing.attach(name, np.complex64)
+    for i in range(chunks):
+        ring.write(np.arange(i * 100, (i + 1) * 100).astype(np.complex64))
+    ring.close()
+
+
+def test_ring_wraps_without_copies():
+    ring = SampleRing.create(capacity=8, dtype=np.float32)
+    try:
+        samples, first = ring.latest()
+        assert len(samples) == 0 and first == 0
+
+        ring.write(np.arange(5, dtype=np.float32))
+        ring.write(np.arange(5, 11, dtype=np.float32))
+        samples, first = ring.latest()
+        assert samples.tolist() == list(range(3, 11))
+        assert first == 3 and ring.written == 11
+        assert np.shares_memory(samples, ring.samples)
+        assert not samples.flags.writeable
+
+        samples, first = ring.latest(4)
+        assert samples.tolist() == [7, 8, 9, 10]
+        assert ring.is_intact(first)
+
+        # Chunks larger than the ring keep their tail
+        ring.write(np.arange(100, 120, dtype=np.float32))
+        assert not ring.is_intact(first)
+        assert ring.latest()[0].tolist() == list(range(112, 120))
+        assert ring.written == 31
+        del samples
+    finally:
+        ring.close()
+
+
+class ObservedSamples:
+    """
+    Sample buffer calling back before every copy into it.
+    """
+    def __init__(self, samples, on_write):
+        self.samples = samples
+        self.on_write = on_write
+
+    def __setitem__(self, key, value):
+        self.on_write()
+        self.samples[key] = value
+
+
+def test_ring_detects_write_in_progress():
+    ring = SampleRing.create(capacity=8, dtype=np.float32)
+    reader = SampleRing.attach(ring.name, np.float32)
+    try:
+        ring.write(np.arange(8, dtype=np.float32))
+        samples, first = reader.latest(4)
+        assert first == 4
+
+        # Overwrites samples 0 to 4 while the view still looks complete
+        intact = []
+        ring.samples = ObservedSamples(
+            ring.samples, lambda: intact.append(reader.is_intact(first))
+        )
+        ring.write(np.arange(8, 13, dtype=np.float32))
+        assert intact and not any(intact)
+        assert reader.written == 13
+        assert not reader.is_intact(first)
+        del samples
+    finally:
+        reader.close()
+        ring.close()
+
+
+def test_ring_across_processes():
+    ring = SampleRing.create(capacity=256, dtype=np.complex64)
+    try:
+        process = mp.Process(target=write_chunks, args=(ring.name, 10))
+        process.start()
+        process.join(timeout=10)
+        assert process.exitcode == 0
+
+        samples, first = ring.latest()
+        assert first == 1000 - 256
+        assert np.array_equal(samples.real, np.arange(first, 1000))
+        del samples
+    finally:
+        ring.close()
+
+
+def test_sample_stats():
+    sample_rate = 32000.0
+    t = np.arange(4096) / sample_rate
+    tone = (0.5 * np.exp(2j * np.pi * 1000 * t)).astype(np.complex64)
+
+    stats = sample_stats(tone, sample_rate)
+    assert abs(stats['power'] - 0.25) < 1e-4
+    assert abs(stats['power_db'] - 10 * np.log10(0.25)) < 1e-3
+    assert abs(stats['peak_freq'] - 1000) < sample_rate / 4096
+
+    stats = sample_stats(np.cos(2 * np.pi * 0.1 * np.arange(1024)).astype(np.float32))
+    assert abs(stats['peak_freq'] - 0.1) < 1 / 1024
+    assert abs(stats['rms'] - np.sqrt(0.5)) < 1e-3
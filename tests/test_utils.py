@@ -2,9 +2,15 @@
 # This file is part of the GNU Radio LLM project.
 #
 
+import json
 import pytest
 
-from llm.utils import extract_json_from_text
+from llm.utils import (
+    extract_json_from_text,
+    extract_response,
+    model_fingerprint,
+    repair_json
+)
 
 
 def test_extract_valid_json():
@@ -35,3 +41,54 @@ def test_extract_invalid_json():
 
     assert isinstance(result, list)
     assert len(result) == 0
+
+
+def test_repair_malformed_json():
+    text = 'Sure!\n```json\n{"foo": 1, "bar": [1, 2,], }\n```\nHope it helps.'
+    assert json.loads(repair_json(text)) == {'foo': 1, 'bar': [1, 2]}
+
+    text = "{'action': 'set', method: 'set_freq', 'value': 2.5, 'ok': True}"
+    assert json.loads(repair_json(text)) == {
+        'action': 'set', 'method': 'set_freq', 'value': 2.5, 'ok': True
+    }
+
+    text = '{"name": "it\'s", "quote": \'say "hi"\',, "line": "a\nb"}'
+    assert json.loads(repair_json(text)) == {'name': "it's", 'quote': 'say "hi"', 'line': 'a\nb'}
+
+    assert repair_json('no JSON here') is None
+
+
+def test_repair_truncated_json():
+    text = '{"blocks": [{"name": "a", "parameters": {"x": "1"}}, {"name": "b", "param'
+    assert json.loads(repair_json(text)) == {
+        'blocks': [{'name': 'a', 'parameters': {'x': '1'}}, {'name': 'b'}]
+    }
+
+    # Partial values and keys without values are dropped
+    assert json.loads(repair_json('{"a": 1, "b": "blocks_thr')) == {'a': 1}
+    assert json.loads(repair_json('{"a": 1, "b":')) == {'a': 1}
+    assert json.loads(repair_json('{"a": [1, 2')) == {'a': [1]}
+    assert json.loads(repair_json('{"a": [1, 2]')) == {'a': [1, 2]}
+
+    # Numbers and literals at the end of the text may be cut off
+    assert json.loads(repair_json('{"a": 1, "freq": 2.4')) == {'a': 1}
+    assert json.loads(repair_json('{"a": 1, "ok": tr')) == {'a': 1}
+    assert json.loads(repair_json('{"a": 1, "b": 2 ')) == {'a': 1, 'b': 2}
+
+    assert extract_response('Result: {"foo": 1} and {"bar": 2') == '{"foo": 1}'
+    assert json.loads(extract_response('Result: {"bar": 2, "baz')) == {'bar': 2}
+    assert extract_response('Nothing') == ''
+
+
+def test_model_fingerprint(tmp_path):
+    model_dir = tmp_path / 'output'
+    model_dir.mkdir()
+    (model_dir / 'adapter_model.safetensors').write_bytes(b'1234')
+
+    fingerprint = model_fingerprint(str(model_dir))
+    assert fingerprint == model_fingerprint(str(model_dir))
+
+    (model_dir / 'adapter_model.safetensors').write_bytes(b'123456')
+    assert fingerprint != model_fingerprint(str(model_dir))
+
+    assert model_fingerprint('Qwen/Qwen2.5-Coder-1.5B-Instruct') != fingerprint